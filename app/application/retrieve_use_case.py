@@ -2,6 +2,7 @@
 from __future__ import annotations
 from typing import Dict, Any, List
 from app.infra.search.router import SearchRouter
+from app.infra.observability.tracing import traced
 
 def normalize_text(s: str) -> str:
     return (s or "").strip()
@@ -10,6 +11,7 @@ class RetrieveCandidatesUseCase:
     def __init__(self, router: SearchRouter):
         self.router = router
 
+    @traced("retrieve_uc.run", attrs=lambda self, query, *a, **k: {"query": query})
     async def run(self, query: str, k: int = 5) -> Dict[str, Any]:
         q = normalize_text(query)
         items = await self.router.search(q, k=k)
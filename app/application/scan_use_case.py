@@ -1,9 +1,10 @@
 # app/application/scan_use_case.py
 from __future__ import annotations
 import os
-from typing import Optional, Any, Dict
+from typing import Optional, Any, AsyncIterator, Dict
 
 from app.infra.pipelines.scan_pipeline import ScanPipeline
+from app.infra.observability.tracing import traced
 from app.infra.search.router import SearchRouter  # async blend: Mongo → Atlas → FAISS
 
 # Default SLA (bisa dioverride via ENV):
@@ -41,6 +42,7 @@ class ScanUseCase:
         self.t1_timeout_ms = t1_timeout_ms
         self.t2_timeout_ms = t2_timeout_ms
 
+    @traced("scan_uc.run_single_shot")
     async def run_single_shot(
         self,
         image_bytes: bytes,
@@ -77,6 +79,18 @@ class ScanUseCase:
         )
 
 
+    async def stream_single_shot(
+        self,
+        image_bytes: bytes,
+        *,
+        t2_timeout_ms: Optional[int] = None,
+        extra_ctx: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Scan progresif: yield stage='partial' (T1) lalu stage='final' (T2)."""
+        t2 = self.t2_timeout_ms if t2_timeout_ms is None else int(t2_timeout_ms)
+        async for ev in self.pipe.stream(image_bytes, t2_timeout_ms=t2, extra_ctx=extra_ctx or {}):
+            yield ev
+
 # Helper untuk FastAPI Depends (opsional)
 def get_scan_use_case() -> ScanUseCase:
     return ScanUseCase()
@@ -1,11 +1,12 @@
 # app/application/use_cases.py
 from __future__ import annotations
 
-import json
+import uuid
+import asyncio
 import datetime as dt
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from pathlib import Path
-import tempfile, shutil, os
+import tempfile, shutil, os, time
 from typing import Union
 from fastapi import UploadFile
 from PIL import Image
@@ -19,6 +20,10 @@ from app.domain.detectors import extract_info  # interpret() no longer used for
 from app.domain.models import Product
 
 from app.infra.search.router import SearchRouter  # fallback jika perlu
+from app.infra.search.nie_registry import NieRegistry, normalize_nie
+from app.infra.cache.response_cache import VerifyResponseCache, normalize_text
+from app.infra.cache.single_flight import SingleFlight
+from app.infra.observability.tracing import traced
 
 # ⬇️ NEW: confidence aggregation
 from app.domain.confidence import (
@@ -29,6 +34,40 @@ from app.domain.services.verification_aggregator import aggregate
 import logging
 logger = logging.getLogger("medverify.verify")
 
+BATCH_CONCURRENCY = int(os.getenv("VERIFY_BATCH_CONCURRENCY", "16"))
+
+# Deadline per sumber evidence (fan-out paralel di _verify_with_confidence).
+# Cache produk ada di dalam repo (read-through, PRODUCT_CACHE_TIMEOUT_MS) → termasuk budget exact.
+EXACT_BUDGET_MS  = int(os.getenv("VERIFY_EXACT_BUDGET_MS", "300"))
+SEARCH_BUDGET_MS = int(os.getenv("VERIFY_SEARCH_BUDGET_MS", "1500"))
+
+OCR_TITLE_CONF = 1.0  # jika kamu punya conf dari OCR title, masukkan di sini
+
+# Refresh stale-while-revalidate yang sedang jalan (key cache) + referensi task agar tidak di-GC.
+# Use case dipakai bersama lintas request (app-scoped) → state per request tidak disimpan di instance.
+_REFRESHING: set = set()
+_BG_TASKS: set = set()
+_EXPLAIN_TASKS: Dict[str, asyncio.Task] = {}  # request_id → explain() mode deferred yang masih jalan
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _BG_TASKS.add(task)
+    task.add_done_callback(_BG_TASKS.discard)
+    return task
+
+
+# Mode explain(): "sync" (LLM di critical path, perilaku lama) | "deferred" (template dulu, LLM di background)
+EXPLAIN_MODE = os.getenv("VERIFY_EXPLAIN_MODE", "sync").lower()
+EXPLAIN_TTL_S = int(os.getenv("VERIFY_EXPLAIN_TTL_S", "600"))
+EXPLAIN_KEY_PREFIX = "explain:"
+
+_DECISION_LABEL = {
+    "valid": "terdaftar dan valid di BPOM",
+    "invalid": "tidak valid / tidak terdaftar di BPOM",
+    "unknown": "belum dapat dipastikan",
+}
+
 
 def _dt_parse(x: Any) -> Optional[dt.datetime]:
     if not x:
@@ -88,6 +127,84 @@ def _match_strength_from_score(score: float, src_hint: str) -> MatchStrength:
     return MatchStrength.WEAK
 
 
+def _build_data(agg_result: VerificationResult) -> Dict[str, Any]:
+    """Bentuk blok `data` response dari payload evidence pemenang."""
+    winner_payload = (agg_result.winner.payload if agg_result.winner else {}) or {}
+    return {
+        "status": winner_payload.get("state")
+                  or winner_payload.get("status")
+                  or ("unregistered" if (winner_payload.get("not_found") or winner_payload.get("unregistered")) else "unknown"),
+        "source": agg_result.top_source.value if agg_result.top_source else "none",
+        "product": {
+            "nie": winner_payload.get("nie") or winner_payload.get("_id"),
+            "name": winner_payload.get("name"),
+            "manufacturer": winner_payload.get("manufacturer"),
+            "category": winner_payload.get("category"),
+            "dosage_form": winner_payload.get("dosage_form"),
+            "composition": winner_payload.get("composition"),
+            "updated_at": winner_payload.get("updated_at")
+                           or winner_payload.get("published_at")
+                           or winner_payload.get("last_seen"),
+        },
+    }
+
+
+def _template_message(decision: str, data: Dict[str, Any]) -> str:
+    """Ringkasan deterministik (tanpa LLM) dari keputusan + data produk."""
+    prod = data.get("product") or {}
+    name = prod.get("name") or "Produk"
+    nie = f" (NIE {prod['nie']})" if prod.get("nie") else ""
+    label = _DECISION_LABEL.get(decision, decision)
+    msg = f"{name}{nie} {label}."
+    if prod.get("manufacturer"):
+        msg += f" Pendaftar: {prod['manufacturer']}."
+    return msg + f" Sumber: {data.get('source') or '-'}."
+
+
+def _explain_input(out: Dict[str, Any]) -> Dict[str, Any]:
+    """Input explain() dari response verify (sama dengan yang dipakai mode sync)."""
+    return {
+        "decision": out.get("decision"),
+        "confidence": out.get("confidence"),
+        "source": out.get("source"),
+        "product": (out.get("data") or {}).get("product"),
+        "explanation": out.get("explanation"),
+    }
+
+
+# Flag response yang tidak boleh masuk cache response (hasil parsial / explain fallback)
+_DEGRADED_FLAGS = {"source_timeout", "llm_offline", "llm_fallback"}
+
+
+def _degraded_flags(agg_result: VerificationResult) -> List[str]:
+    if any((ev.payload or {}).get("timed_out") for ev in agg_result.all_evidence):
+        return ["source_timeout"]
+    return []
+
+
+def _cacheable(out: Dict[str, Any]) -> bool:
+    return not (_DEGRADED_FLAGS & set(out.get("flags") or ()))
+
+
+def _build_trace(agg_result: VerificationResult) -> List[Dict[str, Any]]:
+    trace = []
+    for ev in agg_result.all_evidence:
+        trace.append({
+            "source": ev.source.value,
+            "product_id": ev.product_id,
+            "name": ev.name,
+            "match_strength": ev.match_strength.value,
+            "quality": ev.quality,
+            "recency_factor": ev.recency_factor,
+            "name_confidence": ev.name_confidence,
+            "provider_score": ev.provider_score,
+            "reasons": ev.reasons,
+            "payload": ev.payload or {},
+            "debug": ev.debug or {},
+        })
+    return trace
+
+
 class VerifyLabelUseCase:
     def __init__(
         self,
@@ -97,11 +214,17 @@ class VerifyLabelUseCase:
         cache: CachePort,
         llm: LlmPort,
         search_router: SearchRouter | None = None,  # opsional
+        nie_registry: NieRegistry | None = None,    # opsional: jawaban "pasti tidak terdaftar" tanpa Mongo
+        response_cache: VerifyResponseCache | None = None,  # opsional: cache response /v1/verify utuh
+        single_flight: SingleFlight | None = None,          # opsional: coalescing verify identik yang konkuren
     ):
         self.ocr, self.repo = ocr, repo
         self.cache, self.llm = cache, llm
         self.satusehat = satusehat  # tidak digunakan lagi
         self.search = search_router or SearchRouter(repo=self.repo)
+        self.nie_registry = nie_registry
+        self.response_cache = response_cache
+        self.single_flight = single_flight
 
     # async def execute(self, payload, image):
     #     cmd = VerifyLabelCommand(
@@ -181,7 +304,15 @@ class VerifyLabelUseCase:
     #         "flags": [],
     #     }
 
-    async def execute(self, payload, image: Union[UploadFile, Path, bytes, bytearray, np.ndarray, Image.Image, None]):
+    @traced("verify_uc.execute", attrs=lambda self, payload, *a, **k: {"nie": getattr(payload, "nie", None), "explain": k.get("explain", "sync")})
+    async def execute(self, payload, image: Union[UploadFile, Path, bytes, bytearray, np.ndarray, Image.Image, None],
+                      *, explain: str = "sync", log_lookup: bool = True):
+        """
+        explain="sync"     → `message` dari LLM explain() (menunggu OpenAI)
+        explain="deferred" → `message` template deterministik + `explain_status="pending"`;
+                             LLM dijalankan caller via complete_explanation()
+        log_lookup=False   → caller sendiri yang mencatat `lookups` (mis. per pemanggil single-flight)
+        """
         tmp_path: Path | None = None
         image_path: Path | None = None
 
@@ -230,56 +361,31 @@ class VerifyLabelUseCase:
 
             # (lanjutan method kamu tetap sama di bawah ini)
             agg_result = await self._verify_with_confidence(nie, text)
-            key = nie or (agg_result.winner.product_id if agg_result.winner else "-")
-            try:
-                await self.repo.save_lookup(key, agg_result.decision)
-            except Exception:
-                pass
-
-            winner_payload = (agg_result.winner.payload if agg_result.winner else {}) or {}
-            data = {
-                "status": winner_payload.get("state")
-                          or winner_payload.get("status")
-                          or ("unregistered" if (winner_payload.get("not_found") or winner_payload.get("unregistered")) else "unknown"),
-                "source": agg_result.top_source.value if agg_result.top_source else "none",
-                "product": {
-                    "nie": winner_payload.get("nie") or winner_payload.get("_id"),
-                    "name": winner_payload.get("name"),
-                    "manufacturer": winner_payload.get("manufacturer"),
-                    "category": winner_payload.get("category"),
-                    "composition": winner_payload.get("composition"),
-                    "updated_at": winner_payload.get("updated_at")
-                                   or winner_payload.get("published_at")
-                                   or winner_payload.get("last_seen"),
-                },
-            }
+            if log_lookup:
+                key = nie or (agg_result.winner.product_id if agg_result.winner else "-")
+                await self._log_lookup(key, agg_result.decision)
 
-            try:
-                expl = await self.llm.explain({
-                    "decision": agg_result.decision,
-                    "confidence": agg_result.confidence,
-                    "source": data["source"],
-                    "product": data["product"],
-                    "explanation": agg_result.explanation,
-                })
-            except Exception:
-                expl = agg_result.explanation
-
-            trace = []
-            for ev in agg_result.all_evidence:
-                trace.append({
-                    "source": ev.source.value,
-                    "product_id": ev.product_id,
-                    "name": ev.name,
-                    "match_strength": ev.match_strength.value,
-                    "quality": ev.quality,
-                    "recency_factor": ev.recency_factor,
-                    "name_confidence": ev.name_confidence,
-                    "provider_score": ev.provider_score,
-                    "reasons": ev.reasons,
-                    "payload": ev.payload or {},
-                    "debug": ev.debug or {},
-                })
+            data = _build_data(agg_result)
+            flags = _degraded_flags(agg_result)
+
+            if explain == "deferred":
+                expl = _template_message(agg_result.decision, data)
+            else:
+                if not getattr(self.llm, "available", True):
+                    flags.append("llm_offline")
+                try:
+                    expl = await self.llm.explain({
+                        "decision": agg_result.decision,
+                        "confidence": agg_result.confidence,
+                        "source": data["source"],
+                        "product": data["product"],
+                        "explanation": agg_result.explanation,
+                    })
+                except Exception:
+                    expl = agg_result.explanation
+                    flags.append("llm_fallback")
+
+            trace = _build_trace(agg_result)
 
             # ----- Logging ringkas, pakai variabel yang sudah dihitung di atas -----
             logger.info(
@@ -297,15 +403,19 @@ class VerifyLabelUseCase:
                 logger.info("[verify] no winner")
 
 
-            return {
+            out = {
+                "decision": agg_result.decision,
                 "data": data,
                 "message": expl,
                 "confidence": round(float(agg_result.confidence or 0.0), 3),
                 "source": data["source"],
                 "explanation": agg_result.explanation,
                 "trace": trace,
-                "flags": [],
+                "flags": flags,
             }
+            if explain == "deferred":
+                out["explain_status"] = "pending"
+            return out
 
         finally:
             # 4) Bersihkan file temp jika kita yang buat
@@ -315,134 +425,362 @@ class VerifyLabelUseCase:
                 except Exception:
                     pass
 
-    async def _verify_with_confidence(self, nie: str | None, text: str | None) -> VerificationResult:
+    @traced("verify_uc.execute_cached", attrs=lambda self, payload, **k: {"nie": getattr(payload, "nie", None), "bypass": k.get("bypass", False)})
+    async def execute_cached(self, payload, *, bypass: bool = False,
+                             explain: Optional[str] = None) -> tuple[Dict[str, Any], str]:
+        """
+        /v1/verify tanpa foto dengan cache response utuh (stale-while-revalidate).
+        Return (response, status) dengan status ∈ {"hit", "stale", "miss", "bypass", "off"}.
+
+        - hit   : langsung dari cache
+        - stale : dari cache + refresh di background (maks. satu refresh per key)
+        - miss  : hitung penuh lalu simpan
+        - bypass: hitung penuh, cache tidak dibaca/ditulis (header debug)
+        Lookup tetap dicatat ke `lookups` pada hit agar popularitas suggest tidak bergeser.
+
+        explain="deferred": pada miss, response berisi pesan template + `request_id`; explain()
+        jalan di background (explanation_task(request_id)) lalu hasilnya disimpan per request_id dan
+        response lengkap baru ditulis ke cache. Entri cache selalu berisi pesan LLM.
+        """
+        mode = (explain or EXPLAIN_MODE).lower()
+        rc = self.response_cache
+        key = None
+        status = "off"
+        if rc is not None and bypass:
+            rc.counts["bypass"] += 1
+            status = "bypass"
+        elif rc is not None:
+            key = await rc.key(getattr(payload, "nie", None), getattr(payload, "text", None))
+            status, cached = await rc.get(key)
+            if cached is not None:
+                prod = (cached.get("data") or {}).get("product") or {}
+                _spawn(self._log_lookup(prod.get("nie") or getattr(payload, "nie", None) or "-",
+                                        cached.get("decision") or "-"))
+                if status == "stale" and key not in _REFRESHING:
+                    _REFRESHING.add(key)
+                    _spawn(self._refresh_cached(key, payload))
+                return cached, status
+
+        if mode != "deferred":
+            out = await self._coalesced_execute(payload, "sync")
+            if key is not None:
+                await self._put_cached(key, out)
+            return out, status
+
+        out = await self._coalesced_execute(payload, "deferred")
+        rid = str(uuid.uuid4())
+        out["request_id"] = rid
+        await self._store_explanation(rid, {"status": "pending"})
+        task = _spawn(self.complete_explanation(out, request_id=rid, cache_key=key))
+        _EXPLAIN_TASKS[rid] = task
+        task.add_done_callback(lambda _t: _EXPLAIN_TASKS.pop(rid, None))
+        return out, status
+
+    async def _coalesced_execute(self, payload, explain: str) -> Dict[str, Any]:
+        """
+        execute() tanpa foto; request identik yang konkuren berbagi satu komputasi (single-flight).
+        Lookup dicatat per pemanggil (di luar flight) agar popularitas suggest tetap menghitung N scan.
+        """
+        if self.single_flight is None:
+            return await self.execute(payload=payload, image=None, explain=explain)
+        nie = getattr(payload, "nie", None)
+        flight_key = ("verify", explain, normalize_nie(nie) if nie else "", normalize_text(getattr(payload, "text", None)))
+        out = await self.single_flight.do(
+            flight_key, lambda: self.execute(payload=payload, image=None, explain=explain, log_lookup=False)
+        )
+        prod = (out.get("data") or {}).get("product") or {}
+        await self._log_lookup(nie or prod.get("nie") or "-", out.get("decision") or "-")
+        return out
+
+    def explanation_task(self, request_id: Optional[str]) -> Optional[asyncio.Task]:
+        """Task explain() yang masih berjalan untuk request_id (None bila sudah selesai/tidak ada)."""
+        return _EXPLAIN_TASKS.get(request_id) if request_id else None
+
+    async def complete_explanation(self, out: Dict[str, Any], *, request_id: Optional[str] = None,
+                                   cache_key: Optional[str] = None) -> str:
+        """Jalankan explain() untuk response mode deferred; simpan per request_id & isi cache."""
+        flags = list(out.get("flags") or [])
+        if not getattr(self.llm, "available", True):
+            flags.append("llm_offline")
+        try:
+            expl = await self.llm.explain(_explain_input(out))
+        except Exception:
+            expl = out.get("explanation") or out.get("message") or ""
+            flags.append("llm_fallback")
+        if request_id:
+            await self._store_explanation(request_id, {"status": "ready", "message": expl})
+        if cache_key is not None and self.response_cache is not None:
+            full = {k: v for k, v in out.items() if k not in ("request_id", "explain_status")}
+            await self._put_cached(cache_key, {**full, "message": expl, "flags": flags})
+        return expl
+
+    async def get_explanation(self, request_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.cache.get(EXPLAIN_KEY_PREFIX + request_id)
+        except Exception:
+            return None
+
+    async def _store_explanation(self, request_id: str, value: Dict[str, Any]) -> None:
+        try:
+            await self.cache.set(EXPLAIN_KEY_PREFIX + request_id, value, ttl=EXPLAIN_TTL_S)
+        except Exception:
+            logger.warning("[verify] store explanation failed request_id=%s", request_id)
+
+    async def _put_cached(self, key: str, out: Dict[str, Any]) -> None:
+        """Simpan ke cache response kecuali hasil degraded (sumber timeout / LLM offline/error)."""
+        if not _cacheable(out):
+            self.response_cache.counts["skip_degraded"] += 1
+            return
+        await self.response_cache.put(key, out)
+
+    async def _refresh_cached(self, key: str, payload) -> None:
+        try:
+            # Lookup sudah dicatat untuk caller yang melayani hit stale; refresh tidak dihitung lagi
+            out = await self.execute(payload=payload, image=None, log_lookup=False)
+            await self._put_cached(key, out)
+            self.response_cache.counts["refresh"] += 1
+        except Exception:
+            logger.exception("[verify-cache] background refresh failed key=%s", key)
+        finally:
+            _REFRESHING.discard(key)
+
+    async def _log_lookup(self, nie: str, status: str) -> None:
+        try:
+            await self.repo.save_lookup(nie, status)
+        except Exception:
+            pass
+
+    async def _verify_with_confidence(
+        self,
+        nie: str | None,
+        text: str | None,
+        *,
+        prefetched: Dict[str, Optional[Dict[str, Any]]] | None = None,
+    ) -> VerificationResult:
         """
-        Kumpulkan evidence dari:
-          - Cache/Mongo (exact)
+        Kumpulkan evidence secara paralel (fan-out) dari:
+          - Mongo exact (by NIE; read-through ProductCache di repo)
           - SearchRouter (lex/faiss)
+        Tiap sumber punya deadline sendiri (VERIFY_*_BUDGET_MS); sumber yang lewat budget
+        dicatat sebagai Evidence `timed_out` dan tidak menahan response.
         Kemudian agregasi → keputusan + confidence.
+
+        prefetched: hasil bulk `find_by_nies` (key = NIE ternormalisasi). Bila NIE ada di
+        map ini, `find_by_nie` dilewati di kedua leg — exact dan langkah exact SearchRouter
+        (dipakai batch verify).
         """
-        ocr_title_conf = 1.0  # jika kamu punya conf dari OCR title, masukkan di sini
-        evs: List[Evidence] = []
+        nie_key = normalize_nie(nie) if nie else ""
+        use_prefetched = prefetched is not None and nie_key in prefetched
+        q = (nie or text or "").strip()
 
-        # 0) Cache-by-NIE (jika ada)
-        if nie:
-            hit = await self.cache.get(nie)
-            if hit is not None:
-                raw_doc = None
-                if isinstance(hit, dict):
-                    raw_doc = hit
-                elif isinstance(hit, str):
-                    try:
-                        d = json.loads(hit)
-                        if isinstance(d, dict):
-                            raw_doc = d
-                    except Exception:
-                        if hasattr(self.cache, "delete"):
-                            try:
-                                await self.cache.delete(nie)
-                            except Exception:
-                                pass
-
-                if raw_doc:
-                    evs.append(
-                        Evidence(
-                            source=EvidenceSource.MONGO,
-                            product_id=(raw_doc.get("_id") or raw_doc.get("nie")),
-                            name=raw_doc.get("name"),
-                            payload=raw_doc,
-                            match_strength=_match_strength_exact(nie, raw_doc),
-                            quality=_quality_from_doc(raw_doc, base=0.35),
-                            recency_factor=_recency_factor_from_doc(raw_doc),
-                            name_confidence=ocr_title_conf,
-                            provider_score=1.0,
-                            reasons=["Cache hit (Mongo-derived)."],
-                        )
-                    )
-
-        # 1) Exact Mongo by NIE (paling kuat)
+        jobs = []  # (nama, sumber evidence untuk timeout, coroutine, budget_ms)
         if nie:
+            exact = (self._exact_evidence(nie, prefetched.get(nie_key), from_prefetch=True)
+                     if use_prefetched else self._exact_evidence(nie))
+            jobs.append(("mongo_exact", EvidenceSource.MONGO, exact, EXACT_BUDGET_MS))
+        if q:
+            search = (self._search_evidence(q, skip_exact=True, exact_doc=prefetched.get(nie_key))
+                      if use_prefetched else self._search_evidence(q))
+            jobs.append(("search", EvidenceSource.FAISS, search, SEARCH_BUDGET_MS))
+
+        results = await asyncio.gather(
+            *(self._with_deadline(name, src, coro, budget) for name, src, coro, budget in jobs)
+        )
+        evs: List[Evidence] = [ev for part in results for ev in part]
+
+        # Agregasi
+        return aggregate(evs)
+
+    async def _with_deadline(self, name: str, source: EvidenceSource, coro, budget_ms: int) -> List[Evidence]:
+        t0 = time.perf_counter()
+        try:
+            return await asyncio.wait_for(coro, timeout=max(1, budget_ms) / 1000)
+        except asyncio.TimeoutError:
+            logger.warning("[verify] source=%s timed out after %dms", name, budget_ms)
+            return [
+                Evidence(
+                    source=source,
+                    product_id=None,
+                    name=None,
+                    payload={"timed_out": True, "source": name},
+                    match_strength=MatchStrength.NONE,
+                    quality=0.0,
+                    recency_factor=0.5,
+                    name_confidence=0.0,
+                    provider_score=0.0,
+                    reasons=[f"Source '{name}' exceeded its {budget_ms} ms budget."],
+                    debug={"timeout_ms": budget_ms, "elapsed_ms": int((time.perf_counter() - t0) * 1000)},
+                )
+            ]
+        except Exception:
+            logger.exception("[verify] source=%s failed", name)
+            return []
+
+    async def _exact_evidence(self, nie: str, doc: Optional[Dict[str, Any]] = None,
+                              *, from_prefetch: bool = False) -> List[Evidence]:
+        # Exact Mongo by NIE (paling kuat)
+        registry_absent = bool(self.nie_registry and self.nie_registry.definitely_absent(nie))
+        if not from_prefetch and not registry_absent:
             try:
                 doc = await self.repo.find_by_nie(nie)
             except Exception:
                 doc = None
 
-            if doc:
-                evs.append(
-                    Evidence(
-                        source=EvidenceSource.MONGO,
-                        product_id=(doc.get("_id") or doc.get("nie")),
-                        name=doc.get("name"),
-                        payload=doc,
-                        match_strength=_match_strength_exact(nie, doc),
-                        quality=_quality_from_doc(doc, base=0.4),
-                        recency_factor=_recency_factor_from_doc(doc),
-                        name_confidence=ocr_title_conf,
-                        provider_score=1.0,
-                        reasons=["Official record found by exact NIE."],
-                    )
+        if doc:
+            return [
+                Evidence(
+                    source=EvidenceSource.MONGO,
+                    product_id=(doc.get("_id") or doc.get("nie")),
+                    name=doc.get("name"),
+                    payload=doc,
+                    match_strength=_match_strength_exact(nie, doc),
+                    quality=_quality_from_doc(doc, base=0.4),
+                    recency_factor=_recency_factor_from_doc(doc),
+                    name_confidence=OCR_TITLE_CONF,
+                    provider_score=1.0,
+                    reasons=["Official record found by exact NIE."],
                 )
-            else:
-                evs.append(
-                    Evidence(
-                        source=EvidenceSource.MONGO,
-                        product_id=nie,
-                        name=None,
-                        payload={"not_found": True},
-                        match_strength=MatchStrength.NONE,
-                        quality=0.2,
-                        recency_factor=0.5,
-                        name_confidence=ocr_title_conf,
-                        provider_score=0.0,
-                        reasons=["No official record in Mongo for this NIE."],
-                    )
+            ]
+        return [
+            Evidence(
+                source=EvidenceSource.MONGO,
+                product_id=nie,
+                name=None,
+                payload={"not_found": True},
+                match_strength=MatchStrength.NONE,
+                quality=0.2,
+                recency_factor=0.5,
+                name_confidence=OCR_TITLE_CONF,
+                provider_score=0.0,
+                reasons=[
+                    "NIE not in in-memory registry (products snapshot)."
+                    if registry_absent else
+                    "No official record in Mongo for this NIE."
+                ],
+            )
+        ]
+
+    async def _search_evidence(self, q: str, *, skip_exact: bool = False,
+                               exact_doc: Optional[Dict[str, Any]] = None) -> List[Evidence]:
+        # Router search (lex/faiss) — pakai NIE atau text
+        try:
+            hits = await self.search.search(q, k=5, skip_exact=skip_exact, exact_doc=exact_doc)
+        except Exception:
+            hits = []
+
+        if not hits:
+            return [
+                Evidence(
+                    source=EvidenceSource.FAISS,
+                    product_id=None,
+                    name=None,
+                    payload={"not_found": True},
+                    match_strength=MatchStrength.NONE,
+                    quality=0.3,
+                    recency_factor=0.5,
+                    name_confidence=OCR_TITLE_CONF,
+                    provider_score=0.0,
+                    reasons=["No matches from SearchRouter (lex/faiss)."],
                 )
+            ]
 
-        # 2) Router search (lex/faiss) — pakai NIE atau text
-        q = (nie or text or "").strip()
-        if q:
-            try:
-                hits = await self.search.search(q, k=5)
-            except Exception:
-                hits = []
-
-            if hits:
-                for d in hits:
-                    src_hint = (d.get("_src") or "").lower()
-                    score = float(d.get("_score") or 0.0)
-                    ms = _match_strength_from_score(score, src_hint)
-                    evs.append(
-                        Evidence(
-                            source=EvidenceSource.FAISS if "faiss" in src_hint else EvidenceSource.MONGO if "exact" in src_hint else EvidenceSource.FAISS if "semantic" in src_hint else EvidenceSource.FAISS if "embed" in src_hint else EvidenceSource.MONGO if "lex" in src_hint and d.get("nie") else EvidenceSource.FAISS if "lex" in src_hint else EvidenceSource.FAISS,
-                            product_id=(d.get("_id") or d.get("nie")),
-                            name=d.get("name"),
-                            payload=d,
-                            match_strength=ms if src_hint != "exact" else _match_strength_exact(q, d),
-                            quality=_quality_from_doc(d, base=0.3 if "faiss" in src_hint else 0.35),
-                            recency_factor=_recency_factor_from_doc(d),
-                            name_confidence=ocr_title_conf,
-                            provider_score=score,
-                            reasons=[f"SearchRouter hit ({src_hint or 'unknown'}) with score={score:.2f}."],
-                        )
-                    )
-            else:
-                evs.append(
-                    Evidence(
-                        source=EvidenceSource.FAISS,
-                        product_id=None,
-                        name=None,
-                        payload={"not_found": True},
-                        match_strength=MatchStrength.NONE,
-                        quality=0.3,
-                        recency_factor=0.5,
-                        name_confidence=ocr_title_conf,
-                        provider_score=0.0,
-                        reasons=["No matches from SearchRouter (lex/faiss)."],
-                    )
+        evs: List[Evidence] = []
+        for d in hits:
+            src_hint = (d.get("_src") or "").lower()
+            score = float(d.get("_score") or 0.0)
+            ms = _match_strength_from_score(score, src_hint)
+            evs.append(
+                Evidence(
+                    source=EvidenceSource.FAISS if "faiss" in src_hint else EvidenceSource.MONGO if "exact" in src_hint else EvidenceSource.FAISS if "semantic" in src_hint else EvidenceSource.FAISS if "embed" in src_hint else EvidenceSource.MONGO if "lex" in src_hint and d.get("nie") else EvidenceSource.FAISS if "lex" in src_hint else EvidenceSource.FAISS,
+                    product_id=(d.get("_id") or d.get("nie")),
+                    name=d.get("name"),
+                    payload=d,
+                    match_strength=ms if src_hint != "exact" else _match_strength_exact(q, d),
+                    quality=_quality_from_doc(d, base=0.3 if "faiss" in src_hint else 0.35),
+                    recency_factor=_recency_factor_from_doc(d),
+                    name_confidence=OCR_TITLE_CONF,
+                    provider_score=score,
+                    reasons=[f"SearchRouter hit ({src_hint or 'unknown'}) with score={score:.2f}."],
                 )
+            )
+        return evs
 
-        # 3) Agregasi
-        return aggregate(evs)
+    async def execute_batch(
+        self,
+        items: List[Dict[str, Optional[str]]],
+        *,
+        concurrency: int = BATCH_CONCURRENCY,
+        include_trace: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Verifikasi massal (inventaris partner) tanpa LLM per item.
+
+        1) Dedup item berdasarkan (NIE ternormalisasi, teks lower)
+        2) Resolve semua NIE dengan satu query `$in` (registry in-memory menyaring yang pasti absen)
+        3) Evidence + agregasi per item unik, SearchRouter dibatasi semaphore
+        4) Yield hasil per item asli begitu selesai (urutan = selesai duluan, ada `index`)
+        5) Log `lookups` ditulis sekali via insert_many di akhir
+        """
+        groups: Dict[tuple, List[int]] = {}
+        for i, it in enumerate(items):
+            nie = (it.get("nie") or "").strip() or None
+            text = (it.get("text") or "").strip() or None
+            key = (normalize_nie(nie) if nie else "", (text or "").lower())
+            groups.setdefault(key, []).append(i)
+
+        nies = sorted({k[0] for k in groups if k[0]})
+        if self.nie_registry is not None:
+            nies_q = [n for n in nies if not self.nie_registry.definitely_absent(n)]
+        else:
+            nies_q = nies
+        try:
+            found = await self.repo.find_by_nies(nies_q) if nies_q else {}
+        except Exception:
+            logger.exception("[verify-batch] find_by_nies failed; fallback per item")
+            found = None
+        prefetched = None if found is None else {n: found.get(n) for n in nies}
+
+        sem = asyncio.Semaphore(max(1, concurrency))
+        lookups: List[tuple] = []
+
+        async def one(key: tuple, idxs: List[int]) -> List[Dict[str, Any]]:
+            first = items[idxs[0]]
+            nie = (first.get("nie") or "").strip() or None
+            text = (first.get("text") or "").strip() or None
+            async with sem:
+                try:
+                    agg = await self._verify_with_confidence(nie, text, prefetched=prefetched)
+                except Exception as e:
+                    return [{"index": i, "nie": items[i].get("nie"), "text": items[i].get("text"),
+                             "error": str(e)} for i in idxs]
+            data = _build_data(agg)
+            lookups.append((nie or (agg.winner.product_id if agg.winner else "-"), agg.decision))
+            base = {
+                "decision": agg.decision,
+                "confidence": round(float(agg.confidence or 0.0), 3),
+                "source": data["source"],
+                "data": data,
+                "explanation": agg.explanation,
+            }
+            if include_trace:
+                base["trace"] = _build_trace(agg)
+            return [{"index": i, "nie": items[i].get("nie"), "text": items[i].get("text"), **base} for i in idxs]
+
+        tasks = [asyncio.create_task(one(k, v)) for k, v in groups.items()]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                for row in await fut:
+                    yield row
+        finally:
+            for t in tasks:
+                t.cancel()
+            if lookups:
+                try:
+                    await self.repo.save_lookups(lookups)
+                except Exception:
+                    logger.warning("[verify-batch] save_lookups failed n=%d", len(lookups))
+        logger.info("[verify-batch] items=%d unique=%d nies=%d queried=%d",
+                    len(items), len(groups), len(nies), len(nies_q))
 
     def _to_product(self, d) -> Product:
         """
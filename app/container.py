@@ -1,12 +1,26 @@
 # app/container.py  (potongan yang berubah di bawah)
-from functools import lru_cache
+import os, time, logging
+from collections import Counter, defaultdict
+from functools import lru_cache, wraps
+
+import numpy as np
+
 from app.infra.cache.redis_cache import RedisCache
+from app.infra.cache.product_cache import ProductCache, CachedProductRepo, PRODUCT_CACHE_ENABLE
+from app.infra.cache.response_cache import VerifyResponseCache, VERIFY_CACHE_ENABLE
+from app.infra.cache.single_flight import SingleFlight, SINGLE_FLIGHT_ENABLE, SINGLE_FLIGHT_REDIS
+from app.infra.cache.scout_cache import ScoutCache, SCOUT_CACHE_ENABLE
+from app.infra.observability.metrics import TimedRedis, METRICS_ENABLE
 from app.infra.ocr.tesseract_adapter import TesseractAdapter
 from app.infra.llm.openai_adapter import OpenAILlm
+from app.infra.llm.llm_cache import LlmResponseCache, LLM_CACHE_ENABLE
 from app.infra.repo.mongo_repo import MongoVerificationRepo
+from app.infra.repo.request_scope import MemoizingRepo
 from app.infra.llm.openai_embedder import OpenAIEmbedder
 from app.infra.search.faiss_index import FaissVectorIndex
 from app.infra.search.router import SearchRouter
+from app.infra.search.nie_registry import NieRegistry, registry_enabled
+from app.infra.search.suggest_index import SuggestIndex, suggest_enabled
 
 from app.services.session_state import SessionStateService
 from app.services.prompt_service import PromptService
@@ -15,15 +29,77 @@ from app.services.agent_orchestrator import AgentOrchestrator
 from app.application.use_cases import VerifyLabelUseCase
 from app.application.retrieve_use_case import RetrieveCandidatesUseCase
 from app.application.scan_use_case import ScanUseCase
+from app.infra.pipelines.scan_pipeline import ScanPipeline
+
+log = logging.getLogger("medverify.container")
+
+# DI_SCOPE=app (default): use case, pipeline & adapter dibangun sekali per worker.
+# DI_SCOPE=request: perilaku lama (dibangun ulang tiap request) — untuk membandingkan overhead.
+DI_SCOPE = os.getenv("DI_SCOPE", "app").lower()
+
+# Overhead provider per request: {nama: Counter(calls, us_total, us_max)}
+PROVIDER_STATS: dict = defaultdict(Counter)
+
+
+def _per_worker(name: str):
+    """lru_cache + ukur waktu resolve provider (termasuk konstruksi bila DI_SCOPE=request)."""
+    def deco(build):
+        cached = lru_cache(build)
+
+        @wraps(build)
+        def provide():
+            t0 = time.perf_counter()
+            obj = build() if DI_SCOPE == "request" else cached()
+            us = int((time.perf_counter() - t0) * 1e6)
+            st = PROVIDER_STATS[name]
+            st["calls"] += 1
+            st["us_total"] += us
+            st["us_max"] = max(st["us_max"], us)
+            return obj
+
+        provide.cache_clear = cached.cache_clear
+        return provide
+    return deco
+
+
+def provider_stats() -> dict:
+    return {
+        name: {
+            "scope": DI_SCOPE,
+            "calls": st["calls"],
+            "avg_us": round(st["us_total"] / st["calls"], 1) if st["calls"] else 0.0,
+            "max_us": st["us_max"],
+        }
+        for name, st in PROVIDER_STATS.items()
+    }
+
+@lru_cache
+def _cache() -> RedisCache:
+    c = RedisCache.from_env()
+    if METRICS_ENABLE:
+        c.r = TimedRedis(c.r)  # tiap command → histogram stage="redis"
+    return c
+
+@lru_cache
+def _product_cache() -> ProductCache | None:
+    return ProductCache(_cache().r) if PRODUCT_CACHE_ENABLE else None
 
 @lru_cache
-def _cache() -> RedisCache: return RedisCache.from_env()
+def _response_cache() -> VerifyResponseCache | None:
+    return VerifyResponseCache(_cache().r) if VERIFY_CACHE_ENABLE else None
 
 @lru_cache
-def _repo() -> MongoVerificationRepo: return MongoVerificationRepo()
+def _repo() -> MemoizingRepo:
+    base = MongoVerificationRepo()
+    pc = _product_cache()
+    return MemoizingRepo(CachedProductRepo(base, pc) if pc is not None else base)
 
 @lru_cache
-def _llm_chat() -> OpenAILlm: return OpenAILlm()
+def _llm_cache() -> LlmResponseCache | None:
+    return LlmResponseCache(_cache().r) if LLM_CACHE_ENABLE else None
+
+@lru_cache
+def _llm_chat() -> OpenAILlm: return OpenAILlm(cache=_llm_cache())
 
 @lru_cache
 def _embedder() -> OpenAIEmbedder: return OpenAIEmbedder()
@@ -32,25 +108,64 @@ def _embedder() -> OpenAIEmbedder: return OpenAIEmbedder()
 def _faiss() -> FaissVectorIndex:
     idx = FaissVectorIndex(); idx.load(); return idx
 
+@lru_cache
+def _nie_registry() -> NieRegistry | None:
+    # Client Redis → subscriber live NIE baru dari crawler (absent tidak dipercaya saat putus)
+    return NieRegistry(client=_cache().r) if registry_enabled() else None
+
+@lru_cache
+def _suggest_index() -> SuggestIndex | None:
+    return SuggestIndex() if suggest_enabled() else None
+
+@lru_cache
+def _single_flight() -> SingleFlight | None:
+    if not SINGLE_FLIGHT_ENABLE:
+        return None
+    return SingleFlight(_cache().r if SINGLE_FLIGHT_REDIS else None)
+
 @lru_cache
 def _search_router() -> SearchRouter:
-    return SearchRouter(repo=_repo(), embedder=_embedder(), faiss_index=_faiss())
+    return SearchRouter(repo=_repo(), embedder=_embedder(), faiss_index=_faiss(),
+                        nie_registry=_nie_registry(), single_flight=_single_flight())
 
-def get_verify_uc() -> VerifyLabelUseCase:
+@_per_worker("ocr")
+def _ocr() -> TesseractAdapter: return TesseractAdapter()
+
+@_per_worker("verify_uc")
+def _verify_uc() -> VerifyLabelUseCase:
     return VerifyLabelUseCase(
-        ocr=TesseractAdapter(),
+        ocr=_ocr(),
         satusehat=None,
         repo=_repo(),
         cache=_cache(),
         llm=_llm_chat(),
         search_router=_search_router(),
+        nie_registry=_nie_registry(),
+        response_cache=_response_cache(),
+        single_flight=_single_flight(),
     )
 
-async def get_retrieve_use_case() -> RetrieveCandidatesUseCase:
+@_per_worker("retrieve_uc")
+def _retrieve_uc() -> RetrieveCandidatesUseCase:
     return RetrieveCandidatesUseCase(_search_router())
 
+@_per_worker("scan_pipeline")
+def _scan_pipeline() -> ScanPipeline:
+    # YOLO (singleton + lock), OCR adapter, regex.yaml → sekali per worker
+    return ScanPipeline(query_service=_search_router())
+
+@_per_worker("scan_uc")
+def _scan_uc() -> ScanUseCase:
+    return ScanUseCase(search_router=_search_router(), pipeline=_scan_pipeline())
+
+def get_verify_uc() -> VerifyLabelUseCase:
+    return _verify_uc()
+
+async def get_retrieve_use_case() -> RetrieveCandidatesUseCase:
+    return _retrieve_uc()
+
 async def get_scan_use_case() -> ScanUseCase:
-    return ScanUseCase(search_router=_search_router())
+    return _scan_uc()
 
 @lru_cache
 def _session() -> SessionStateService: return SessionStateService(_cache())
@@ -58,10 +173,91 @@ def _session() -> SessionStateService: return SessionStateService(_cache())
 @lru_cache
 def _prompts() -> PromptService: return PromptService()
 
+@lru_cache
+def _scout_cache() -> ScoutCache | None:
+    return ScoutCache(_cache().r) if SCOUT_CACHE_ENABLE else None
+
 @lru_cache
 def _agent() -> AgentOrchestrator:
-    return AgentOrchestrator(llm=_llm_chat(), prompts=_prompts())
+    return AgentOrchestrator(llm=_llm_chat(), prompts=_prompts(), scout_cache=_scout_cache())
 
 def get_session_state(): return _session()
+def get_nie_registry(): return _nie_registry()
+def get_product_cache(): return _product_cache()
+def get_response_cache(): return _response_cache()
+def get_llm_cache(): return _llm_cache()
+def get_scout_cache(): return _scout_cache()
+def get_single_flight(): return _single_flight()
+def get_suggest_index(): return _suggest_index()
 def get_prompt_service(): return _prompts()
 def get_agent_orchestrator(): return _agent()
+def get_provider_stats(): return provider_stats()
+
+
+def runtime_gauges() -> dict:
+    """Snapshot stats() komponen untuk gauge /metrics (dibaca saat scrape)."""
+    from app.application import use_cases
+    from app.infra.api.admission import admission_stats
+    writer = getattr(_repo(), "lookup_writer", None)
+    sf = _single_flight()
+    adm = admission_stats()
+    hit_ratio = {
+        name: c.stats()["hit_ratio"]
+        for name, c in (("product", _product_cache()), ("verify", _response_cache()), ("llm", _llm_cache()),
+                        ("scout", _scout_cache()))
+        if c is not None
+    }
+    if sf is not None:
+        hit_ratio["single_flight"] = sf.stats()["coalesced_ratio"]
+    return {
+        "queue_depth": {
+            **({"lookup_writer": writer.stats()["depth"]} if writer is not None else {}),
+            **{f"admission_{k}": v["queue_depth"] for k, v in adm.items()},
+        },
+        "inflight": {
+            "verify_refresh": len(use_cases._REFRESHING),
+            "verify_bg_tasks": len(use_cases._BG_TASKS),  # refresh + log lookup + explain deferred
+            "explain_deferred": len(use_cases._EXPLAIN_TASKS),
+            **({"single_flight": sf.stats()["inflight"]} if sf is not None else {}),
+            **{f"admission_{k}": v["inflight"] for k, v in adm.items()},
+        },
+        "cache_hit_ratio": hit_ratio,
+        "admission_limit": {k: v["limit"] for k, v in adm.items()},
+    }
+
+
+# ── Lifecycle (dipanggil dari event startup/shutdown di main.py) ──
+async def warm_up() -> None:
+    """Bangun graph sekali per worker + pemanasan model agar request pertama tidak membayar."""
+    t0 = time.perf_counter()
+    _verify_uc()
+    _retrieve_uc()
+    try:
+        pipe = _scan_uc().pipe
+        pipe.det.detect(np.zeros((640, 640, 3), dtype="uint8"))
+    except Exception:
+        log.exception("scan pipeline warm-up failed")
+    writer = getattr(_repo(), "lookup_writer", None)
+    if writer is not None:
+        writer.start()
+    log.info("container warm (scope=%s) in %.0f ms", DI_SCOPE, (time.perf_counter() - t0) * 1000)
+
+
+async def dispose() -> None:
+    """Flush write-behind, tutup koneksi, lalu kosongkan semua provider."""
+    repo = _repo()
+    writer = getattr(repo, "lookup_writer", None)
+    if writer is not None:
+        await writer.close()
+        log.info("lookup writer closed %s", writer.stats())
+    try:
+        await _cache().r.close()
+    except Exception:
+        pass
+    try:
+        repo.client.close()
+    except Exception:
+        pass
+    for fn in list(globals().values()):
+        if callable(fn) and hasattr(fn, "cache_clear"):
+            fn.cache_clear()
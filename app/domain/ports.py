@@ -22,6 +22,9 @@ class RepoPort(ABC):
     @abstractmethod
     async def find_by_nie(self, nie: str) -> Optional[Dict[str, Any]]: ...
 
+    @abstractmethod
+    async def find_by_nies(self, nies: List[str]) -> Dict[str, Dict[str, Any]]: ...
+
     @abstractmethod
     async def search_lexical(self, q: str, limit: int = 25, atlas_index: Optional[str] = None) -> List[Dict[str, Any]]: ...
 
@@ -31,6 +34,9 @@ class RepoPort(ABC):
     @abstractmethod
     async def save_lookup(self, nie: str, status: str) -> None: ...
 
+    @abstractmethod
+    async def save_lookups(self, rows: List[Tuple[str, str]]) -> None: ...
+
 class CachePort(ABC):
     @abstractmethod
     async def get(self, key: str): ...
@@ -0,0 +1,201 @@
+# app/infra/api/admission.py
+"""
+Admission control adaptif untuk endpoint berat (scan/photo, verify-photo, detect, agent).
+
+Per kelas endpoint ada AdaptiveLimiter:
+  - batas konkurensi `limit` disesuaikan AIMD terhadap latency terukur:
+      latency ≤ target  & limit jenuh → limit += 1/limit   (additive increase)
+      latency >  target                → limit *= beta       (multiplicative decrease, maks. 1x per window)
+  - request di atas limit masuk antrean terbatas (queue_max)
+  - shed 503 + Retry-After bila antrean penuh atau perkiraan waktu tunggu melewati SLO antrean
+
+Dipakai sebagai dependency FastAPI: `dependencies=[Depends(admit("scan"))]`.
+"""
+from __future__ import annotations
+
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Any, Deque, Dict
+
+from fastapi import HTTPException, status
+
+log = logging.getLogger("api.admission")
+
+ADMISSION_ENABLE = os.getenv("ADMISSION_ENABLE", "1") == "1"
+
+# Default per kelas: limit awal, min, max, panjang antrean, SLO antrean (ms), target latency (ms)
+_DEFAULTS: Dict[str, Dict[str, float]] = {
+    "scan":   {"limit": 8,  "min": 2, "max": 64,  "queue": 32,  "queue_slo_ms": 1500, "target_ms": 1500},
+    "detect": {"limit": 8,  "min": 2, "max": 64,  "queue": 32,  "queue_slo_ms": 1000, "target_ms": 800},
+    "agent":  {"limit": 16, "min": 4, "max": 128, "queue": 64,  "queue_slo_ms": 3000, "target_ms": 6000},
+}
+_BETA = float(os.getenv("ADMISSION_BETA", "0.9"))
+
+
+def _cfg(name: str, key: str, default: float) -> float:
+    return float(os.getenv(f"ADMISSION_{name.upper()}_{key.upper()}", default))
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, *, limit: float, min_limit: float, max_limit: float,
+                 queue_max: int, queue_slo_ms: float, target_ms: float, beta: float = _BETA):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit, self.max_limit = float(min_limit), float(max_limit)
+        self.queue_max = int(queue_max)
+        self.queue_slo_s = queue_slo_ms / 1000
+        self.target_s = target_ms / 1000
+        self.beta = beta
+        self.inflight = 0
+        self.latency_ewma_s = self.target_s / 2
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.counts: Counter = Counter()
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdaptiveLimiter":
+        d = _DEFAULTS.get(name, _DEFAULTS["scan"])
+        return cls(
+            name,
+            limit=_cfg(name, "limit", d["limit"]),
+            min_limit=_cfg(name, "min", d["min"]),
+            max_limit=_cfg(name, "max", d["max"]),
+            queue_max=int(_cfg(name, "queue", d["queue"])),
+            queue_slo_ms=_cfg(name, "queue_slo_ms", d["queue_slo_ms"]),
+            target_ms=_cfg(name, "target_ms", d["target_ms"]),
+        )
+
+    # ── Admission ────────────────────────────────────────────────
+    def _has_slot(self) -> bool:
+        return self.inflight < max(1, int(self.limit))
+
+    def _predicted_wait_s(self, position: int) -> float:
+        # Tiap "gelombang" sebesar limit selesai kira-kira dalam satu latency rata-rata
+        return (position / max(1.0, self.limit)) * self.latency_ewma_s
+
+    def _shed(self, reason: str, wait_s: float) -> HTTPException:
+        self.counts[f"shed_{reason}"] += 1
+        retry = max(1, math.ceil(wait_s))
+        log.warning("[admission] shed class=%s reason=%s inflight=%d limit=%.1f queue=%d",
+                    self.name, reason, self.inflight, self.limit, len(self._waiters))
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server sibuk ({self.name}); coba lagi sebentar.",
+            headers={"Retry-After": str(retry)},
+        )
+
+    async def acquire(self) -> float:
+        """Tunggu slot; return waktu mulai (perf_counter) untuk release(). Raise 503 bila di-shed."""
+        if self._has_slot() and not self._waiters:
+            self.inflight += 1
+            self.counts["admitted"] += 1
+            return time.perf_counter()
+
+        position = len(self._waiters) + 1
+        predicted = self._predicted_wait_s(position)
+        if len(self._waiters) >= self.queue_max:
+            raise self._shed("queue_full", predicted)
+        if predicted > self.queue_slo_s:
+            raise self._shed("slo", predicted)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        t_q = time.perf_counter()
+        try:
+            await asyncio.wait_for(fut, timeout=self.queue_slo_s)
+        except asyncio.TimeoutError:
+            self._discard(fut)
+            raise self._shed("queue_timeout", self._predicted_wait_s(len(self._waiters)))
+        except asyncio.CancelledError:
+            self._discard(fut)  # client putus saat antre
+            raise
+        # slot sudah dipindahkan ke kita oleh _wake() (inflight sudah +1)
+        self.counts["admitted"] += 1
+        self.counts["queued"] += 1
+        self.counts["queue_ms_total"] += int((time.perf_counter() - t_q) * 1000)
+        return time.perf_counter()
+
+    def _discard(self, fut: asyncio.Future) -> None:
+        if fut.done() and not fut.cancelled():
+            # slot sempat diberikan tepat sebelum batal → kembalikan
+            self.inflight -= 1
+            self._wake()
+            return
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def release(self, started: float) -> None:
+        latency = time.perf_counter() - started
+        self.inflight -= 1
+        self._adapt(latency)
+        self._wake()
+
+    def _adapt(self, latency_s: float) -> None:
+        self.latency_ewma_s = 0.8 * self.latency_ewma_s + 0.2 * latency_s
+        now = time.monotonic()
+        if latency_s > self.target_s:
+            # Satu penurunan per "window" (≈ satu latency target) agar tidak runtuh berantai
+            if now - self._last_decrease >= self.target_s:
+                self.limit = max(self.min_limit, self.limit * self.beta)
+                self._last_decrease = now
+                self.counts["decrease"] += 1
+        elif self.inflight + 1 >= int(self.limit) or self._waiters:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_slot():
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.inflight += 1
+            fut.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = self.counts["admitted"]
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queue_depth": len(self._waiters),
+            "latency_ewma_ms": round(self.latency_ewma_s * 1000, 1),
+            "target_ms": int(self.target_s * 1000),
+            "admitted": admitted,
+            "queued": self.counts["queued"],
+            "avg_queue_ms": round(self.counts["queue_ms_total"] / self.counts["queued"], 1) if self.counts["queued"] else 0.0,
+            "shed": {k[5:]: v for k, v in self.counts.items() if k.startswith("shed_")},
+            "decreases": self.counts["decrease"],
+        }
+
+
+_LIMITERS: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    lim = _LIMITERS.get(name)
+    if lim is None:
+        lim = _LIMITERS[name] = AdaptiveLimiter.from_env(name)
+    return lim
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {name: lim.stats() for name, lim in _LIMITERS.items()}
+
+
+def admit(name: str):
+    """Dependency FastAPI (yield): pegang satu slot kelas `name` selama handler berjalan."""
+    async def _dep():
+        if not ADMISSION_ENABLE:
+            yield
+            return
+        lim = get_limiter(name)
+        started = await lim.acquire()
+        try:
+            yield
+        finally:
+            lim.release(started)
+    return _dep
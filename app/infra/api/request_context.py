@@ -0,0 +1,96 @@
+# app/infra/api/request_context.py
+"""
+Satu middleware ASGI murni untuk konteks per request (pengganti 4 lapis @app.middleware("http")):
+
+  - request id (X-Request-Id masuk atau baru) + root span; traceparent klien jadi parent
+  - label endpoint metrics (template route) + histogram durasi request
+  - memo repo per request (request_scope) → header X-Repo-Calls / X-Repo-Calls-Saved
+  - log masuk / selesai / error
+
+Karena tidak memakai BaseHTTPMiddleware, `send` dibungkus langsung: header ditambahkan pada
+`http.response.start`, dan durasi/span/log baru ditutup setelah body terakhir terkirim — response
+streaming (SSE) terukur sampai selesai, bukan hanya sampai header keluar.
+Scope non-http (websocket, lifespan) diteruskan apa adanya.
+"""
+from __future__ import annotations
+
+import time
+import logging
+from typing import Any, Dict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+
+from app.infra.observability import metrics, tracing
+from app.infra.repo.request_scope import request_scope
+
+# logger aplikasi sendiri, bukan 'uvicorn.access'
+log = logging.getLogger("medverify.request")
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Label endpoint = template route (/v1/verify/explanation/{request_id}), bukan path mentah."""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope.get("path", ""))
+    return "unmatched"
+
+
+class RequestContextMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        req_headers = Headers(scope=scope)
+        timed = metrics.METRICS_ENABLE and path != "/metrics"
+        endpoint = route_template(scope) if (timed or tracing.TRACING_ENABLE) else path
+        rid, rid_token = tracing.bind_request_id(req_headers)
+        ep_token = metrics.set_endpoint(endpoint) if timed else None
+        status_code = 500
+        t0 = time.perf_counter()
+        log.info(f"➡️ Incoming {method} {path}")
+
+        try:
+            with tracing.span(f"{method} {endpoint}", parent_headers=req_headers,
+                              **{"http.method": method, "http.route": endpoint}) as sp, \
+                    request_scope() as repo_scope:
+                trace_hdrs = tracing.traceparent_headers()
+
+                async def send_wrapper(message) -> None:
+                    nonlocal status_code
+                    if message["type"] == "http.response.start":
+                        status_code = message["status"]
+                        headers = MutableHeaders(scope=message)
+                        stats = repo_scope.summary()
+                        if stats["calls"]:
+                            headers["X-Repo-Calls"] = str(stats["calls"])
+                            headers["X-Repo-Calls-Saved"] = str(stats["saved"])
+                            log.debug("[repo-scope] %s %s", path, stats)
+                        for k, v in trace_hdrs.items():
+                            if k not in headers:
+                                headers[k] = v
+                        headers[tracing.REQUEST_ID_HEADER] = rid
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    if sp is not None and sp.is_recording():
+                        sp.set_attribute("http.status_code", status_code)
+            log.info(f"⬅️ Completed {method} {path} -> {status_code}")
+        except Exception:
+            log.exception(f"❌ Unhandled error on {method} {path}")
+            raise
+        finally:
+            if timed:
+                metrics.observe_request(endpoint, method, status_code, time.perf_counter() - t0)
+                metrics.reset_endpoint(ep_token)
+            tracing.reset_request_id(rid_token)
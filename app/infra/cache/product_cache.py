@@ -0,0 +1,189 @@
+# app/infra/cache/product_cache.py
+from __future__ import annotations
+
+import os
+import json
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+from app.domain.ports import RepoPort
+from app.infra.search.nie_registry import normalize_nie
+
+log = logging.getLogger("medverify.product_cache")
+
+PRODUCT_CACHE_ENABLE = os.getenv("PRODUCT_CACHE_ENABLE", "1").lower() not in ("0", "false", "no")
+PRODUCT_CACHE_TTL_S = int(os.getenv("PRODUCT_CACHE_TTL_S", "21600"))        # 6 jam
+PRODUCT_CACHE_NEG_TTL_S = int(os.getenv("PRODUCT_CACHE_NEG_TTL_S", "300"))  # 5 menit
+PRODUCT_CACHE_TIMEOUT_MS = int(os.getenv("PRODUCT_CACHE_TIMEOUT_MS", "50"))
+
+KEY_PREFIX = "prod:v1:"
+_NEGATIVE = {"__not_found__": True}
+
+
+def product_cache_key(nie: str) -> str:
+    return KEY_PREFIX + normalize_nie(nie)
+
+
+class ProductCache:
+    """
+    Cache dokumen produk per NIE di Redis.
+
+    - hit      : dokumen produk (TTL PRODUCT_CACHE_TTL_S)
+    - negative : NIE yang tidak ada di Mongo (TTL lebih pendek, PRODUCT_CACHE_NEG_TTL_S)
+    - miss     : tidak ada entri → caller baca Mongo lalu put()/put_missing()
+    Redis lambat/error diperlakukan sebagai miss (fail-open, budget PRODUCT_CACHE_TIMEOUT_MS).
+    """
+
+    def __init__(self, client: Optional[aioredis.Redis] = None,
+                 ttl_s: int = PRODUCT_CACHE_TTL_S, neg_ttl_s: int = PRODUCT_CACHE_NEG_TTL_S,
+                 timeout_ms: int = PRODUCT_CACHE_TIMEOUT_MS):
+        self.r = client or aioredis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            encoding="utf-8",
+            decode_responses=True,
+        )
+        self.ttl_s, self.neg_ttl_s = ttl_s, neg_ttl_s
+        self.timeout_s = max(1, timeout_ms) / 1000
+        self.counts: Counter = Counter()
+
+    # ── Read ──────────────────────────────────────────────────────
+    async def get(self, nie: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return (status, doc) dengan status ∈ {"hit", "negative", "miss"}."""
+        try:
+            raw = await asyncio.wait_for(self.r.get(product_cache_key(nie)), self.timeout_s)
+        except Exception as e:
+            self.counts["error"] += 1
+            log.debug("product cache get failed nie=%s err=%s", nie, e)
+            raw = None
+        return self._decode(raw)
+
+    async def get_many(self, nies: List[str]) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+        keys = sorted({normalize_nie(n) for n in nies or []} - {""})
+        if not keys:
+            return {}
+        try:
+            raws = await asyncio.wait_for(self.r.mget([KEY_PREFIX + k for k in keys]), self.timeout_s)
+        except Exception as e:
+            self.counts["error"] += 1
+            log.debug("product cache mget failed n=%d err=%s", len(keys), e)
+            raws = [None] * len(keys)
+        return {k: self._decode(raw) for k, raw in zip(keys, raws)}
+
+    def _decode(self, raw: Optional[str]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        doc = None
+        if raw:
+            try:
+                doc = json.loads(raw)
+            except Exception:
+                doc = None
+        if not isinstance(doc, dict):
+            self.counts["miss"] += 1
+            return "miss", None
+        if doc.get("__not_found__"):
+            self.counts["negative_hit"] += 1
+            return "negative", None
+        self.counts["hit"] += 1
+        return "hit", doc
+
+    # ── Write ─────────────────────────────────────────────────────
+    async def put(self, nie: str, doc: Dict[str, Any]) -> None:
+        await self._set(product_cache_key(nie), doc, self.ttl_s)
+
+    async def put_missing(self, nie: str) -> None:
+        await self._set(product_cache_key(nie), _NEGATIVE, self.neg_ttl_s)
+
+    async def put_many(self, found: Dict[str, Dict[str, Any]], missing: List[str]) -> None:
+        try:
+            pipe = self.r.pipeline(transaction=False)
+            for nie, doc in found.items():
+                pipe.set(product_cache_key(nie), json.dumps(doc, ensure_ascii=False, default=str), ex=self.ttl_s)
+            for nie in missing:
+                pipe.set(product_cache_key(nie), json.dumps(_NEGATIVE), ex=self.neg_ttl_s)
+            await pipe.execute()
+        except Exception as e:
+            log.debug("product cache put_many failed err=%s", e)
+
+    async def invalidate(self, *nies: str) -> None:
+        keys = [product_cache_key(n) for n in nies if n]
+        if keys:
+            await self.r.delete(*keys)
+
+    async def _set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        try:
+            await self.r.set(key, json.dumps(value, ensure_ascii=False, default=str), ex=ttl)
+        except Exception as e:
+            log.debug("product cache set failed key=%s err=%s", key, e)
+
+    # ── Stats ─────────────────────────────────────────────────────
+    def stats(self) -> Dict[str, Any]:
+        hit, neg, miss = self.counts["hit"], self.counts["negative_hit"], self.counts["miss"]
+        total = hit + neg + miss
+        return {
+            "hits": hit,
+            "negative_hits": neg,
+            "misses": miss,
+            "errors": self.counts["error"],
+            "hit_ratio": round((hit + neg) / total, 4) if total else 0.0,
+            "miss_ratio": round(miss / total, 4) if total else 0.0,
+        }
+
+
+class CachedProductRepo(RepoPort):
+    """
+    Read-through / write-through ProductCache di depan repo Mongo untuk lookup per NIE.
+
+    - find_by_nie : cache → (miss) Mongo → put()/put_missing()
+    - find_by_nies: mget → `$in` hanya untuk miss → put_many() pipeline
+    Method lain diteruskan ke repo asli.
+    """
+
+    def __init__(self, inner: RepoPort, cache: ProductCache):
+        self.inner = inner
+        self.cache = cache
+
+    def __getattr__(self, name: str):
+        return getattr(self.inner, name)
+
+    async def find_by_nie(self, nie: str) -> Optional[Dict[str, Any]]:
+        if not nie:
+            return None
+        status, doc = await self.cache.get(nie)
+        if status == "hit":
+            return doc
+        if status == "negative":
+            return None
+        doc = await self.inner.find_by_nie(nie)
+        if doc:
+            await self.cache.put(nie, doc)
+        else:
+            await self.cache.put_missing(nie)
+        return doc
+
+    async def find_by_nies(self, nies: List[str]) -> Dict[str, Dict[str, Any]]:
+        cached = await self.cache.get_many(nies)
+        out = {k: doc for k, (status, doc) in cached.items() if status == "hit"}
+        todo = [k for k, (status, _) in cached.items() if status == "miss"]
+        if todo:
+            found = await self.inner.find_by_nies(todo)
+            out.update(found)
+            await self.cache.put_many(found, [k for k in todo if k not in found])
+        return out
+
+    async def search_lexical(self, q: str, limit: int = 25, **kwargs) -> List[Dict[str, Any]]:
+        return await self.inner.search_lexical(q, limit=limit, **kwargs)
+
+    async def get_by_int_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        return await self.inner.get_by_int_ids(ids)
+
+    async def ensure_indexes(self) -> None:
+        await self.inner.ensure_indexes()
+
+    async def save_lookup(self, nie: str, status: str) -> None:
+        await self.inner.save_lookup(nie, status)
+
+    async def save_lookups(self, rows: List[Tuple[str, str]]) -> None:
+        await self.inner.save_lookups(rows)
@@ -0,0 +1,105 @@
+# app/infra/cache/response_cache.py
+from __future__ import annotations
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+from app.infra.search.nie_registry import normalize_nie
+
+log = logging.getLogger("medverify.verify_cache")
+
+VERIFY_CACHE_ENABLE = os.getenv("VERIFY_CACHE_ENABLE", "1").lower() not in ("0", "false", "no")
+VERIFY_CACHE_SOFT_TTL_S = int(os.getenv("VERIFY_CACHE_SOFT_TTL_S", "600"))     # lewat ini → stale, refresh di background
+VERIFY_CACHE_HARD_TTL_S = int(os.getenv("VERIFY_CACHE_HARD_TTL_S", "86400"))   # expire Redis
+VERIFY_CACHE_GEN_TTL_S = float(os.getenv("VERIFY_CACHE_GEN_TTL_S", "5"))       # memo lokal catalog generation
+
+# Dinaikkan (INCR) oleh crawler.ingest setiap dokumen produk berubah → semua key lama yatim
+CATALOG_GEN_KEY = "catalog:gen"
+KEY_PREFIX = "verify:v1:"
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return _WS.sub(" ", (text or "").strip().lower())
+
+
+class VerifyResponseCache:
+    """
+    Cache response /v1/verify utuh (setelah explain) per (NIE ternormalisasi, teks ternormalisasi)
+    + catalog generation.
+
+    Entri = {"at": epoch, "resp": {...}}; status get():
+      - "hit"   : umur < soft TTL
+      - "stale" : umur ≥ soft TTL → caller tetap melayani, lalu refresh di background
+      - "miss"
+    """
+
+    def __init__(self, client: Optional[aioredis.Redis] = None,
+                 soft_ttl_s: int = VERIFY_CACHE_SOFT_TTL_S, hard_ttl_s: int = VERIFY_CACHE_HARD_TTL_S):
+        self.r = client or aioredis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            encoding="utf-8",
+            decode_responses=True,
+        )
+        self.soft_ttl_s, self.hard_ttl_s = soft_ttl_s, hard_ttl_s
+        self.counts: Counter = Counter()
+        self._gen: Tuple[float, str] = (0.0, "0")
+
+    async def generation(self) -> str:
+        at, gen = self._gen
+        if time.monotonic() - at < VERIFY_CACHE_GEN_TTL_S:
+            return gen
+        try:
+            gen = str(await self.r.get(CATALOG_GEN_KEY) or "0")
+        except Exception as e:
+            log.debug("catalog generation read failed err=%s", e)
+        self._gen = (time.monotonic(), gen)
+        return gen
+
+    async def key(self, nie: Optional[str], text: Optional[str]) -> str:
+        raw = f"{normalize_nie(nie) if nie else ''}|{normalize_text(text)}"
+        digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{KEY_PREFIX}{await self.generation()}:{digest}"
+
+    async def get(self, key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        try:
+            raw = await self.r.get(key)
+            entry = json.loads(raw) if raw else None
+        except Exception as e:
+            log.debug("verify cache get failed key=%s err=%s", key, e)
+            entry = None
+        if not isinstance(entry, dict) or "resp" not in entry:
+            self.counts["miss"] += 1
+            return "miss", None
+        status = "stale" if time.time() - float(entry.get("at") or 0) >= self.soft_ttl_s else "hit"
+        self.counts[status] += 1
+        return status, entry["resp"]
+
+    async def put(self, key: str, resp: Dict[str, Any]) -> None:
+        try:
+            await self.r.set(key, json.dumps({"at": time.time(), "resp": resp}, ensure_ascii=False, default=str),
+                             ex=self.hard_ttl_s)
+        except Exception as e:
+            log.debug("verify cache put failed key=%s err=%s", key, e)
+
+    def stats(self) -> Dict[str, Any]:
+        hit, stale, miss = self.counts["hit"], self.counts["stale"], self.counts["miss"]
+        total = hit + stale + miss
+        return {
+            "hits": hit,
+            "stale_hits": stale,
+            "misses": miss,
+            "bypass": self.counts["bypass"],
+            "refreshes": self.counts["refresh"],
+            "skipped_degraded": self.counts["skip_degraded"],
+            "hit_ratio": round((hit + stale) / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,130 @@
+# app/infra/cache/scout_cache.py
+from __future__ import annotations
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from app.infra.search.nie_registry import normalize_nie
+
+log = logging.getLogger("medverify.scout_cache")
+
+SCOUT_CACHE_ENABLE = os.getenv("SCOUT_CACHE_ENABLE", "1").lower() not in ("0", "false", "no")
+SCOUT_CACHE_TTL_S = int(os.getenv("SCOUT_CACHE_TTL_S", "21600"))            # 6 jam
+SCOUT_CACHE_PRICE_TTL_S = int(os.getenv("SCOUT_CACHE_PRICE_TTL_S", "3600"))  # harga/ketersediaan cepat basi
+SCOUT_CACHE_TIMEOUT_MS = int(os.getenv("SCOUT_CACHE_TIMEOUT_MS", "50"))
+
+KEY_PREFIX = "scout:v2:"
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Kata fungsi id/en yang tidak mengubah apa yang dicari scout (dibuang dari sub-topik)
+_STOPWORDS = frozenset("""
+    apa apakah bagaimana berapa kapan dimana mana siapa kenapa mengapa yang dan atau untuk dengan
+    dari pada ke di ini itu nya saja aja dong ya kah bisa boleh tidak gak nggak ada adalah saya aku
+    kalau kalo jika obat produk tolong mohon jelaskan info informasi tentang soal
+    what how is are the a an of for with to in on it its this that can could should do does i my me
+    about tell please drug medicine product
+""".split())
+
+
+def scout_topic(question: Optional[str], name: Optional[str] = None) -> str:
+    """
+    Sub-topik pertanyaan untuk key cache: hash kata isi ternormalisasi (urutan & kata fungsi
+    diabaikan, nama produk/NIE dibuang karena sudah ada di subject). "efek samping panadol?"
+    dan "panadol efek sampingnya apa" → sama; "kalau untuk anak?" → beda.
+    """
+    drop = set(_NON_WORD.split((name or "").lower()))
+    words = {
+        w[:-3] if w.endswith("nya") and len(w) > 5 else w
+        for w in _NON_WORD.split((question or "").lower())
+    }
+    words = sorted(w for w in words
+                   if len(w) > 2 and w not in _STOPWORDS and w not in drop and not any(c.isdigit() for c in w))
+    if not words:
+        return "-"
+    return hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=6).hexdigest()
+
+# Intent yang temuannya cepat berubah → TTL pendek
+_SHORT_TTL_INTENTS = {"price_availability"}
+
+
+def scout_subject(nie: Optional[str], name: Optional[str]) -> Optional[str]:
+    """Identitas produk untuk key cache: NIE ternormalisasi, fallback nama (slug)."""
+    n = normalize_nie(nie)
+    if n:
+        return "nie:" + n
+    slug = _NON_WORD.sub("-", (name or "").lower()).strip("-")
+    return "name:" + slug if slug else None
+
+
+def scout_cache_key(subject: str, intent: str, lang: str, topic: str = "-") -> str:
+    return f"{KEY_PREFIX}{subject}:{intent}:{lang}:{topic}"
+
+
+class ScoutCache:
+    """
+    Cache hasil scout pass (web search) per (produk, intent, bahasa, sub-topik) di Redis.
+
+    Pertanyaan yang sama tentang produk yang sama (beda urutan kata / kata fungsi, atau dari
+    user lain) memakai ulang temuan sebelumnya alih-alih satu round trip web search lagi;
+    pertanyaan spesifik lain ("kalau untuk anak?") punya sub-topik sendiri (scout_topic).
+    Nilai: {"summary", "sources", "model"}. Redis lambat/error → miss (fail-open).
+    """
+
+    def __init__(self, client=None, ttl_s: int = SCOUT_CACHE_TTL_S,
+                 price_ttl_s: int = SCOUT_CACHE_PRICE_TTL_S, timeout_ms: int = SCOUT_CACHE_TIMEOUT_MS):
+        self.r = client
+        self.ttl_s, self.price_ttl_s = ttl_s, price_ttl_s
+        self.timeout_s = max(1, timeout_ms) / 1000
+        self.counts: Counter = Counter()
+
+    def ttl_for(self, intent: str) -> int:
+        return self.price_ttl_s if intent in _SHORT_TTL_INTENTS else self.ttl_s
+
+    async def get(self, subject: str, intent: str, lang: str, topic: str = "-") -> Optional[Dict[str, Any]]:
+        raw = None
+        if self.r is not None:
+            try:
+                raw = await asyncio.wait_for(self.r.get(scout_cache_key(subject, intent, lang, topic)),
+                                             self.timeout_s)
+            except Exception as e:
+                self.counts["error"] += 1
+                log.debug("scout cache get failed subject=%s err=%s", subject, e)
+        try:
+            val = json.loads(raw) if raw else None
+        except Exception:
+            val = None
+        if not isinstance(val, dict):
+            self.counts["miss"] += 1
+            return None
+        self.counts["hit"] += 1
+        return val
+
+    async def put(self, subject: str, intent: str, lang: str, value: Dict[str, Any],
+                  topic: str = "-") -> None:
+        ttl = self.ttl_for(intent)
+        if self.r is None or ttl <= 0:
+            return
+        try:
+            await self.r.set(scout_cache_key(subject, intent, lang, topic),
+                             json.dumps(value, ensure_ascii=False, default=str), ex=ttl)
+            self.counts["put"] += 1
+        except Exception as e:
+            self.counts["error"] += 1
+            log.debug("scout cache set failed subject=%s err=%s", subject, e)
+
+    def stats(self) -> Dict[str, Any]:
+        hit, miss = self.counts["hit"], self.counts["miss"]
+        total = hit + miss
+        return {
+            "hits": hit,
+            "misses": miss,
+            "puts": self.counts["put"],
+            "errors": self.counts["error"],
+            "hit_ratio": round(hit / total, 4) if total else 0.0,
+        }
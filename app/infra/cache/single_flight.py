@@ -0,0 +1,117 @@
+# app/infra/cache/single_flight.py
+from __future__ import annotations
+
+import os
+import copy
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+log = logging.getLogger("medverify.single_flight")
+
+SINGLE_FLIGHT_ENABLE = os.getenv("SINGLE_FLIGHT_ENABLE", "1").lower() not in ("0", "false", "no")
+SINGLE_FLIGHT_REDIS = os.getenv("SINGLE_FLIGHT_REDIS", "0").lower() in ("1", "true", "yes")
+SINGLE_FLIGHT_LOCK_MS = int(os.getenv("SINGLE_FLIGHT_LOCK_MS", "3000"))      # umur lock leader lintas worker
+SINGLE_FLIGHT_WAIT_MS = int(os.getenv("SINGLE_FLIGHT_WAIT_MS", "2500"))      # follower menunggu hasil leader
+SINGLE_FLIGHT_RESULT_MS = int(os.getenv("SINGLE_FLIGHT_RESULT_MS", "2000"))  # umur hasil untuk follower
+SINGLE_FLIGHT_POLL_MS = int(os.getenv("SINGLE_FLIGHT_POLL_MS", "25"))
+
+KEY_PREFIX = "sf:"
+
+
+def _copy(res: Any) -> Any:
+    # Tiap pemanggil dapat salinan penuh (caller boleh memutasi dict/list bertingkat hasil)
+    return copy.deepcopy(res)
+
+
+class SingleFlight:
+    """
+    Request coalescing: pemanggil konkuren dengan key sama menunggu SATU komputasi.
+
+    - In-process: map key → Future; follower await (shield) future milik leader.
+    - Lintas worker (opsional, `client` redis.asyncio): leader memegang lock pendek
+      `sf:lock:<key>` (SET NX PX) lalu menaruh hasil JSON di `sf:res:<key>` selama
+      SINGLE_FLIGHT_RESULT_MS; worker lain polling hasil itu hingga SINGLE_FLIGHT_WAIT_MS,
+      lalu menghitung sendiri bila leader tidak selesai. Redis error → hitung lokal.
+    Exception leader diteruskan ke semua follower lokal (tidak di-cache).
+    """
+
+    def __init__(self, client=None, *, lock_ms: int = SINGLE_FLIGHT_LOCK_MS,
+                 wait_ms: int = SINGLE_FLIGHT_WAIT_MS, result_ms: int = SINGLE_FLIGHT_RESULT_MS,
+                 poll_ms: int = SINGLE_FLIGHT_POLL_MS):
+        self.r = client
+        self.lock_ms, self.wait_ms, self.result_ms = lock_ms, wait_ms, result_ms
+        self.poll_s = max(1, poll_ms) / 1000
+        self.owner = uuid.uuid4().hex
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.counts: Counter = Counter()
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.counts["shared"] += 1
+            return _copy(await asyncio.shield(fut))
+
+        self.counts["leader"] += 1
+        fut = asyncio.ensure_future(self._run(key, factory))
+        self._inflight[key] = fut
+        fut.add_done_callback(lambda _f: self._inflight.pop(key, None))
+        # shield: leader yang dibatalkan (deadline) tidak membatalkan komputasi follower
+        return _copy(await asyncio.shield(fut))
+
+    async def _run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if self.r is None:
+            return await factory()
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+        lock_key, res_key = f"{KEY_PREFIX}lock:{digest}", f"{KEY_PREFIX}res:{digest}"
+        try:
+            leader = await self.r.set(lock_key, self.owner, nx=True, px=self.lock_ms)
+        except Exception as e:
+            log.debug("single-flight lock failed err=%s", e)
+            return await factory()
+
+        if leader:
+            try:
+                val = await factory()
+                try:
+                    await self.r.set(res_key, json.dumps(val, ensure_ascii=False, default=str), px=self.result_ms)
+                except Exception as e:
+                    log.debug("single-flight publish failed err=%s", e)
+                return val
+            finally:
+                try:
+                    await self.r.delete(lock_key)
+                except Exception:
+                    pass
+
+        deadline = time.monotonic() + self.wait_ms / 1000
+        try:
+            while time.monotonic() < deadline:
+                raw = await self.r.get(res_key)
+                if raw:
+                    self.counts["remote_shared"] += 1
+                    return json.loads(raw)
+                if not await self.r.exists(lock_key):
+                    # leader selesai tanpa hasil (error) atau lock kedaluwarsa
+                    break
+                await asyncio.sleep(self.poll_s)
+        except Exception as e:
+            log.debug("single-flight wait failed err=%s", e)
+        self.counts["remote_fallback"] += 1
+        return await factory()
+
+    def stats(self) -> Dict[str, Any]:
+        leader, shared = self.counts["leader"], self.counts["shared"]
+        return {
+            "inflight": len(self._inflight),
+            "leader": leader,
+            "shared": shared,
+            "remote_shared": self.counts["remote_shared"],
+            "remote_fallback": self.counts["remote_fallback"],
+            "coalesced_ratio": round(shared / (leader + shared), 4) if (leader + shared) else 0.0,
+        }
@@ -0,0 +1,111 @@
+# app/infra/llm/llm_cache.py
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+log = logging.getLogger("medverify.llm_cache")
+
+LLM_CACHE_ENABLE = os.getenv("LLM_CACHE_ENABLE", "1").lower() not in ("0", "false", "no")
+LLM_CACHE_L1_SIZE = int(os.getenv("LLM_CACHE_L1_SIZE", "512"))
+LLM_CACHE_WEB_SEARCH = os.getenv("LLM_CACHE_WEB_SEARCH", "0").lower() in ("1", "true", "yes")
+
+# TTL per jenis panggilan (detik); 0 = tidak di-cache
+LLM_CACHE_TTL_S: Dict[str, int] = {
+    "explain": int(os.getenv("LLM_CACHE_TTL_EXPLAIN_S", "86400")),
+    "complete": int(os.getenv("LLM_CACHE_TTL_COMPLETE_S", "3600")),
+    "web_search": int(os.getenv("LLM_CACHE_TTL_WEB_SEARCH_S", "900")),
+}
+
+KEY_PREFIX = "llm:v1:"
+
+
+def llm_cache_key(model: str, messages: Any, params: Optional[Dict[str, Any]] = None) -> str:
+    """Hash konten request (model + messages termasuk system + parameter sampling)."""
+    blob = json.dumps({"model": model, "messages": messages, "params": params or {}},
+                      ensure_ascii=False, sort_keys=True, default=str)
+    return KEY_PREFIX + hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    Cache respons LLM dua tingkat:
+      - L1: LRU in-process (LLM_CACHE_L1_SIZE entri) dengan expiry per entri
+      - L2: Redis (opsional; `client` = redis.asyncio), dibagi antar worker
+    Kegagalan Redis tidak pernah menggagalkan panggilan LLM (diperlakukan sebagai miss).
+    """
+
+    def __init__(self, client=None, l1_size: int = LLM_CACHE_L1_SIZE,
+                 ttl_s: Optional[Dict[str, int]] = None):
+        self.r = client
+        self.l1_size = max(0, l1_size)
+        self.ttl_s = dict(LLM_CACHE_TTL_S if ttl_s is None else ttl_s)
+        self._l1: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.counts: Counter = Counter()
+
+    def ttl_for(self, kind: str) -> int:
+        return int(self.ttl_s.get(kind, 0))
+
+    async def get(self, key: str) -> Optional[Any]:
+        hit = self._l1.get(key)
+        if hit is not None:
+            exp, value = hit
+            if exp > time.time():
+                self._l1.move_to_end(key)
+                self.counts["l1_hit"] += 1
+                return value
+            self._l1.pop(key, None)
+
+        if self.r is not None:
+            try:
+                raw = await self.r.get(key)
+            except Exception as e:
+                log.debug("llm cache get failed err=%s", e)
+                raw = None
+            if raw:
+                try:
+                    exp, value = json.loads(raw)
+                    self._l1_put(key, value, float(exp))
+                    self.counts["l2_hit"] += 1
+                    return value
+                except Exception:
+                    pass
+
+        self.counts["miss"] += 1
+        return None
+
+    async def put(self, key: str, value: Any, kind: str) -> None:
+        ttl = self.ttl_for(kind)
+        if ttl <= 0:
+            return
+        exp = time.time() + ttl
+        self._l1_put(key, value, exp)
+        if self.r is not None:
+            try:
+                await self.r.set(key, json.dumps([exp, value], ensure_ascii=False, default=str), ex=ttl)
+            except Exception as e:
+                log.debug("llm cache set failed err=%s", e)
+
+    def _l1_put(self, key: str, value: Any, exp: float) -> None:
+        if not self.l1_size:
+            return
+        self._l1[key] = (exp, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        l1, l2, miss = self.counts["l1_hit"], self.counts["l2_hit"], self.counts["miss"]
+        total = l1 + l2 + miss
+        return {
+            "l1_hits": l1,
+            "l2_hits": l2,
+            "misses": miss,
+            "hit_ratio": round((l1 + l2) / total, 4) if total else 0.0,
+            "l1_size": len(self._l1),
+        }
@@ -1,9 +1,13 @@
 # app/infra/llm/openai_adapter.py
 from __future__ import annotations
-import os, json
-from typing import Any, Dict, List, Optional
+import os, json, time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.domain.ports import LlmPort
+from app.infra.llm.llm_cache import LlmResponseCache, llm_cache_key, LLM_CACHE_WEB_SEARCH
+from app.infra.cache.single_flight import SingleFlight
+from app.infra.observability.metrics import stage, observe
+from app.infra.observability.tracing import traced, set_attrs, start_span, end_span
 
 try:
     from openai import AsyncOpenAI
@@ -15,8 +19,17 @@ SYSTEM_PROMPT = (
     "Sertakan sitasi bila jawaban bersumber dari web search. Jika data tidak jelas, katakan tidak tersedia."
 )
 
+EXPLAIN_SYSTEM = "Ringkas hasil verifikasi untuk pengguna umum, ≤80 kata, Bahasa Indonesia, tanpa menambah fakta baru."
+
 class OpenAILlm(LlmPort):
-    def __init__(self):
+    def __init__(self, cache: Optional[LlmResponseCache] = None):
+        """
+        cache: cache respons (content-addressed: model + messages + parameter sampling).
+        Hanya respons sukses dari OpenAI yang disimpan; fallback dev/error tidak.
+        """
+        self.cache = cache
+        # explain() identik yang konkuren (cache masih miss) → satu panggilan OpenAI
+        self._flight = SingleFlight()
         self.api_key = os.getenv("OPENAI_API_KEY", "")
         self.dev_mode = os.getenv("DEV_MODE", "0") == "1"
         self.chat_model = os.getenv("LLM_MODEL", "gpt-4o-mini")  # untuk jawaban biasa
@@ -26,6 +39,11 @@ class OpenAILlm(LlmPort):
     def _client_ok(self) -> bool:
         return bool(self.api_key) and (AsyncOpenAI is not None) and not self.dev_mode
 
+    @property
+    def available(self) -> bool:
+        """False → explain()/complete() memakai fallback lokal (hasilnya jangan di-cache caller)."""
+        return self._client_ok()
+
     def _ensure_client(self):
         if self._client is None and self._client_ok():
             self._client = AsyncOpenAI(api_key=self.api_key)
@@ -38,6 +56,7 @@ class OpenAILlm(LlmPort):
         return str(obj)
 
     # ==== DIPAKAI OLEH VERIFY USE-CASE ====
+    @traced("llm.explain")
     async def explain(self, verdict) -> str:
         """Ringkasan verifikasi (tanpa web search). Kompatibel dengan LlmPort."""
         data = verdict.model_dump() if hasattr(verdict, "model_dump") else verdict or {}
@@ -49,22 +68,52 @@ class OpenAILlm(LlmPort):
             src = data.get("source") or "-"
             return f"Produk {name} status {status}. Sumber: {src}."
         # Online
+        messages = [
+            {"role": "system", "content": EXPLAIN_SYSTEM},
+            {"role": "user", "content": json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)},
+        ]
+        params = {"temperature": float(os.getenv("LLM_TEMPERATURE", "0.2")), "max_tokens": 160}
+        key = llm_cache_key(self.chat_model, messages, params) if self.cache else None
+        if key:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                set_attrs(cached=True)
+                return cached
         self._ensure_client()
-        try:
-            rsp = await self._client.chat.completions.create(
-                model=self.chat_model,
-                messages=[
-                    {"role": "system", "content": "Ringkas hasil verifikasi untuk pengguna umum, ≤80 kata, Bahasa Indonesia, tanpa menambah fakta baru."},
-                    {"role": "user", "content": json.dumps(data, ensure_ascii=False)},
-                ],
-                temperature=float(os.getenv("LLM_TEMPERATURE", "0.2")),
-                max_tokens=160,
-            )
-            return (rsp.choices[0].message.content or "").strip()
-        except Exception:
-            return "Ringkasan verifikasi tersedia."
+
+        async def _call() -> Optional[str]:
+            with stage("llm"):
+                rsp = await self._client.chat.completions.create(
+                    model=self.chat_model, messages=messages, **params,
+                )
+            text = (rsp.choices[0].message.content or "").strip()
+            if key and text:
+                await self.cache.put(key, text, "explain")
+            return text
+
+        # Error OpenAI diteruskan: caller (verify use case) fallback ke penjelasan agregator
+        # dan tidak menyimpan response tersebut ke cache
+        return await self._flight.do(key or llm_cache_key(self.chat_model, messages, params), _call)
+
+    def _messages(self, system: str, user: Any,
+                  history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """messages = [system] + history + [user]."""
+        messages: List[Dict[str, str]] = [{"role": "system", "content": system or SYSTEM_PROMPT}]
+
+        # history diharapkan list[{"role":"user"|"assistant"|"system","content":str}]
+        if history:
+            for h in history:
+                role = (h.get("role") or "").strip()
+                content = self._to_msg_content(h.get("content"))
+                if role in ("user", "assistant", "system") and content:
+                    messages.append({"role": role, "content": content})
+
+        # user terakhir
+        messages.append({"role": "user", "content": self._to_msg_content(user)})
+        return messages
 
     # ==== DIPAKAI OLEH AGENT (bisa dengan web search) ====
+    @traced("llm.complete", attrs=lambda self, **k: {"web_search": bool(k.get("use_web_search"))})
     async def complete(
         self,
         *,
@@ -73,11 +122,15 @@ class OpenAILlm(LlmPort):
         use_web_search: bool = False,
         web_opts: Optional[Dict[str, Any]] = None,
         history: Optional[List[Dict[str, str]]] = None,   # ⬅️ NEW
+        cache: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
         Unified completion.
         Now supports chat history: messages = [system] + history + [user].
         Saat use_web_search=True, gunakan model web-search preview TANPA temperature/top_p.
+
+        cache: None → default (chat di-cache; web search hanya jika LLM_CACHE_WEB_SEARCH=1),
+               False → selalu panggil OpenAI (butuh data segar), True → paksa cache.
         """
 
         # Fallback lokal/dev
@@ -92,44 +145,55 @@ class OpenAILlm(LlmPort):
             }
 
         self._ensure_client()
+        messages = self._messages(system, user, history)
 
-        # --- SUSUN CHAT MESSAGES --- #
-        messages: List[Dict[str, str]] = [{"role": "system", "content": system or SYSTEM_PROMPT}]
-
-        # history diharapkan list[{"role":"user"|"assistant"|"system","content":str}]
-        if history:
-            for h in history:
-                role = (h.get("role") or "").strip()
-                content = self._to_msg_content(h.get("content"))
-                if role in ("user", "assistant", "system") and content:
-                    messages.append({"role": role, "content": content})
-
-        # user terakhir
-        messages.append({"role": "user", "content": self._to_msg_content(user)})
+        use_cache = self.cache is not None and (
+            cache if cache is not None else (LLM_CACHE_WEB_SEARCH or not use_web_search)
+        )
 
         if not use_web_search:
-            rsp = await self._client.chat.completions.create(
-                model=self.chat_model,
-                messages=messages,
-                temperature=float(os.getenv("LLM_TEMPERATURE", "0.2")),
-                max_tokens=int(os.getenv("LLM_MAX_TOKENS", "400")),
-            )
+            params = {
+                "temperature": float(os.getenv("LLM_TEMPERATURE", "0.2")),
+                "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "400")),
+            }
+            key = llm_cache_key(self.chat_model, messages, params) if use_cache else None
+            if key:
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    set_attrs(cached=True)
+                    return {**cached, "cached": True}
+            with stage("llm"):
+                rsp = await self._client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=messages,
+                    **params,
+                )
             msg = rsp.choices[0].message
-            return {
+            out = {
                 "answer": (msg.content or "").strip(),
                 "sources": [],
                 "key_facts": [],
                 "confidence": "medium",
                 "model": self.chat_model
             }
+            if key and out["answer"]:
+                await self.cache.put(key, out, "complete")
+            return out
 
         # Web search preview — JANGAN sertakan temperature/top_p
         opts = web_opts or {}
-        rsp = await self._client.chat.completions.create(
-            model=self.search_model,
-            messages=messages,                # ⬅️ PENTING: kirim history juga
-            web_search_options=opts,
-        )
+        key = llm_cache_key(self.search_model, messages, {"web_search_options": opts}) if use_cache else None
+        if key:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                set_attrs(cached=True)
+                return {**cached, "cached": True}
+        with stage("llm"):
+            rsp = await self._client.chat.completions.create(
+                model=self.search_model,
+                messages=messages,                # ⬅️ PENTING: kirim history juga
+                web_search_options=opts,
+            )
         msg = rsp.choices[0].message
         answer = (msg.content or "").strip()
 
@@ -146,10 +210,93 @@ class OpenAILlm(LlmPort):
                 except Exception:
                     continue
 
-        return {
+        out = {
             "answer": answer,
             "sources": sources,
             "key_facts": [],
             "confidence": "high" if sources else "medium",
             "model": self.search_model,
         }
+        if key and answer:
+            await self.cache.put(key, out, "web_search")
+        return out
+
+    # ==== STREAMING (writer pass agent via SSE) ====
+    async def complete_stream(
+        self,
+        *,
+        system: str,
+        user: Any,
+        history: Optional[List[Dict[str, str]]] = None,
+        cache: Optional[bool] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Versi streaming complete(use_web_search=False): yield potongan teks jawaban begitu datang.
+        Parameter & key cache sama dengan complete() → jawaban yang sudah di-cache dikirim
+        sebagai satu potongan; jawaban stream hanya masuk cache bila finish_reason == "stop"
+        (bukan terpotong max_tokens / klien putus).
+
+        Stage "llm" & span hanya menghitung waktu menunggu upstream (create() + baca chunk),
+        bukan waktu consumer memproses tiap potongan; span tidak dijadikan aktif melewati yield.
+        """
+        if not self._client_ok():
+            yield "Mode lokal/dev: tidak memanggil LLM. Saya butuh koneksi ke OpenAI untuk mencari komposisi terbaru."
+            return
+
+        self._ensure_client()
+        messages = self._messages(system, user, history)
+        params = {
+            "temperature": float(os.getenv("LLM_TEMPERATURE", "0.2")),
+            "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "400")),
+        }
+        use_cache = self.cache is not None and (cache if cache is not None else True)
+        key = llm_cache_key(self.chat_model, messages, params) if use_cache else None
+        if key:
+            cached = await self.cache.get(key)
+            if cached is not None and cached.get("answer"):
+                yield cached["answer"]
+                return
+
+        parts: List[str] = []
+        finish_reason: Optional[str] = None
+        upstream_s = 0.0
+        outcome = "ok"
+        sp = start_span("llm.complete_stream", model=self.chat_model)
+        try:
+            t0 = time.perf_counter()
+            rsp = await self._client.chat.completions.create(
+                model=self.chat_model, messages=messages, stream=True, **params,
+            )
+            upstream_s += time.perf_counter() - t0
+            chunks = rsp.__aiter__()
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    upstream_s += time.perf_counter() - t0
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+                delta = getattr(choice.delta, "content", None) if choice.delta is not None else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except GeneratorExit:
+            outcome = "cancelled"  # consumer (klien SSE) berhenti sebelum stream selesai
+            raise
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            observe("llm", upstream_s, outcome)
+            end_span(sp, chunks=len(parts), finish_reason=finish_reason, outcome=outcome)
+
+        answer = "".join(parts).strip()
+        if key and answer and finish_reason == "stop":
+            out = {"answer": answer, "sources": [], "key_facts": [], "confidence": "medium",
+                   "model": self.chat_model}
+            await self.cache.put(key, out, "complete")
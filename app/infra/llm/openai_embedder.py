@@ -6,10 +6,16 @@ from openai import OpenAI
 from openai import APIConnectionError, RateLimitError
 from dotenv import load_dotenv
 
+from app.infra.observability.metrics import stage
+from app.infra.observability.tracing import span
+
 # Load .env lebih awal
 load_dotenv()
 
 _DEFAULT_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-small")  # 1536 dim
+# Matryoshka truncation native (text-embedding-3-*): 256/512/... ; 0 = dimensi penuh.
+# Wajib sama dengan EMBED_DIM agar cocok dengan index FAISS.
+_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "0"))
 
 def _mk_client(api_key: Optional[str] = None) -> OpenAI:
     key = api_key or os.getenv("OPENAI_API_KEY")
@@ -28,9 +34,11 @@ def _mk_client(api_key: Optional[str] = None) -> OpenAI:
     return OpenAI(**kwargs)
 
 class OpenAIEmbedder:
-    def __init__(self, *, model: str | None = None, api_key: str | None = None):
+    def __init__(self, *, model: str | None = None, api_key: str | None = None,
+                 dimensions: int | None = None):
         self.model = model or _DEFAULT_MODEL
         self.api_key = api_key
+        self.dimensions = dimensions if dimensions is not None else (_DIMENSIONS or None)
         self._client: OpenAI | None = None
 
     @property
@@ -39,18 +47,28 @@ class OpenAIEmbedder:
             self._client = _mk_client(self.api_key)
         return self._client
 
+    def _create(self, inputs: List[str]):
+        kwargs = {"model": self.model, "input": inputs}
+        if self.dimensions:
+            kwargs["dimensions"] = self.dimensions
+        return self.client.embeddings.create(**kwargs)
+
     def _embed(self, inputs: List[str]) -> List[List[float]]:
+        with stage("embedding"), span("embedding", model=self.model, n=len(inputs)):
+            return self._embed_retry(inputs)
+
+    def _embed_retry(self, inputs: List[str]) -> List[List[float]]:
         # retry sederhana untuk rate limit / koneksi
         for attempt in range(5):
             try:
-                rsp = self.client.embeddings.create(model=self.model, input=inputs)
+                rsp = self._create(inputs)
                 return [d.embedding for d in rsp.data]
             except (RateLimitError, APIConnectionError) as e:
                 sleep_s = min(2 ** attempt, 8)
                 time.sleep(sleep_s)
                 continue
         # satu percobaan terakhir (biar error terlihat)
-        rsp = self.client.embeddings.create(model=self.model, input=inputs)
+        rsp = self._create(inputs)
         return [d.embedding for d in rsp.data]
 
     def embed_query(self, text: str) -> list[float]:
@@ -0,0 +1,193 @@
+# app/infra/observability/loop_monitor.py
+"""
+Watchdog lag event loop: mendeteksi panggilan blocking di handler async
+(YOLO, pytesseract, embedder sinkron dengan time.sleep, requests.get, ...).
+
+- Heartbeat (task asyncio) tidur LOOP_MONITOR_INTERVAL_MS lalu mengukur keterlambatan bangun
+  → lag scheduling (histogram stage="loop_lag" di /metrics, max & jumlah di stats()).
+- Sampler (thread daemon) memeriksa heartbeat tiap LOOP_MONITOR_SAMPLE_MS; bila heartbeat
+  terlambat > LOOP_LAG_THRESHOLD_MS, stack thread event loop diambil (sys._current_frames)
+  SAAT loop masih terblokir, lalu diatribusikan ke call site: frame terdalam di kode repo
+  (app/, crawler/, main.py, tests/) — bukan torch/cv2 — dicatat per call site + log warning.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+from app.infra.observability import metrics
+
+log = logging.getLogger("medverify.loop_monitor")
+
+LOOP_MONITOR_ENABLE = os.getenv("LOOP_MONITOR_ENABLE", "1").lower() not in ("0", "false", "no")
+LOOP_LAG_THRESHOLD_MS = int(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+LOOP_MONITOR_INTERVAL_MS = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+LOOP_MONITOR_SAMPLE_MS = int(os.getenv("LOOP_MONITOR_SAMPLE_MS", "20"))
+
+_REPO_ROOT = str(Path(__file__).resolve().parents[3])
+_SELF = str(Path(__file__).resolve())
+
+
+def _call_site(frame) -> tuple:
+    """(call_site, stack_text): frame terdalam milik repo, fallback frame terdalam."""
+    stack = traceback.extract_stack(frame)
+    site = None
+    for fs in reversed(stack):
+        fn = os.path.abspath(fs.filename)
+        if fn.startswith(_REPO_ROOT) and fn != _SELF and "site-packages" not in fn:
+            site = f"{os.path.relpath(fn, _REPO_ROOT)}:{fs.lineno} {fs.name}"
+            break
+    if site is None and stack:
+        fs = stack[-1]
+        site = f"{fs.filename}:{fs.lineno} {fs.name}"
+    return site or "?", "".join(traceback.format_list(stack[-12:]))
+
+
+class LoopLagMonitor:
+    def __init__(self, *, threshold_ms: int = LOOP_LAG_THRESHOLD_MS,
+                 interval_ms: int = LOOP_MONITOR_INTERVAL_MS, sample_ms: int = LOOP_MONITOR_SAMPLE_MS,
+                 keep_stacks: int = 20):
+        self.threshold_s = max(1, threshold_ms) / 1000
+        self.interval_s = max(1, interval_ms) / 1000
+        self.sample_s = max(1, sample_ms) / 1000
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_tid: Optional[int] = None
+        self._expected = 0.0          # monotonic saat heartbeat seharusnya bangun
+        self._beat = 0                # nomor heartbeat; stall di-capture maks. 1x per beat
+        self._captured_beat = -1
+        self._pending_site: Optional[str] = None
+        self.counts: Counter = Counter()
+        self.sites: Dict[str, Counter] = {}
+        self.max_lag_s = 0.0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep_stacks)
+
+    # ── Lifecycle ─────────────────────────────────────────────────
+    def start(self) -> None:
+        """Dipanggil dari dalam event loop (startup)."""
+        if self._task is not None:
+            return
+        self._loop_tid = threading.get_ident()
+        self._expected = time.monotonic() + self.interval_s
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._sampler, name="loop-lag-sampler", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ── Heartbeat (loop thread) ───────────────────────────────────
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            lag = max(0.0, now - self._expected)
+            with self._lock:
+                self._beat += 1
+                self._expected = now + self.interval_s
+                site, self._pending_site = self._pending_site, None
+                self._record(lag, site)
+
+    def _record(self, lag: float, site: Optional[str]) -> None:
+        self.counts["samples"] += 1
+        self.max_lag_s = max(self.max_lag_s, lag)
+        metrics.observe("loop_lag", lag)
+        if lag < self.threshold_s:
+            return
+        self.counts["stalls"] += 1
+        ms = int(lag * 1000)
+        if site is None:
+            # stall lebih pendek dari resolusi sampler
+            self.counts["unattributed"] += 1
+            return
+        st = self.sites[site]
+        st["ms_total"] += ms
+        st["ms_max"] = max(st["ms_max"], ms)
+        if self.recent and self.recent[-1]["site"] == site and self.recent[-1]["lag_ms"] is None:
+            self.recent[-1]["lag_ms"] = ms
+
+    # ── Sampler (thread) ──────────────────────────────────────────
+    def _sampler(self) -> None:
+        while not self._stop.wait(self.sample_s):
+            late = time.monotonic() - self._expected
+            if late < self.threshold_s:
+                continue
+            with self._lock:
+                if self._captured_beat == self._beat:
+                    continue
+                self._captured_beat = self._beat
+            frame = sys._current_frames().get(self._loop_tid)
+            if frame is None:
+                continue
+            site, stack = _call_site(frame)
+            with self._lock:
+                self._pending_site = site
+                self.sites.setdefault(site, Counter())["count"] += 1
+                self.recent.append({"site": site, "ts": time.time(), "lag_ms": None, "stack": stack})
+            log.warning("[loop-lag] event loop blocked >%d ms at %s\n%s",
+                        int(self.threshold_s * 1000), site, stack)
+
+    # ── Stats ────────────────────────────────────────────────────
+    def stats(self, *, stacks: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            sites = sorted(
+                ({"site": s, "count": c["count"], "ms_total": c["ms_total"], "ms_max": c["ms_max"]}
+                 for s, c in self.sites.items()),
+                key=lambda d: d["ms_total"], reverse=True,
+            )
+            out = {
+                "threshold_ms": int(self.threshold_s * 1000),
+                "samples": self.counts["samples"],
+                "stalls": self.counts["stalls"],
+                "unattributed": self.counts["unattributed"],
+                "max_lag_ms": int(self.max_lag_s * 1000),
+                "sites": sites,
+            }
+            if stacks:
+                out["recent"] = list(self.recent)
+        return out
+
+
+_MONITOR: Optional[LoopLagMonitor] = None
+
+
+def start_monitor() -> Optional[LoopLagMonitor]:
+    global _MONITOR
+    if not LOOP_MONITOR_ENABLE:
+        return None
+    if _MONITOR is None:
+        _MONITOR = LoopLagMonitor()
+    _MONITOR.start()
+    return _MONITOR
+
+
+async def stop_monitor() -> None:
+    global _MONITOR
+    if _MONITOR is not None:
+        await _MONITOR.stop()
+        _MONITOR = None
+
+
+def get_monitor() -> Optional[LoopLagMonitor]:
+    return _MONITOR
@@ -0,0 +1,181 @@
+# app/infra/observability/metrics.py
+"""
+Metrik Prometheus untuk pipeline (di-scrape lewat GET /metrics).
+
+- medverify_stage_seconds{stage,endpoint,outcome}     : histogram per tahap
+      stage ∈ yolo | ocr_title | ocr_full | regex | lexical | faiss | embedding | mongo | redis | llm
+- medverify_request_seconds{endpoint,method,status}   : histogram per request HTTP
+- gauge (dibaca saat scrape dari stats() komponen)   : kedalaman antrean, inflight, hit ratio cache
+
+`endpoint` diambil dari contextvar yang di-set middleware (template route, mis. /v1/verify-photo),
+jadi adapter tidak perlu tahu siapa pemanggilnya; di luar request → "-".
+prometheus_client opsional: bila tidak terpasang, semua fungsi di sini no-op.
+"""
+from __future__ import annotations
+
+import os
+import time
+import inspect
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from app.infra.observability import tracing
+
+try:
+    from prometheus_client import (  # type: ignore
+        CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest,
+    )
+    from prometheus_client.core import GaugeMetricFamily  # type: ignore
+except Exception:
+    REGISTRY = None  # type: ignore
+
+log = logging.getLogger("medverify.metrics")
+
+METRICS_ENABLE = os.getenv("METRICS_ENABLE", "1").lower() not in ("0", "false", "no") and REGISTRY is not None
+
+# Bucket detik: tahap cepat (regex/redis ~ms) s.d. LLM (~detik)
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ENDPOINT: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_endpoint", default="-")
+
+if METRICS_ENABLE:
+    STAGE_SECONDS = Histogram(
+        "medverify_stage_seconds", "Latency per tahap pipeline",
+        ["stage", "endpoint", "outcome"], buckets=_BUCKETS,
+    )
+    REQUEST_SECONDS = Histogram(
+        "medverify_request_seconds", "Latency request HTTP",
+        ["endpoint", "method", "status"], buckets=_BUCKETS,
+    )
+
+
+def set_endpoint(endpoint: str) -> contextvars.Token:
+    return _ENDPOINT.set(endpoint or "-")
+
+
+def reset_endpoint(token: contextvars.Token) -> None:
+    _ENDPOINT.reset(token)
+
+
+def observe(stage: str, seconds: float, outcome: str = "ok") -> None:
+    if METRICS_ENABLE:
+        STAGE_SECONDS.labels(stage, _ENDPOINT.get(), outcome).observe(max(0.0, seconds))
+
+
+def observe_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    if METRICS_ENABLE:
+        REQUEST_SECONDS.labels(endpoint, method, str(status)).observe(max(0.0, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """`with stage("faiss"): ...` — outcome=error bila blok melempar exception."""
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        observe(name, time.perf_counter() - t0, outcome)
+
+
+def timed(name: str) -> Callable:
+    """Dekorator untuk coroutine function (operasi Mongo/Redis/LLM)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with stage(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+class TimedRedis:
+    """
+    Proxy client redis.asyncio: setiap command async dicatat sebagai stage "redis"
+    (+ span `redis.<command>` bila tracing aktif).
+    Command redis-py (get/set/incr/...) adalah `def` biasa yang mengembalikan awaitable, jadi
+    yang dibungkus adalah hasilnya: awaitable → di-await & diukur; selain itu (pipeline(),
+    pubsub(), ...) diteruskan apa adanya.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            t0 = time.perf_counter()
+            res = attr(*args, **kwargs)
+            if not inspect.isawaitable(res):
+                return res
+            return _timed_await(name, res, t0)
+        return call
+
+
+async def _timed_await(name: str, aw, t0: float):
+    outcome = "ok"
+    sp = tracing.start_span(f"redis.{name}")
+    try:
+        return await aw
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        observe("redis", time.perf_counter() - t0, outcome)
+        tracing.end_span(sp, outcome=outcome)
+
+
+# ── Gauge dari stats() komponen ─────────────────────────────────
+# source() → {"queue_depth": {...}, "inflight": {...}, "cache_hit_ratio": {...}, "admission_limit": {...}}
+_GAUGE_SOURCE: Optional[Callable[[], Dict[str, Dict[str, float]]]] = None
+
+_GAUGES = {
+    "queue_depth": ("medverify_queue_depth", "Kedalaman antrean", "queue"),
+    "inflight": ("medverify_inflight", "Pekerjaan yang sedang berjalan", "component"),
+    "cache_hit_ratio": ("medverify_cache_hit_ratio", "Hit ratio cache sejak proses start", "cache"),
+    "admission_limit": ("medverify_admission_limit", "Limit konkurensi adaptif saat ini", "class"),
+}
+
+
+class _StatsCollector:
+    def collect(self):
+        if _GAUGE_SOURCE is None:
+            return
+        try:
+            data = _GAUGE_SOURCE() or {}
+        except Exception:
+            log.exception("metrics gauge source failed")
+            return
+        for key, (metric, doc, label) in _GAUGES.items():
+            fam = GaugeMetricFamily(metric, doc, labels=[label])
+            for name, value in (data.get(key) or {}).items():
+                if value is not None:
+                    fam.add_metric([name], float(value))
+            yield fam
+
+
+def register_gauges(source: Callable[[], Dict[str, Dict[str, float]]]) -> None:
+    global _GAUGE_SOURCE
+    if not METRICS_ENABLE:
+        return
+    first = _GAUGE_SOURCE is None
+    _GAUGE_SOURCE = source
+    if first:
+        REGISTRY.register(_StatsCollector())
+
+
+def render_latest() -> Optional[tuple]:
+    """(body, content_type) atau None bila metrik nonaktif."""
+    if not METRICS_ENABLE:
+        return None
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
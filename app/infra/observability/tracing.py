@@ -0,0 +1,234 @@
+# app/infra/observability/tracing.py
+"""
+Tracing OpenTelemetry (span router → use case → adapter) tanpa perlu collector.
+
+- Root span per request dibuat middleware (main.py); request id diambil dari header
+  X-Request-Id (atau dibuat baru), disimpan sebagai atribut `request.id` dan dikembalikan
+  di response. Header W3C `traceparent` dari klien diteruskan sebagai parent.
+- Adapter memakai `span(name, **attrs)` / `@traced(name)`; atribut hasil (hits, _src, ...)
+  ditambahkan lewat `set_attrs(...)` pada span aktif.
+- Exporter (TRACING_EXPORTER):
+    file    → TRACE_FILE (JSON lines; format OTLP/JSON bila exporter-otlp-proto-common terpasang,
+              jadi bisa di-replay ke collector/Jaeger nanti)
+    console → stdout
+    otlp    → OTLP/HTTP ke OTEL_EXPORTER_OTLP_ENDPOINT (butuh opentelemetry-exporter-otlp)
+
+opentelemetry-sdk opsional: bila tidak terpasang atau TRACING_ENABLE=0, semua fungsi no-op.
+"""
+from __future__ import annotations
+
+import os
+import json
+import uuid
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+try:
+    from opentelemetry import trace, propagate  # type: ignore
+    from opentelemetry.sdk.resources import Resource  # type: ignore
+    from opentelemetry.sdk.trace import TracerProvider  # type: ignore
+    from opentelemetry.sdk.trace.export import (  # type: ignore
+        BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased  # type: ignore
+except Exception:
+    trace = None  # type: ignore
+
+try:
+    from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans  # type: ignore
+    from google.protobuf.json_format import MessageToDict  # type: ignore
+except Exception:
+    encode_spans = None  # type: ignore
+
+log = logging.getLogger("medverify.tracing")
+
+TRACING_ENABLE = os.getenv("TRACING_ENABLE", "0").lower() in ("1", "true", "yes") and trace is not None
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+REQUEST_ID_HEADER = "X-Request-Id"
+
+_REQUEST_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_TRACER = None
+
+
+if trace is not None:
+    class FileSpanExporter(SpanExporter):
+        """Tulis span selesai ke file JSON lines (satu batch OTLP per baris bila encoder tersedia)."""
+
+        def __init__(self, path: str = TRACE_FILE):
+            self.path = path
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> "SpanExportResult":
+            try:
+                if encode_spans is not None:
+                    lines = [json.dumps(MessageToDict(encode_spans(spans)), ensure_ascii=False)]
+                else:
+                    lines = [json.dumps(json.loads(s.to_json(indent=None)), ensure_ascii=False) for s in spans]
+                with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                return SpanExportResult.SUCCESS
+            except Exception:
+                log.exception("trace export failed path=%s", self.path)
+                return SpanExportResult.FAILURE
+
+        def shutdown(self) -> None:
+            pass
+
+
+def _exporter():
+    if TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if TRACING_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter  # type: ignore
+            return OTLPSpanExporter()
+        except Exception:
+            log.warning("opentelemetry-exporter-otlp tidak terpasang; fallback ke file %s", TRACE_FILE)
+    return FileSpanExporter(TRACE_FILE)
+
+
+def setup(service_name: str = "medverify-ai") -> None:
+    """Pasang TracerProvider global (sekali per worker; dipanggil saat startup)."""
+    global _TRACER
+    if not TRACING_ENABLE or _TRACER is not None:
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name,
+                                  "service.version": os.getenv("APP_VERSION", "0.1.0")}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(provider)
+    _TRACER = trace.get_tracer("medverify")
+    log.info("tracing on exporter=%s sample=%.2f", TRACING_EXPORTER, TRACING_SAMPLE_RATIO)
+
+
+def shutdown() -> None:
+    """Flush span yang tersisa di BatchSpanProcessor."""
+    global _TRACER
+    if _TRACER is None:
+        return
+    try:
+        trace.get_tracer_provider().shutdown()
+    except Exception:
+        pass
+    _TRACER = None
+
+
+# ── Request id ──────────────────────────────────────────────────
+def current_request_id() -> Optional[str]:
+    return _REQUEST_ID.get()
+
+
+def bind_request_id(headers: Mapping[str, str]) -> tuple:
+    """Ambil/buat request id dari header; return (request_id, token) untuk reset."""
+    rid = (headers.get(REQUEST_ID_HEADER) or headers.get(REQUEST_ID_HEADER.lower()) or "").strip()[:128]
+    rid = rid or uuid.uuid4().hex
+    return rid, _REQUEST_ID.set(rid)
+
+
+def reset_request_id(token) -> None:
+    _REQUEST_ID.reset(token)
+
+
+# ── Span API ───────────────────────────────────────────────────
+def _clean(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for k, v in attrs.items():
+        if v is None:
+            continue
+        if isinstance(v, (bool, int, float, str)):
+            out[k] = v[:256] if isinstance(v, str) else v
+        else:
+            out[k] = str(v)[:256]
+    return out
+
+
+@contextmanager
+def span(name: str, *, parent_headers: Optional[Mapping[str, str]] = None, **attrs: Any) -> Iterator[Any]:
+    """
+    `with span("search_router.search", query=q, k=k) as sp: ...`
+    parent_headers: header HTTP masuk (traceparent) untuk root span request.
+    """
+    if _TRACER is None:
+        yield None
+        return
+    ctx = propagate.extract(parent_headers) if parent_headers else None
+    rid = _REQUEST_ID.get()
+    if rid:
+        attrs.setdefault("request.id", rid)
+    with _TRACER.start_as_current_span(name, context=ctx, attributes=_clean(attrs)) as sp:
+        yield sp
+
+
+def start_span(name: str, **attrs: Any) -> Any:
+    """
+    Span manual yang TIDAK dijadikan span aktif (anak dari span aktif saat dipanggil).
+    Untuk async generator: context manager span() yang terbuka melewati `yield` membocorkan
+    context ke kode consumer; pakai start_span() + end_span() sebagai gantinya.
+    """
+    if _TRACER is None:
+        return None
+    rid = _REQUEST_ID.get()
+    if rid:
+        attrs.setdefault("request.id", rid)
+    return _TRACER.start_span(name, attributes=_clean(attrs))
+
+
+def end_span(sp: Any, **attrs: Any) -> None:
+    if sp is None:
+        return
+    if sp.is_recording() and attrs:
+        sp.set_attributes(_clean(attrs))
+    sp.end()
+
+
+def set_attrs(**attrs: Any) -> None:
+    """Tambah atribut ke span aktif (mis. hit count setelah query selesai)."""
+    if _TRACER is None:
+        return
+    sp = trace.get_current_span()
+    if sp.is_recording():
+        sp.set_attributes(_clean(attrs))
+
+
+def traced(name: str, attrs: Optional[Callable[..., Dict[str, Any]]] = None) -> Callable:
+    """
+    Dekorator span untuk method async/sync.
+    attrs(*args, **kwargs) → atribut awal dari argumen (args[0] = self).
+    """
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                if _TRACER is None:
+                    return await fn(*args, **kwargs)
+                with span(name, **(attrs(*args, **kwargs) if attrs else {})):
+                    return await fn(*args, **kwargs)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return fn(*args, **kwargs)
+            with span(name, **(attrs(*args, **kwargs) if attrs else {})):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def traceparent_headers() -> Dict[str, str]:
+    """Header W3C (traceparent) dari span aktif — untuk diteruskan ke klien/layanan lain."""
+    if _TRACER is None:
+        return {}
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
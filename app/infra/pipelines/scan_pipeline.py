@@ -5,6 +5,8 @@ import asyncio, uuid, time
 import cv2, numpy as np
 from app.infra.vision.yolo_detector import YoloDetector
 from app.infra.regex.bpom_validator import RegexBpomValidator
+from app.infra.observability import metrics
+from app.infra.observability.tracing import span, set_attrs
 
 import logging
 log = logging.getLogger("app.scan.pipeline")
@@ -92,15 +94,12 @@ class ScanPipeline:
             img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
         return img
 
-    async def run(
-        self,
-        data: bytes,
-        *,
-        return_partial: bool = True,
-        t1_timeout_ms: int = 500,
-        t2_timeout_ms: int = 1200,
-        extra_ctx: dict | None = None,
-    ):
+    def _launch(self, data: bytes):
+        """
+        Decode + YOLO (sinkron), lalu jadwalkan T1 (OCR title → search) dan T2 (OCR full → regex)
+        sebagai task paralel. Dipakai run() dan stream().
+        Return (ctx, task_t1, task_t2); ctx berisi request_id, t0, timings, boxes, title_box, yolo_title_conf.
+        """
         req_id = str(uuid.uuid4())
         t0 = time.time()
         timings = {
@@ -112,8 +111,11 @@ class ScanPipeline:
 
         # === YOLO detect ===
         y0 = time.time()
-        boxes = self.det.detect(img)
+        with span("scan.yolo"):
+            boxes = self.det.detect(img)
+            set_attrs(boxes=len(boxes or []))
         timings["yolo_ms"] = int((time.time() - y0) * 1000)
+        metrics.observe("yolo", timings["yolo_ms"] / 1000)
 
         seen_ids = sorted({b["cls_id"] for b in boxes}) if boxes else []
         log.info(
@@ -143,8 +145,11 @@ class ScanPipeline:
         async def t1_task():
             try:
                 # OCR judul
-                text, conf, ms = self.ocr.ocr_title_text(title_crop)
+                with span("scan.ocr_title"):
+                    text, conf, ms = self.ocr.ocr_title_text(title_crop)
+                    set_attrs(conf=float(conf or 0.0))
                 timings["ocr_title_ms"] = ms
+                metrics.observe("ocr_title", ms / 1000)
                 clean = _norm_title(text) if text else None
                 log.info(
                     "[scan] OCR(title) ms=%d conf=%.3f raw='%s' clean='%s'",
@@ -189,15 +194,21 @@ class ScanPipeline:
                     }
 
                 t_start = time.time()
-                lines, ms = self.ocr.ocr_lines(img)
+                with span("scan.ocr_full"):
+                    lines, ms = self.ocr.ocr_lines(img)
+                    set_attrs(lines=len(lines))
                 timings["ocr_full_ms"] = ms
+                metrics.observe("ocr_full", ms / 1000)
                 log.info("[scan] OCR(full) lines=%d ms=%d", len(lines), ms)
 
                 full = "\n".join(l.get("text", "") for l in lines)
-                v = self.regex.validate(full)
+                with span("scan.regex"):
+                    v = self.regex.validate(full)
+                    set_attrs(found=bool(v.number))
 
                 # Kurangi waktu OCR dari total untuk estimasi murni regex
                 timings["regex_ms"] = max(0, int((time.time() - t_start) * 1000) - ms)
+                metrics.observe("regex", timings["regex_ms"] / 1000)
                 log.info(
                     "[scan] regex result number=%s conf=%.3f parse_ms=%d",
                     v.number, float(v.confidence or 0.0), timings["regex_ms"]
@@ -218,9 +229,72 @@ class ScanPipeline:
                     "boxes": boxes, "title_box": title_box
                 }
 
+        ctx = {
+            "request_id": req_id, "t0": t0, "timings": timings,
+            "boxes": boxes, "title_box": title_box, "yolo_title_conf": yolo_title_conf,
+        }
+        return ctx, asyncio.create_task(t1_task()), asyncio.create_task(t2_task())
+
+    async def stream(self, data: bytes, *, t2_timeout_ms: int = 1200, extra_ctx: dict | None = None):
+        """
+        Versi progresif dari run(): yield dua event berurutan
+          1) stage="partial" begitu T1 selesai (title + kandidat match; bpom_number jika T2 sudah selesai)
+          2) stage="final"   begitu T2 selesai (nomor BPOM), dibatasi t2_timeout_ms sejak awal scan
+        Field sama dengan run(); final selalu berisi gabungan title + regex.
+        """
+        ctx, a, b = self._launch(data)
+        timings = ctx["timings"]
+        deadline = ctx["t0"] + max(0.01, t2_timeout_ms / 1000)
+        out = {
+            "request_id": ctx["request_id"],
+            "title_text": None, "title_conf": None, "match": None,
+            "bpom_number": None, "regex_skipped": False,
+            "boxes": ctx["boxes"], "title_box": ctx["title_box"],
+            "yolo_title_conf": ctx["yolo_title_conf"],
+        }
+
+        def _merge(src: dict | None, keys) -> None:
+            if isinstance(src, dict):
+                for k in keys:
+                    if src.get(k) is not None:
+                        out[k] = src[k]
+
+        try:
+            await asyncio.wait({a}, timeout=max(0.0, deadline - time.time()))
+            if a.done():
+                _merge(a.result(), ("title_text", "title_conf", "match"))
+            if b.done():
+                _merge(b.result(), ("bpom_number", "regex_skipped"))
+            timings["total_ms"] = int((time.time() - ctx["t0"]) * 1000)
+            yield {**out, "stage": "partial", "timings": dict(timings)}
+
+            if not b.done():
+                await asyncio.wait({b}, timeout=max(0.0, deadline - time.time()))
+            if b.done():
+                _merge(b.result(), ("bpom_number", "regex_skipped"))
+            else:
+                out["regex_timed_out"] = True
+            timings["total_ms"] = int((time.time() - ctx["t0"]) * 1000)
+            yield {**out, "stage": "final", "timings": dict(timings)}
+        finally:
+            for t in (a, b):
+                if not t.done():
+                    t.cancel()
+
+    async def run(
+        self,
+        data: bytes,
+        *,
+        return_partial: bool = True,
+        t1_timeout_ms: int = 500,
+        t2_timeout_ms: int = 1200,
+        extra_ctx: dict | None = None,
+    ):
+        ctx, a, b = self._launch(data)
+        req_id, boxes, title_box = ctx["request_id"], ctx["boxes"], ctx["title_box"]
+        timings, t0, yolo_title_conf = ctx["timings"], ctx["t0"], ctx["yolo_title_conf"]
+
         # Jalankan T1 & T2 paralel, ambil yang selesai duluan
-        a = asyncio.create_task(t1_task())
-        b = asyncio.create_task(t2_task())
         done, pending = await asyncio.wait(
             {a, b},
             timeout=max(0.01, t1_timeout_ms / 1000),
@@ -0,0 +1,161 @@
+# app/infra/repo/lookup_writer.py
+from __future__ import annotations
+
+import os
+import time
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+log = logging.getLogger("medverify.lookup_writer")
+
+LOOKUP_WRITER_ENABLE = os.getenv("LOOKUP_WRITER_ENABLE", "1").lower() not in ("0", "false", "no")
+LOOKUP_QUEUE_MAX = int(os.getenv("LOOKUP_QUEUE_MAX", "10000"))
+LOOKUP_BATCH_SIZE = int(os.getenv("LOOKUP_BATCH_SIZE", "500"))
+LOOKUP_FLUSH_MS = int(os.getenv("LOOKUP_FLUSH_MS", "1000"))
+# Saat antrean penuh: drop_new | drop_oldest | block (backpressure, maks. LOOKUP_BLOCK_MS lalu drop)
+LOOKUP_FULL_POLICY = os.getenv("LOOKUP_FULL_POLICY", "drop_oldest").lower()
+LOOKUP_BLOCK_MS = int(os.getenv("LOOKUP_BLOCK_MS", "50"))
+
+POLICIES = ("drop_new", "drop_oldest", "block")
+
+
+class LookupWriter:
+    """
+    Write-behind untuk log `lookups`: request hanya enqueue dokumen, task background
+    menulis per batch via `sink` (insert_many) saat batch penuh (LOOKUP_BATCH_SIZE)
+    atau interval habis (LOOKUP_FLUSH_MS). close() menguras antrean saat shutdown.
+
+    Log lookups bersifat analitik → boleh hilang saat antrean penuh (dicatat di stats).
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        *,
+        max_queue: int = LOOKUP_QUEUE_MAX,
+        batch_size: int = LOOKUP_BATCH_SIZE,
+        flush_ms: int = LOOKUP_FLUSH_MS,
+        policy: str = LOOKUP_FULL_POLICY,
+        block_ms: int = LOOKUP_BLOCK_MS,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"LOOKUP_FULL_POLICY must be one of {POLICIES}, got {policy!r}")
+        self.sink = sink
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_s = max(1, flush_ms) / 1000
+        self.policy = policy
+        self.block_s = max(0, block_ms) / 1000
+        self.counts: Counter = Counter()
+        self._q: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush: Optional[asyncio.Task] = None  # insert_many yang sedang berjalan (di-shield)
+        self._closed = False
+
+    # ── Lifecycle ─────────────────────────────────────────────────
+    def start(self) -> None:
+        if self._q is None:
+            self._q = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Hentikan loop, tunggu batch yang sedang ditulis, lalu tulis sisa antrean — setelah
+        return tidak ada write yang masih berjalan (client Mongo aman ditutup).
+        """
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush is not None:
+            # cancel loop hanya memutus await shield; insert_many-nya sendiri masih jalan
+            await asyncio.wait([self._flush])
+            self._flush = None
+        while self._q is not None and not self._q.empty():
+            await self._write(self._drain(self.batch_size))
+
+    # ── Producer ──────────────────────────────────────────────────
+    async def submit(self, doc: Dict[str, Any]) -> bool:
+        """Enqueue satu dokumen; return False bila di-drop."""
+        if self._closed:
+            self.counts["dropped"] += 1
+            return False
+        self.start()
+        q = self._q
+        try:
+            q.put_nowait(doc)
+        except asyncio.QueueFull:
+            if self.policy == "drop_new":
+                self.counts["dropped"] += 1
+                return False
+            if self.policy == "drop_oldest":
+                q.get_nowait()
+                q.put_nowait(doc)
+                self.counts["dropped"] += 1
+            else:
+                try:
+                    await asyncio.wait_for(q.put(doc), timeout=self.block_s)
+                    self.counts["blocked"] += 1
+                except asyncio.TimeoutError:
+                    self.counts["dropped"] += 1
+                    return False
+        self.counts["queued"] += 1
+        return True
+
+    # ── Consumer ──────────────────────────────────────────────────
+    def _drain(self, n: int) -> List[Dict[str, Any]]:
+        out = []
+        while len(out) < n and not self._q.empty():
+            out.append(self._q.get_nowait())
+        return out
+
+    async def _run(self) -> None:
+        q = self._q
+        while True:
+            batch: List[Dict[str, Any]] = []
+            try:
+                batch.append(await q.get())
+                deadline = time.monotonic() + self.flush_s
+                while len(batch) < self.batch_size:
+                    batch.extend(self._drain(self.batch_size - len(batch)))
+                    left = deadline - time.monotonic()
+                    if len(batch) >= self.batch_size or left <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(q.get(), timeout=left))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # close(): batch yang sedang dikumpulkan jangan hilang
+                await self._write(batch)
+                raise
+            # shield: cancel saat insert_many berjalan tidak membuang batch ini; close() menunggu _flush
+            self._flush = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._flush)
+            self._flush = None
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            await self.sink(batch)
+            self.counts["written"] += len(batch)
+            self.counts["batches"] += 1
+        except Exception:
+            self.counts["failed"] += len(batch)
+            log.exception("lookup flush failed n=%d", len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._q.qsize() if self._q is not None else 0,
+            "max_queue": self.max_queue,
+            "policy": self.policy,
+            **{k: self.counts[k] for k in ("queued", "written", "batches", "dropped", "blocked", "failed")},
+        }
@@ -10,6 +10,9 @@ from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo import ASCENDING, TEXT
 
 from app.domain.ports import RepoPort
+from app.infra.repo.lookup_writer import LookupWriter, LOOKUP_WRITER_ENABLE
+from app.infra.observability.metrics import timed
+from app.infra.observability.tracing import traced
 
 MONGO_URI   = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME     = os.getenv("MONGO_DB", "medverify")
@@ -31,6 +34,10 @@ class MongoVerificationRepo(RepoPort):
         self.client = AsyncIOMotorClient(MONGO_URI)
         self.db = self.client[DB_NAME]
         self.coll: AsyncIOMotorCollection = self.db[COLL_NAME]
+        # Write-behind log lookups (None → insert_one langsung seperti dulu)
+        self.lookup_writer: Optional[LookupWriter] = (
+            LookupWriter(self._insert_lookups) if LOOKUP_WRITER_ENABLE else None
+        )
 
     # ──────────────────────────────────────────────────────────────
     #  Indexing
@@ -70,6 +77,8 @@ class MongoVerificationRepo(RepoPort):
     # ──────────────────────────────────────────────────────────────
     #  Exact lookups
     # ──────────────────────────────────────────────────────────────
+    @traced("mongo.find_by_nie", attrs=lambda self, nie, *a, **k: {"nie": nie})
+    @timed("mongo")
     async def find_by_nie(self, nie: str) -> Optional[Dict[str, Any]]:
         """
         Exact lookup berdasarkan NIE.
@@ -84,9 +93,28 @@ class MongoVerificationRepo(RepoPort):
             doc["_src"] = "exact"
         return doc
 
+    @traced("mongo.find_by_nies", attrs=lambda self, nies, *a, **k: {"n": len(nies)})
+    @timed("mongo")
+    async def find_by_nies(self, nies: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Bulk exact lookup (satu query `$in`) untuk batch verify.
+        Return dict {nie_normal: doc}; NIE yang tidak ditemukan tidak ada di dict.
+        """
+        keys = sorted({re.sub(r"[^A-Za-z0-9\-.]", "", n or "").upper() for n in (nies or [])} - {""})
+        if not keys:
+            return {}
+        out: Dict[str, Dict[str, Any]] = {}
+        async for doc in self.coll.find({"nie": {"$in": keys}}):
+            doc["_score"] = 1.0
+            doc["_src"] = "exact"
+            out[str(doc.get("nie"))] = doc
+        return out
+
     # ──────────────────────────────────────────────────────────────
     #  Lexical search (Atlas Search → fallback regex)
     # ──────────────────────────────────────────────────────────────
+    @traced("mongo.search_lexical", attrs=lambda self, q, *a, **k: {"query": q, "limit": k.get("limit", a[0] if a else 25)})
+    @timed("mongo")
     async def search_lexical(self, q: str, limit: int = 25, atlas_index: Optional[str] = ATLAS_INDEX) -> List[Dict[str, Any]]:
         """
         Jika ATLAS_SEARCH_INDEX diset → gunakan $search (BM25).
@@ -179,6 +207,8 @@ class MongoVerificationRepo(RepoPort):
     # ──────────────────────────────────────────────────────────────
     #  Bulk get by FAISS integer IDs
     # ──────────────────────────────────────────────────────────────
+    @traced("mongo.get_by_int_ids", attrs=lambda self, ids, *a, **k: {"n": len(ids)})
+    @timed("mongo")
     async def get_by_int_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
         """
         Ambil dokumen berdasarkan daftar ID numerik untuk mapping hasil FAISS.
@@ -213,10 +243,29 @@ class MongoVerificationRepo(RepoPort):
     #  Logging (tetap dari versi sebelumnya)
     # ──────────────────────────────────────────────────────────────
     async def save_lookup(self, nie: str, status: str) -> None:
-        await self.db.lookups.insert_one(
-            {
-                "nie": nie,
-                "status": status,
-                "ts": dt.datetime.utcnow(),
-            }
-        )
\ No newline at end of file
+        doc = {
+            "nie": nie,
+            "status": status,
+            "ts": dt.datetime.utcnow(),  # waktu request, bukan waktu flush
+        }
+        if self.lookup_writer is not None:
+            await self.lookup_writer.submit(doc)
+            return
+        await self.db.lookups.insert_one(doc)
+
+    @traced("mongo.insert_lookups", attrs=lambda self, docs, *a, **k: {"n": len(docs)})
+    @timed("mongo")
+    async def _insert_lookups(self, docs: List[Dict[str, Any]]) -> None:
+        await self.db.lookups.insert_many(docs, ordered=False)
+
+    @traced("mongo.save_lookups", attrs=lambda self, rows, *a, **k: {"n": len(rows)})
+    @timed("mongo")
+    async def save_lookups(self, rows: List[tuple]) -> None:
+        """Bulk log (nie, status) → satu insert_many (dipakai batch verify)."""
+        if not rows:
+            return
+        now = dt.datetime.utcnow()
+        await self.db.lookups.insert_many(
+            [{"nie": nie, "status": status, "ts": now} for nie, status in rows],
+            ordered=False,
+        )
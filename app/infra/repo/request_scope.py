@@ -0,0 +1,136 @@
+# app/infra/repo/request_scope.py
+from __future__ import annotations
+
+import re
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.domain.ports import RepoPort
+
+
+class RepoCallScope:
+    """
+    Unit-of-work per request: memo hasil read repo (termasuk yang masih in-flight)
+    + counter panggilan total vs yang dihemat.
+    """
+
+    def __init__(self) -> None:
+        self.memo: Dict[Tuple[str, Any], asyncio.Future] = {}
+        self.calls: Counter = Counter()
+        self.saved: Counter = Counter()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": sum(self.calls.values()),
+            "saved": sum(self.saved.values()),
+            "by_method": {m: {"calls": self.calls[m], "saved": self.saved[m]} for m in self.calls},
+        }
+
+
+_scope: ContextVar[Optional[RepoCallScope]] = ContextVar("repo_call_scope", default=None)
+
+_DEFAULT = object()  # sentinel: pakai default atlas_index milik repo asli
+
+# Akumulasi lintas request (dibaca oleh metrics/log)
+TOTALS: Counter = Counter()
+
+
+@contextmanager
+def request_scope() -> Iterator[RepoCallScope]:
+    """Aktifkan memo repo untuk blok ini (dipakai middleware per request)."""
+    scope = RepoCallScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        TOTALS["calls"] += sum(scope.calls.values())
+        TOTALS["saved"] += sum(scope.saved.values())
+
+
+def current_scope() -> Optional[RepoCallScope]:
+    return _scope.get()
+
+
+def _copy(res: Any) -> Any:
+    # Caller (router) memutasi `_score`/`_src` → setiap pemanggil dapat salinan dangkal
+    if isinstance(res, dict):
+        return dict(res)
+    if isinstance(res, list):
+        return [dict(d) if isinstance(d, dict) else d for d in res]
+    return res
+
+
+class MemoizingRepo(RepoPort):
+    """
+    Wrapper RepoPort yang meng-collapse lookup identik dalam satu request
+    (mis. find_by_nie dari evidence exact + SearchRouter untuk NIE yang sama).
+
+    - Di luar request_scope() → passthrough murni.
+    - Write (save_lookup/save_lookups/ensure_indexes) tidak pernah di-memo.
+    - Atribut lain (coll, db, client) diteruskan ke repo asli.
+    """
+
+    def __init__(self, inner: RepoPort):
+        self.inner = inner
+
+    def __getattr__(self, name: str):
+        return getattr(self.inner, name)
+
+    async def _memo(self, method: str, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        scope = _scope.get()
+        if scope is None:
+            return await factory()
+        scope.calls[method] += 1
+        k = (method, key)
+        fut = scope.memo.get(k)
+        if fut is None:
+            fut = asyncio.ensure_future(factory())
+            scope.memo[k] = fut
+        else:
+            scope.saved[method] += 1
+        try:
+            # shield: caller yang kena deadline tidak membatalkan lookup milik caller lain
+            res = await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            scope.memo.pop(k, None)
+            raise
+        return _copy(res)
+
+    # ── Read (memo) ───────────────────────────────────────────────
+    async def find_by_nie(self, nie: str) -> Optional[Dict[str, Any]]:
+        key = re.sub(r"[^A-Za-z0-9\-.]", "", nie or "").upper()
+        return await self._memo("find_by_nie", key, lambda: self.inner.find_by_nie(nie))
+
+    async def find_by_nies(self, nies: List[str]) -> Dict[str, Dict[str, Any]]:
+        key = tuple(sorted(set(nies or [])))
+        res = await self._memo("find_by_nies", key, lambda: self.inner.find_by_nies(nies))
+        return {k: dict(v) for k, v in (res or {}).items()}
+
+    async def search_lexical(self, q: str, limit: int = 25, atlas_index: Any = _DEFAULT) -> List[Dict[str, Any]]:
+        kwargs = {"limit": limit} if atlas_index is _DEFAULT else {"limit": limit, "atlas_index": atlas_index}
+        return await self._memo(
+            "search_lexical", ((q or "").strip(), limit, atlas_index),
+            lambda: self.inner.search_lexical(q, **kwargs),
+        )
+
+    async def get_by_int_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        return await self._memo(
+            "get_by_int_ids", tuple(sorted(int(i) for i in ids or [])),
+            lambda: self.inner.get_by_int_ids(ids),
+        )
+
+    # ── Write / admin (passthrough) ───────────────────────────────
+    async def ensure_indexes(self) -> None:
+        await self.inner.ensure_indexes()
+
+    async def save_lookup(self, nie: str, status: str) -> None:
+        await self.inner.save_lookup(nie, status)
+
+    async def save_lookups(self, rows: List[Tuple[str, str]]) -> None:
+        await self.inner.save_lookups(rows)
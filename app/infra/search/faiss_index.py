@@ -10,7 +10,11 @@ try:
 except ImportError as e:
     raise RuntimeError("Install dulu: pip install faiss-cpu") from e
 
+from app.infra.search.vector_store import Float16VectorStore
+
 _EMBED_DIM = int(os.getenv("EMBED_DIM", "1536"))
+# Dimensi vektor query dari OpenAIEmbedder (0 = dimensi penuh model = EMBED_DIM)
+_EMBED_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "0"))
 _FAISS_PATH = os.getenv("FAISS_PATH", "data/faiss/products.index")
 _IDS_PATH   = os.getenv("FAISS_IDS_PATH", "data/faiss/ids.npy")  # legacy optional
 
@@ -20,10 +24,34 @@ _PQ_M       = int(os.getenv("FAISS_PQ_M", "16"))
 _VERBOSE    = os.getenv("FAISS_VERBOSE", "0") == "1"
 _FORCE_FLAT = os.getenv("FAISS_FORCE_FLAT", "0") == "1"
 
+# Mode penyimpanan kompresi: "ivfpq" (default lama) | "opq_ivfpq" | "sq8"
+_STORAGE    = os.getenv("FAISS_STORAGE", "ivfpq").lower()
+# Refine: re-rank kandidat coarse dengan vektor float16 (memmap) → jarak L2 exact
+_REFINE     = os.getenv("FAISS_REFINE", "0") == "1"
+_REFINE_K   = int(os.getenv("FAISS_REFINE_K_FACTOR", "4"))
+# Reduksi dimensi via PCA (dipelajari saat build, disimpan di file index); 0 = off.
+# Alternatif: truncation native Matryoshka → set EMBED_DIMENSIONS=EMBED_DIM=256/512 (lihat OpenAIEmbedder).
+_PCA_DIM    = int(os.getenv("FAISS_PCA_DIM", "0"))
+
 def _dbg(msg: str):
     if _VERBOSE:
         print(f"[faiss] {msg}")
 
+def _check_dims(index_dim: int | None = None, path: str = _FAISS_PATH) -> None:
+    """Fail fast bila dimensi query (EMBED_DIMENSIONS/EMBED_DIM) tidak cocok dengan index."""
+    qdim = _EMBED_DIMENSIONS or _EMBED_DIM
+    if _EMBED_DIMENSIONS and _EMBED_DIMENSIONS != _EMBED_DIM:
+        raise RuntimeError(
+            f"EMBED_DIMENSIONS={_EMBED_DIMENSIONS} tidak sama dengan EMBED_DIM={_EMBED_DIM}; "
+            "samakan keduanya (index baru dibangun dengan EMBED_DIM)."
+        )
+    if index_dim is not None and index_dim != qdim:
+        raise RuntimeError(
+            f"Index FAISS {path} berdimensi {index_dim}, sedangkan embedding query berdimensi {qdim} "
+            f"(EMBED_DIMENSIONS={_EMBED_DIMENSIONS}, EMBED_DIM={_EMBED_DIM}); "
+            "set env sesuai index atau build ulang index."
+        )
+
 def _adaptive_nlist(n_train: int) -> int:
     if n_train <= 0:
         return 16
@@ -38,10 +66,63 @@ def _inner_index(obj: faiss.Index) -> faiss.Index:
         return inner
     return base
 
+def _unwrap(obj: faiss.Index) -> Tuple[faiss.Index, list]:
+    """Kupas IDMap2 + rantai PreTransform (PCA/OPQ) → (index daun, daftar transform)."""
+    inner = _inner_index(obj)
+    transforms = []
+    while isinstance(inner, faiss.IndexPreTransform):
+        for i in range(inner.chain.size()):
+            transforms.append(faiss.downcast_VectorTransform(inner.chain.at(i)))
+        inner = faiss.downcast_index(inner.index)
+    return inner, transforms
+
+def _ivf_of(obj: faiss.Index):
+    """IVF di balik IDMap2/PreTransform(PCA/OPQ), atau None bila bukan IVF."""
+    leaf, _ = _unwrap(obj)
+    return leaf if isinstance(leaf, faiss.IndexIVF) else None
+
+def _mode_of(obj: faiss.Index) -> str | None:
+    leaf, transforms = _unwrap(obj)
+    if isinstance(leaf, faiss.IndexIVFPQ):
+        return "opq_ivfpq" if any(isinstance(t, faiss.OPQMatrix) for t in transforms) else "ivfpq"
+    if isinstance(leaf, faiss.IndexIVFScalarQuantizer):
+        return "sq8"
+    if isinstance(leaf, faiss.IndexFlatL2):
+        return "flat"
+    return None
+
+def make_compressed_index(storage: str, nlist: int, dim: int = _EMBED_DIM, pq_m: int = _PQ_M,
+                          pca_dim: int = _PCA_DIM) -> faiss.Index:
+    """
+    Factory index terkompresi (dibungkus IDMap2):
+      - ivfpq     : IVF + PQ(m, 8 bit)            → m byte/vektor
+      - opq_ivfpq : OPQ rotation + IVF + PQ       → m byte/vektor, recall lebih baik
+      - sq8       : IVF + scalar quantizer 8 bit  → dim byte/vektor
+      - flat      : tanpa kompresi                → 4*dim byte/vektor
+    pca_dim (0 < pca_dim < dim): PCAMatrix dipelajari saat train() dan ikut tersimpan
+    di file index (PreTransform) → query tetap dikirim dalam dimensi asli.
+    """
+    work = pca_dim if 0 < pca_dim < dim else dim
+    quantizer = faiss.IndexFlatL2(work)
+    if storage == "flat":
+        base = quantizer
+    elif storage == "sq8":
+        base = faiss.IndexIVFScalarQuantizer(quantizer, work, nlist, faiss.ScalarQuantizer.QT_8bit)
+    elif storage == "opq_ivfpq":
+        ivf = faiss.IndexIVFPQ(quantizer, work, nlist, pq_m, 8)
+        base = faiss.IndexPreTransform(faiss.OPQMatrix(work, pq_m), ivf)
+    else:
+        base = faiss.IndexIVFPQ(quantizer, work, nlist, pq_m, 8)
+    if work != dim:
+        base = faiss.IndexPreTransform(faiss.PCAMatrix(dim, work, 0.0, False), base)
+    return faiss.IndexIDMap2(base)
+
 class FaissVectorIndex:
     """
     Index dengan IDMap2:
-      - IVFPQ bila sample cukup; FLAT jika kecil/FAISS_FORCE_FLAT=1.
+      - IVFPQ / OPQ+IVFPQ / IVF-SQ8 (FAISS_STORAGE) bila sample cukup; FLAT jika kecil/FAISS_FORCE_FLAT=1.
+      - FAISS_REFINE=1: ambil k*FAISS_REFINE_K_FACTOR kandidat coarse lalu re-rank dengan
+        vektor float16 memmap (Float16VectorStore) → jarak L2 exact.
       - add() memastikan trained dulu (auto-train atau fallback FLAT).
       - tidak pernah akses .nlist tanpa cek tipe.
 
@@ -49,16 +130,18 @@ class FaissVectorIndex:
       Nilai D (distance) yang dikembalikan .search() perlu dipetakan ke skor kesamaan
       di layer atas (router) sebelum dipakai confidence aggregator.
     """
-    def __init__(self):
+    def __init__(self, *, storage: str = _STORAGE, refine: bool = _REFINE,
+                 vec_store: Float16VectorStore | None = None):
         self.index: faiss.Index | None = None
-        self.mode: str | None = None   # "ivfpq" | "flat"
+        self.mode: str | None = None   # "ivfpq" | "opq_ivfpq" | "sq8" | "flat"
         self.ids = None
         self._loaded = False
+        self.storage = storage
+        self.refine = refine
+        self.vec_store = vec_store or (Float16VectorStore() if refine else None)
 
     def _make_ivfpq(self, nlist: int) -> faiss.Index:
-        quantizer = faiss.IndexFlatL2(_EMBED_DIM)
-        base = faiss.IndexIVFPQ(quantizer, _EMBED_DIM, nlist, _PQ_M, 8)
-        return faiss.IndexIDMap2(base)
+        return make_compressed_index(self.storage, nlist)
 
     def _make_flat(self) -> faiss.Index:
         return faiss.IndexIDMap2(faiss.IndexFlatL2(_EMBED_DIM))
@@ -67,22 +150,24 @@ class FaissVectorIndex:
         p = Path(_FAISS_PATH)
         if p.exists():
             self.index = faiss.read_index(str(p))
-            inner = _inner_index(self.index)
-            if isinstance(inner, faiss.IndexIVFPQ):
-                self.mode = "ivfpq"
-                inner.nprobe = _NPROBE
-            elif isinstance(inner, faiss.IndexFlatL2):
-                self.mode = "flat"
-            else:
+            _check_dims(int(self.index.d), str(p))
+            self.mode = _mode_of(self.index)
+            ivf = _ivf_of(self.index)
+            if ivf is not None:
+                ivf.nprobe = _NPROBE
+            elif self.mode != "flat":
                 self.index = self._make_flat()
                 self.mode = "flat"
             self._loaded = True
+            if self.vec_store is not None and not self.vec_store.load():
+                _dbg("refine enabled but vector store missing → coarse only")
             _dbg(f"loaded mode={self.mode}, ntotal={self.index.ntotal}")
             try:
                 self.ids = np.load(_IDS_PATH)
             except Exception:
                 self.ids = np.empty((0,), dtype=np.int64)
         else:
+            _check_dims()
             p.parent.mkdir(parents=True, exist_ok=True)
             self.index = None
             self.mode = None
@@ -112,12 +197,13 @@ class FaissVectorIndex:
             _dbg(f"train(): n_train={n_train} < 256 → FLAT"); return
 
         nlist = _adaptive_nlist(n_train)
-        self.index = self._make_ivfpq(nlist); self.mode = "ivfpq"
+        self.index = self._make_ivfpq(nlist); self.mode = _mode_of(self.index)
         inner = _inner_index(self.index)
-        if isinstance(inner, faiss.IndexIVFPQ):
-            _dbg(f"train(): IVFPQ nlist={inner.nlist}, n_train={n_train}")
-            inner.train(vectors)
-            inner.nprobe = _NPROBE
+        ivf = _ivf_of(self.index)
+        if ivf is not None:
+            _dbg(f"train(): {self.mode} nlist={ivf.nlist}, n_train={n_train}")
+            inner.train(vectors)  # PreTransform: latih OPQ + IVF sekaligus
+            ivf.nprobe = _NPROBE
         else:
             _dbg("train(): inner not IVFPQ → switch to FLAT")
             self.index = self._make_flat(); self.mode = "flat"
@@ -138,6 +224,8 @@ class FaissVectorIndex:
                 self.index = self._make_flat(); self.mode = "flat"
 
         self.index.add_with_ids(vectors, ids)
+        if self.vec_store is not None:
+            self.vec_store.add(vectors, ids)
         if self.ids is not None and self.ids.size:
             self.ids = np.concatenate([self.ids, ids])
         else:
@@ -147,13 +235,33 @@ class FaissVectorIndex:
     def search(self, query_vec: np.ndarray, k: int = 25) -> List[Tuple[int, float]]:
         if self.index is None or self.index.ntotal == 0:
             return []
-        D, I = self.index.search(query_vec.reshape(1, -1), k)
-        return [(int(i), float(d)) for i, d in zip(I[0], D[0]) if int(i) != -1]
+        q = query_vec.reshape(1, -1).astype(np.float32, copy=False)
+        use_refine = self.vec_store is not None and self.vec_store.loaded
+        k_coarse = k * max(1, _REFINE_K) if use_refine else k
+        D, I = self.index.search(q, k_coarse)
+        coarse = [(int(i), float(d)) for i, d in zip(I[0], D[0]) if int(i) != -1]
+        if not use_refine or not coarse:
+            return coarse[:k]
+        return self._refine(q[0], coarse, k)
+
+    def _refine(self, q: np.ndarray, coarse: List[Tuple[int, float]], k: int) -> List[Tuple[int, float]]:
+        """Re-rank kandidat coarse dengan L2 exact terhadap vektor float16 (memmap)."""
+        mat, found = self.vec_store.get([i for i, _ in coarse])
+        if not found:
+            return coarse[:k]
+        d2 = ((mat - q) ** 2).sum(axis=1)
+        exact = {i: float(d) for i, d in zip(found, d2)}
+        # kandidat tanpa vektor asli tetap ikut dengan jarak coarse
+        merged = [(i, exact.get(i, d)) for i, d in coarse]
+        merged.sort(key=lambda x: x[1])
+        return merged[:k]
 
     def persist(self):
         if self.index is None:
             return
         faiss.write_index(self.index, _FAISS_PATH)
+        if self.vec_store is not None:
+            self.vec_store.persist()
         try:
             if self.ids is not None:
                 np.save(_IDS_PATH, self.ids)
@@ -0,0 +1,243 @@
+# app/infra/search/nie_registry.py
+from __future__ import annotations
+
+import os
+import re
+import math
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+log = logging.getLogger("medverify.nie_registry")
+
+_ENABLE        = os.getenv("NIE_REGISTRY_ENABLE", "1") == "1"
+_BLOOM_FP_RATE = float(os.getenv("NIE_BLOOM_FP_RATE", "0.001"))
+_REFRESH_SEC   = int(os.getenv("NIE_REGISTRY_REFRESH_SEC", "300"))
+_RESUB_SEC     = float(os.getenv("NIE_REGISTRY_RESUBSCRIBE_SEC", "5"))
+_RETRY_SEC     = int(os.getenv("NIE_REGISTRY_RETRY_SEC", "30"))   # interval selama belum pernah ter-load
+
+# Crawler (crawler/ingest.py) PUBLISH NIE tiap produk baru/berubah ke channel ini
+NIE_ADDED_CHANNEL = "catalog:nie_added"
+
+_NON_NIE = re.compile(r"[^A-Za-z0-9\-.]")
+
+
+def normalize_nie(nie: Optional[str]) -> str:
+    """Normalisasi yang sama persis dengan MongoVerificationRepo.find_by_nie."""
+    return _NON_NIE.sub("", nie or "").upper()
+
+
+class BloomFilter:
+    """
+    Bloom filter sederhana (bytearray + double hashing dari blake2b).
+    - might_contain() False → PASTI tidak ada
+    - might_contain() True  → mungkin ada (false-positive ≈ fp_rate)
+    Bit array bisa di-snapshot ke bytes (to_bytes/from_bytes) untuk dibagi antar worker.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = _BLOOM_FP_RATE):
+        capacity = max(1, int(capacity))
+        fp_rate = min(0.5, max(1e-9, float(fp_rate)))
+        m = int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.m = max(8, m)
+        self.k = max(1, int(round((self.m / capacity) * math.log(2))))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        h = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], "little")
+        h2 = int.from_bytes(h[8:], "little") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def might_contain(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, *, m: int, k: int) -> "BloomFilter":
+        bf = cls.__new__(cls)
+        bf.m, bf.k = int(m), int(k)
+        bf.bits = bytearray(data)
+        bf.count = 0
+        return bf
+
+
+class NieRegistry:
+    """
+    Registry NIE in-process untuk jawaban "pasti tidak terdaftar" tanpa round-trip Mongo.
+
+    - `bloom`  : Bloom filter NIE ternormalisasi (≈1.8 byte/NIE pada fp 0.001); might_contain()
+                 False → pasti tidak ada, True → mungkin ada (caller tetap cek Mongo)
+    - load()   : full load dari koleksi `products` saat startup (bloom dibangun ulang)
+    - refresh(): incremental berdasarkan watermark `last_seen` (ISO string dari crawler)
+    - live     : subscriber Redis `catalog:nie_added` → NIE hasil crawl langsung di-add()
+
+    "Absent" hanya dipercaya bila registry sudah ter-load DAN (tanpa client Redis) atau
+    subscriber sedang tersambung; saat subscriber putus NIE di luar registry bisa saja baru
+    di-crawl setelah watermark → semua dianggap "mungkin ada" (fallback ke Mongo).
+    """
+
+    def __init__(self, fp_rate: float = _BLOOM_FP_RATE, client=None):
+        self.fp_rate = fp_rate
+        self.r = client
+        self.bloom: Optional[BloomFilter] = None
+        self.loaded = False
+        self.live = False
+        self.watermark: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.stats: Dict[str, int] = {"checks": 0, "absent": 0, "live_added": 0, "not_live": 0}
+
+    # ──────────────────────────────────────────────────────────────
+    #  Membership
+    # ──────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return self.bloom.count if self.bloom is not None else 0
+
+    def __contains__(self, nie: str) -> bool:
+        key = normalize_nie(nie)
+        return bool(key) and self.bloom is not None and self.bloom.might_contain(key)
+
+    def add(self, nie: Optional[str]) -> bool:
+        """Tambah NIE; True bila sebelumnya belum (mungkin) ada."""
+        key = normalize_nie(nie)
+        if not key or self.bloom is None or self.bloom.might_contain(key):
+            return False
+        self.bloom.add(key)
+        return True
+
+    def definitely_absent(self, nie: Optional[str]) -> bool:
+        """True hanya jika registry ter-load, sinkron (live), dan NIE pasti tidak ada di katalog."""
+        if not self.loaded or self.bloom is None:
+            return False
+        key = normalize_nie(nie)
+        if not key:
+            return False
+        self.stats["checks"] += 1
+        if self.r is not None and not self.live:
+            self.stats["not_live"] += 1
+            return False
+        absent = not self.bloom.might_contain(key)
+        if absent:
+            self.stats["absent"] += 1
+        return absent
+
+    def load_from_iterable(self, nies: Iterable[Optional[str]], watermark: Optional[str] = None) -> None:
+        keys = {k for k in (normalize_nie(n) for n in nies) if k}
+        # Headroom untuk NIE baru dari refresh/live sebelum full load berikutnya
+        bf = BloomFilter(capacity=max(1024, int(len(keys) * 1.25)), fp_rate=self.fp_rate)
+        for key in keys:
+            bf.add(key)
+        self.bloom = bf
+        self.watermark = watermark
+        self.loaded = True
+        self.loaded_at = time.time()
+
+    # ──────────────────────────────────────────────────────────────
+    #  Mongo sync
+    # ──────────────────────────────────────────────────────────────
+    async def load(self, repo) -> int:
+        """Full load `nie` + `last_seen` dari products (proyeksi minimal)."""
+        nies = []
+        watermark: Optional[str] = None
+        cursor = repo.coll.find({"nie": {"$nin": [None, ""]}}, {"nie": 1, "last_seen": 1, "_id": 0})
+        async for doc in cursor:
+            nies.append(doc.get("nie"))
+            ls = doc.get("last_seen")
+            if ls is not None and (watermark is None or str(ls) > watermark):
+                watermark = str(ls)
+        self.load_from_iterable(nies, watermark=watermark)
+        log.info("[nie_registry] loaded n=%d watermark=%s", len(self), self.watermark)
+        return len(self)
+
+    async def refresh(self, repo) -> int:
+        """Tambah NIE baru/ter-update sejak watermark terakhir; full load bila belum pernah."""
+        if not self.loaded or self.watermark is None:
+            return await self.load(repo)
+        added = 0
+        watermark = self.watermark
+        cursor = repo.coll.find(
+            {"last_seen": {"$gt": self.watermark}, "nie": {"$nin": [None, ""]}},
+            {"nie": 1, "last_seen": 1, "_id": 0},
+        )
+        async for doc in cursor:
+            added += self.add(doc.get("nie"))
+            ls = doc.get("last_seen")
+            if ls is not None and str(ls) > watermark:
+                watermark = str(ls)
+        self.watermark = watermark
+        if added:
+            log.info("[nie_registry] refresh added=%d total=%d", added, len(self))
+        return added
+
+    async def run_refresh_loop(self, repo, interval_sec: int = _REFRESH_SEC) -> None:
+        """
+        Loop background (dibatalkan saat shutdown): refresh periodik + subscriber live bila ada Redis.
+        Selama belum ter-load (load awal gagal) refresh() = full load, dicoba tiap _RETRY_SEC.
+        """
+        listener = asyncio.create_task(self.run_listener(repo)) if self.r is not None else None
+        try:
+            while True:
+                await asyncio.sleep(max(1, interval_sec if self.loaded else min(interval_sec, _RETRY_SEC)))
+                try:
+                    await self.refresh(repo)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.warning("[nie_registry] refresh failed: %s", e)
+        finally:
+            if listener is not None:
+                listener.cancel()
+
+    async def run_listener(self, repo) -> None:
+        """
+        Subscribe NIE_ADDED_CHANNEL; tiap (re)subscribe diikuti refresh() untuk menutup celah
+        pesan yang terlewat (antara load/putus dan subscribe). `live` hanya True selama tersambung.
+        """
+        while True:
+            pubsub = self.r.pubsub()
+            try:
+                await pubsub.subscribe(NIE_ADDED_CHANNEL)
+                await self.refresh(repo)
+                self.live = True
+                log.info("[nie_registry] live sync on channel=%s", NIE_ADDED_CHANNEL)
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "message" and self.add(msg.get("data")):
+                        self.stats["live_added"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("[nie_registry] live sync lost: %s", e)
+            finally:
+                self.live = False
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+            await asyncio.sleep(_RESUB_SEC)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": _ENABLE,
+            "loaded": self.loaded,
+            "live": self.live,
+            "size": len(self),
+            "watermark": self.watermark,
+            "bloom_bytes": len(self.bloom.bits) if self.bloom else 0,
+            "bloom_k": self.bloom.k if self.bloom else 0,
+            **self.stats,
+        }
+
+
+def registry_enabled() -> bool:
+    return _ENABLE
@@ -6,6 +6,10 @@ from typing import List, Dict, Any, Tuple, Optional
 from app.infra.repo.mongo_repo import MongoVerificationRepo
 from app.infra.llm.openai_embedder import OpenAIEmbedder
 from app.infra.search.faiss_index import FaissVectorIndex
+from app.infra.search.nie_registry import NieRegistry
+from app.infra.cache.single_flight import SingleFlight
+from app.infra.observability.metrics import stage
+from app.infra.observability.tracing import span, set_attrs
 
 _ATLAS_INDEX = os.getenv("ATLAS_SEARCH_INDEX") if os.getenv("ATLAS_ENABLE", "0") == "1" else None
 _DISABLE_FAISS = os.getenv("DISABLE_FAISS", "0") == "1"   # opsional untuk dev tanpa OpenAI key
@@ -15,6 +19,8 @@ NIE_PAT = re.compile(r"(NA|NB|NC|ND|NE|NR|TR|SD|ML|DBL|DKL|AKL)[A-Z0-9\-\.]{3,}"
 def looks_like_nie(q: str) -> bool:
     return bool(NIE_PAT.search((q or "").strip()))
 
+_WS = re.compile(r"\s+")
+
 def is_noisy(q: str) -> bool:
     q = q or ""
     non_alnum = sum(1 for ch in q if not ch.isalnum() and not ch.isspace())
@@ -28,19 +34,42 @@ class SearchRouter:
     def __init__(self,
                  repo: Optional[MongoVerificationRepo] = None,
                  embedder: Optional[OpenAIEmbedder] = None,
-                 faiss_index: Optional[FaissVectorIndex] = None):
+                 faiss_index: Optional[FaissVectorIndex] = None,
+                 nie_registry: Optional[NieRegistry] = None,
+                 single_flight: Optional[SingleFlight] = None):
         self.repo = repo or MongoVerificationRepo()
         self.embedder = embedder or OpenAIEmbedder()
         self.faiss = faiss_index or FaissVectorIndex()
+        self.nie_registry = nie_registry
+        self.single_flight = single_flight
         self._faiss_loaded = False
 
-    async def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        q = (query or "").strip()
+    async def search(self, query: str, k: int = 5, *, skip_exact: bool = False,
+                     exact_doc: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        skip_exact: exact NIE sudah di-resolve caller (mis. batch `find_by_nies`) → langkah 1
+        tidak query Mongo lagi; `exact_doc` (bila ada) langsung jadi hit exact.
+        """
+        q = _WS.sub(" ", (query or "").strip())
         if not q:
             return []
+        with span("search_router.search", query=q, k=k):
+            if skip_exact and exact_doc:
+                hits = [{**exact_doc, "_score": 0.99, "_src": "exact"}]
+            elif self.single_flight is None:
+                hits = await self._search(q, k, skip_exact=skip_exact)
+            else:
+                # Query identik yang sedang berjalan (mis. banyak user scan produk sama) → satu komputasi
+                hits = await self.single_flight.do(("search", q, k, skip_exact),
+                                                   lambda: self._search(q, k, skip_exact=skip_exact))
+            set_attrs(hits=len(hits), top_src=hits[0].get("_src") if hits else None)
+            return hits
+
+    async def _search(self, q: str, k: int, *, skip_exact: bool = False) -> List[Dict[str, Any]]:
 
-        # 1) Exact by NIE
-        if looks_like_nie(q):
+        # 1) Exact by NIE (registry in-memory: skip Mongo bila pasti tidak terdaftar)
+        if (not skip_exact and looks_like_nie(q)
+                and not (self.nie_registry and self.nie_registry.definitely_absent(q))):
             doc = await self.repo.find_by_nie(q)
             if doc:
                 doc["_score"] = 0.99
@@ -48,7 +77,9 @@ class SearchRouter:
                 return [doc]
 
         # 2) Lexical (Atlas → fallback)
-        lex_hits = await self.repo.search_lexical(q, limit=25, atlas_index=_ATLAS_INDEX)
+        with stage("lexical"), span("search.lexical", query=q, k=25):
+            lex_hits = await self.repo.search_lexical(q, limit=25, atlas_index=_ATLAS_INDEX)
+            set_attrs(hits=len(lex_hits))
         best_lex = (lex_hits[0]["_score"] if lex_hits else 0.0)
         use_faiss = (not _DISABLE_FAISS) and (is_noisy(q) or best_lex < 0.35)
 
@@ -61,7 +92,9 @@ class SearchRouter:
                 self._faiss_loaded = True
             vec = self.embedder.embed_query(q)
             import numpy as np
-            res = self.faiss.search(np.array(vec, dtype=np.float32), k=25)
+            with stage("faiss"), span("search.faiss", k=25):
+                res = self.faiss.search(np.array(vec, dtype=np.float32), k=25)
+                set_attrs(hits=len(res or []))
             if res:
                 ids = [h[0] for h in res]
                 by_ids = await self.repo.get_by_int_ids(ids)  # expects faiss_id mapping
@@ -0,0 +1,187 @@
+# app/infra/search/suggest_index.py
+from __future__ import annotations
+
+import os
+import re
+import time
+import heapq
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.infra.search.nie_registry import normalize_nie
+
+log = logging.getLogger("medverify.suggest")
+
+_ENABLE       = os.getenv("SUGGEST_ENABLE", "1") == "1"
+_REFRESH_SEC  = int(os.getenv("SUGGEST_REFRESH_SEC", "900"))
+_SCAN_LIMIT   = int(os.getenv("SUGGEST_SCAN_LIMIT", "2000"))   # range > ini → pakai memo top-k
+_MEMO_MAX     = int(os.getenv("SUGGEST_MEMO_MAX", "4096"))
+_RETRY_SEC    = int(os.getenv("SUGGEST_RETRY_SEC", "30"))   # interval selama belum pernah ter-load
+_MAX_K        = 20
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_SPACES    = re.compile(r"\s+")
+
+
+def normalize_prefix(s: Optional[str]) -> str:
+    s = (s or "").lower()
+    s = _NON_ALNUM.sub(" ", s)
+    return _SPACES.sub(" ", s).strip()
+
+
+class SuggestIndex:
+    """
+    Index prefix in-memory untuk typeahead (/v1/suggest), tanpa Mongo/OpenAI per keystroke.
+
+    Struktur (ringkas & cache-friendly, bukan trie berbasis dict):
+      - `_keys`    : list string ternormalisasi, TERURUT → prefix = range via bisect
+      - `_key_ref` : indeks entry paralel dengan `_keys`
+      - `_entries` : list (nie, name, brand) unik per produk
+      - `_pop`     : popularitas per entry (jumlah lookup dari koleksi `lookups`)
+
+    Key per produk: nama lengkap, brand, NIE, dan setiap sufiks kata dari nama
+    (agar "paracetamol" menemukan "PANADOL PARACETAMOL").
+    Range prefix yang besar (mis. 1 huruf) di-memo top-k-nya; memo di-reset saat rebuild.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._key_ref: List[int] = []
+        self._entries: List[Tuple[Optional[str], Optional[str], Optional[str]]] = []
+        self._pop: List[int] = []
+        self._by_nie: Dict[str, int] = {}
+        self._memo: Dict[str, List[int]] = {}
+        self.loaded = False
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ──────────────────────────────────────────────────────────────
+    #  Build
+    # ──────────────────────────────────────────────────────────────
+    def build(self, products: List[Dict[str, Any]], popularity: Optional[Dict[str, int]] = None) -> None:
+        popularity = {normalize_nie(n): c for n, c in (popularity or {}).items()}
+        entries: List[Tuple[Optional[str], Optional[str], Optional[str]]] = []
+        pop: List[int] = []
+        pairs: List[Tuple[str, int]] = []
+        seen: set = set()
+
+        for d in products:
+            nie = (d.get("nie") or "").strip() or None
+            name = (d.get("name") or "").strip() or None
+            brand = (d.get("brand") or "").strip() or None
+            ident = nie or name
+            if not ident or ident in seen:
+                continue
+            seen.add(ident)
+            idx = len(entries)
+            entries.append((nie, name, brand))
+            pop.append(int(popularity.get(normalize_nie(nie), 0)))
+
+            keys = set()
+            for raw in (name, brand, nie):
+                k = normalize_prefix(raw)
+                if k:
+                    keys.add(k)
+            nk = normalize_prefix(name)
+            if nk:
+                toks = nk.split(" ")
+                for i in range(1, len(toks)):
+                    keys.add(" ".join(toks[i:]))
+            pairs.extend((k, idx) for k in keys)
+
+        pairs.sort()
+        self._keys = [k for k, _ in pairs]
+        self._key_ref = [i for _, i in pairs]
+        self._entries = entries
+        self._pop = pop
+        self._by_nie = {normalize_nie(nie): i for i, (nie, _, _) in enumerate(entries) if nie}
+        self._memo = {}
+        self.loaded = True
+        self.built_at = time.time()
+
+    async def load(self, repo) -> int:
+        """Bangun ulang dari `products` + agregasi popularitas `lookups`."""
+        products = [
+            d async for d in repo.coll.find({}, {"nie": 1, "name": 1, "brand": 1, "_id": 0})
+        ]
+        popularity: Dict[str, int] = {}
+        try:
+            cursor = repo.db.lookups.aggregate([
+                {"$group": {"_id": "$nie", "n": {"$sum": 1}}},
+            ])
+            async for row in cursor:
+                if row.get("_id"):
+                    popularity[str(row["_id"])] = int(row.get("n") or 0)
+        except Exception as e:
+            log.warning("[suggest] popularity aggregate failed: %s", e)
+        self.build(products, popularity)
+        log.info("[suggest] built entries=%d keys=%d", len(self._entries), len(self._keys))
+        return len(self._entries)
+
+    async def run_refresh_loop(self, repo, interval_sec: int = _REFRESH_SEC) -> None:
+        """Rebuild periodik; selama belum ter-load (load awal gagal) dicoba tiap _RETRY_SEC."""
+        while True:
+            await asyncio.sleep(max(1, interval_sec if self.loaded else min(interval_sec, _RETRY_SEC)))
+            try:
+                await self.load(repo)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("[suggest] refresh failed: %s", e)
+
+    # ──────────────────────────────────────────────────────────────
+    #  Query
+    # ──────────────────────────────────────────────────────────────
+    def _range(self, p: str) -> Tuple[int, int]:
+        lo = bisect_left(self._keys, p)
+        hi = bisect_left(self._keys, p + "\uffff", lo)
+        return lo, hi
+
+    def _top_ids(self, p: str, k: int) -> List[int]:
+        lo, hi = self._range(p)
+        if lo >= hi:
+            return []
+        big = (hi - lo) > _SCAN_LIMIT
+        if big and p in self._memo:
+            return self._memo[p][:k]
+        ids = {self._key_ref[i] for i in range(lo, hi)}
+        n = _MAX_K if big else k
+        top = heapq.nlargest(n, ids, key=lambda e: (self._pop[e], -len(self._entries[e][1] or "")))
+        if big and len(self._memo) < _MEMO_MAX:
+            self._memo[p] = top
+        return top[:k]
+
+    def suggest(self, prefix: str, k: int = 10) -> List[Dict[str, Any]]:
+        p = normalize_prefix(prefix)
+        if not p or not self.loaded:
+            return []
+        k = max(1, min(_MAX_K, int(k)))
+        out = []
+        for e in self._top_ids(p, k):
+            nie, name, brand = self._entries[e]
+            out.append({"nie": nie, "name": name, "brand": brand, "popularity": self._pop[e]})
+        return out
+
+    def bump(self, nie: Optional[str], n: int = 1) -> None:
+        """
+        Naikkan popularitas in-process (dipanggil setelah verify) tanpa rebuild.
+        Memo top-k yang bisa berubah urutannya dibuang: yang memuat entry ini, atau yang
+        entry terakhirnya kini kalah populer (entry bisa masuk ke top-k prefix tsb).
+        """
+        i = self._by_nie.get(normalize_nie(nie))
+        if i is None:
+            return
+        self._pop[i] += n
+        pop = self._pop[i]
+        stale = [p for p, top in self._memo.items()
+                 if i in top or (len(top) >= _MAX_K and self._pop[top[-1]] <= pop)]
+        for p in stale:
+            del self._memo[p]
+
+
+def suggest_enabled() -> bool:
+    return _ENABLE
@@ -0,0 +1,89 @@
+# app/infra/search/vector_store.py
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+_VEC_PATH = os.getenv("FAISS_VEC_STORE_PATH", "data/faiss/vectors_f16.npy")
+_VEC_IDS_PATH = os.getenv("FAISS_VEC_IDS_PATH", "data/faiss/vectors_f16.ids.npy")
+
+
+class Float16VectorStore:
+    """
+    Salinan vektor asli (float16) untuk tahap refine/re-rank FAISS.
+
+    - Disimpan sebagai .npy dan dibuka dengan mmap_mode="r" → RAM hanya untuk halaman
+      yang benar-benar disentuh saat re-rank (k * refine_factor baris per query).
+    - `ids` paralel dengan baris matriks dan terurut (persist() menyimpan terurut); id → row
+      via np.searchsorted + cek kesamaan, tanpa dict per vektor (hemat RAM pada jutaan id).
+      File lama yang belum terurut tetap didukung lewat permutasi argsort.
+    - add() menampung batch di memori; persist() menulis ulang file sekali di akhir build.
+    """
+
+    def __init__(self, path: str = _VEC_PATH, ids_path: str = _VEC_IDS_PATH):
+        self.path = Path(path)
+        self.ids_path = Path(ids_path)
+        self.mat: Optional[np.ndarray] = None
+        self.ids: np.ndarray = np.empty((0,), dtype=np.int64)
+        self._sorted_ids: np.ndarray = self.ids
+        self._perm: Optional[np.ndarray] = None  # posisi terurut → row; None bila ids sudah terurut
+        self._pending_vecs: List[np.ndarray] = []
+        self._pending_ids: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0]) + sum(int(x.shape[0]) for x in self._pending_ids)
+
+    @property
+    def loaded(self) -> bool:
+        return self.mat is not None and self.mat.shape[0] > 0
+
+    def load(self) -> bool:
+        if not (self.path.exists() and self.ids_path.exists()):
+            return False
+        self.mat = np.load(str(self.path), mmap_mode="r")
+        self.ids = np.load(str(self.ids_path)).astype(np.int64, copy=False)
+        if self.ids.size > 1 and np.any(self.ids[1:] < self.ids[:-1]):
+            self._perm = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[self._perm]
+        else:
+            self._perm = None
+            self._sorted_ids = self.ids
+        return True
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        self._pending_vecs.append(np.asarray(vectors, dtype=np.float16))
+        self._pending_ids.append(np.asarray(ids, dtype=np.int64))
+
+    def persist(self) -> None:
+        if not self._pending_ids:
+            return
+        parts_v = ([np.asarray(self.mat)] if self.mat is not None else []) + self._pending_vecs
+        parts_i = [self.ids] + self._pending_ids
+        mat = np.vstack(parts_v).astype(np.float16, copy=False)
+        ids = np.concatenate(parts_i).astype(np.int64, copy=False)
+        order = np.argsort(ids, kind="stable")
+        mat, ids = mat[order], ids[order]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.mat = None  # lepas mmap lama sebelum overwrite
+        np.save(str(self.path), mat)
+        np.save(str(self.ids_path), ids)
+        self._pending_vecs.clear(); self._pending_ids.clear()
+        self.load()
+
+    def get(self, ids: List[int]) -> tuple[np.ndarray, List[int]]:
+        """Kembalikan (matrix float32, ids yang ditemukan) untuk daftar id."""
+        q = np.asarray(ids, dtype=np.int64).reshape(-1)
+        n = int(self._sorted_ids.shape[0])
+        if self.mat is None or n == 0 or q.size == 0:
+            return np.empty((0, 0), dtype=np.float32), []
+        pos = np.minimum(np.searchsorted(self._sorted_ids, q), n - 1)
+        hit = self._sorted_ids[pos] == q
+        if not hit.any():
+            return np.empty((0, 0), dtype=np.float32), []
+        rows = pos[hit] if self._perm is None else self._perm[pos[hit]]
+        return np.asarray(self.mat[rows], dtype=np.float32), q[hit].tolist()
+
+    def nbytes(self) -> int:
+        return int(self.mat.nbytes) if self.mat is not None else 0
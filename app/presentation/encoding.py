@@ -0,0 +1,132 @@
+# app/presentation/encoding.py
+"""
+Content negotiation untuk response verify/scan.
+
+- Compact view  : `?view=compact` atau header `Prefer: return=minimal`
+                  → trace ringkas (tanpa payload Mongo; dirujuk lewat product_id), boxes YOLO dibuang.
+- Encoding      : `Accept: application/msgpack` (jika paket msgpack terpasang) atau JSON via orjson.
+- Fast path     : bila salah satu di atas diminta (atau RESPONSE_FASTPATH=1), dict internal langsung
+                  diserialisasi tanpa validasi ulang response_model; key top-level tetap dibatasi ke
+                  field model agar kontrak tidak berubah.
+Tanpa negosiasi → None, endpoint mengembalikan dict seperti biasa (validasi Pydantic + encoder standar).
+`Vary: Accept, Prefer` dipasang di kedua jalur (lewat `response` milik endpoint pada jalur default)
+agar cache/CDN tidak menyajikan representasi yang salah.
+"""
+from __future__ import annotations
+
+import os
+import datetime as dt
+from typing import Any, Callable, Dict, Optional, Type
+
+import orjson
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import msgpack  # type: ignore
+except Exception:
+    msgpack = None  # type: ignore
+
+RESPONSE_FASTPATH = os.getenv("RESPONSE_FASTPATH", "0").lower() in ("1", "true", "yes")
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+VARY = "Accept, Prefer"
+
+# Field produk yang dipertahankan pada compact view (match scan / referensi payload)
+_PRODUCT_SUMMARY = ("_id", "nie", "name", "brand", "manufacturer", "category", "state", "status", "_score", "_src")
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (dt.datetime, dt.date)):
+        return obj.isoformat()
+    if hasattr(obj, "item"):  # numpy scalar
+        return obj.item()
+    if hasattr(obj, "tolist"):  # numpy array
+        return obj.tolist()
+    raise TypeError(f"Type is not serializable: {type(obj)!r}")
+
+
+def wants_compact(request: Request) -> bool:
+    if (request.query_params.get("view") or "").lower() == "compact":
+        return True
+    return "return=minimal" in (request.headers.get("prefer") or "").lower()
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = (request.headers.get("accept") or "").lower()
+    return msgpack is not None and any(t in accept for t in MSGPACK_TYPES)
+
+
+def _summary(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not isinstance(doc, dict):
+        return doc
+    return {k: doc[k] for k in _PRODUCT_SUMMARY if doc.get(k) is not None}
+
+
+def compact_verify(out: Dict[str, Any]) -> Dict[str, Any]:
+    """Trace level ringkasan: payload/debug evidence dibuang, dirujuk lewat product_id."""
+    trace = [
+        {
+            "source": ev.get("source"),
+            "product_id": ev.get("product_id"),
+            "name": ev.get("name"),
+            "match_strength": ev.get("match_strength"),
+            "quality": ev.get("quality"),
+            "recency_factor": ev.get("recency_factor"),
+            "name_confidence": ev.get("name_confidence"),
+            "provider_score": ev.get("provider_score"),
+            "reasons": ev.get("reasons") or [],
+        }
+        for ev in out.get("trace") or []
+    ]
+    return {**out, "trace": trace}
+
+
+def compact_scan(out: Dict[str, Any]) -> Dict[str, Any]:
+    """Tanpa daftar boxes (title_box tetap); produk match hanya field ringkasan."""
+    res = {k: v for k, v in out.items() if k != "boxes"}
+    match = res.get("match")
+    if isinstance(match, dict):
+        res["match"] = {**match, "product": _summary(match.get("product"))}
+    return res
+
+
+def render(
+    request: Request,
+    out: Dict[str, Any],
+    *,
+    model: Optional[Type[BaseModel]] = None,
+    compact: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    response: Optional[Response] = None,
+) -> Optional[Response]:
+    """
+    Response hasil negosiasi, atau None bila klien tidak meminta compact/msgpack (jalur default).
+    response: Response yang di-inject FastAPI ke endpoint → diberi header Vary pada jalur default.
+    """
+    is_compact = compact is not None and wants_compact(request)
+    is_msgpack = wants_msgpack(request)
+    if not (is_compact or is_msgpack or RESPONSE_FASTPATH):
+        if response is not None:
+            response.headers["Vary"] = VARY
+        return None
+
+    body = compact(out) if is_compact else out
+    if model is not None:
+        fields = model.model_fields
+        body = {k: v for k, v in body.items() if k in fields}
+
+    hdrs = dict(headers or {})
+    hdrs["Vary"] = VARY
+    if is_compact:
+        hdrs["X-Response-View"] = "compact"
+    if is_msgpack:
+        content = msgpack.packb(body, default=_default, use_bin_type=True)
+        return Response(content=content, status_code=status_code, media_type="application/msgpack", headers=hdrs)
+    content = orjson.dumps(body, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=hdrs)
@@ -9,6 +9,7 @@ from pydantic import BaseModel, HttpUrl
 from PIL import Image
 
 from app.infra.vision.yolo_detector import YoloDetector
+from app.infra.api.admission import admit
 
 # Router ini TIDAK pakai prefix "/v1" supaya ikut prefix dari parent router.
 router = APIRouter(tags=["detect"])
@@ -25,7 +26,7 @@ class DetectURLReq(BaseModel):
     url: HttpUrl
 
 
-@router.post("/detect", response_model=DetectResult)
+@router.post("/detect", response_model=DetectResult, dependencies=[Depends(admit("detect"))])
 async def detect_image(file: UploadFile = File(...)):
     """
     Upload satu gambar (JPEG/PNG/WebP) → deteksi YOLO → kembalikan JSON ringkas.
@@ -43,7 +44,7 @@ async def detect_image(file: UploadFile = File(...)):
     return DetectResult(ok=True, mode="snapshot", result=res)
 
 
-@router.post("/detect-url", response_model=DetectResult)
+@router.post("/detect-url", response_model=DetectResult, dependencies=[Depends(admit("detect"))])
 async def detect_url(body: DetectURLReq):
     """
     Tarik gambar dari URL (mis. signed URL S3/GCS) → deteksi YOLO → JSON.
@@ -7,16 +7,19 @@ from typing import Union
 
 
 from fastapi import (
-    APIRouter, Depends, UploadFile, File, HTTPException, Form, Body, Header
+    APIRouter, Depends, UploadFile, File, HTTPException, Form, Body, Header, Response
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
 
 from app.infra.api.security import require_api_key
+from app.infra.api.admission import admit, admission_stats, get_limiter, ADMISSION_ENABLE
+from app.presentation.encoding import render, compact_verify, VARY
 
 from app.presentation.schemas import (
-    VerifyRequest,
+    VerifyRequest, BatchVerifyRequest,
     SearchRequest, SearchResponse,
+    SuggestResponse,
     VerificationResponse,
     VerificationPartial
 )
@@ -24,7 +27,7 @@ from app.presentation.schemas import (
 from app.container import (
     get_verify_uc, get_retrieve_use_case,
     get_session_state, get_prompt_service, get_agent_orchestrator,
-    get_scan_use_case,
+    get_scan_use_case, get_suggest_index,
 )
 
 from app.services.agent_orchestrator import AgentOrchestrator
@@ -35,8 +38,8 @@ from app.application.scan_use_case import ScanUseCase
 from app.services.medical_classifier import classify
 
 
-import os, json, time, logging
-from fastapi import Request
+import os, json, time, asyncio, logging
+from fastapi import Request, Query
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -68,55 +71,164 @@ def _resolve_session_id(body: dict | None, x_session_id: str | None) -> str | No
 # Semua endpoint di bawah /v1 dan terlindungi API key
 router = APIRouter(prefix="/v1", dependencies=[Depends(require_api_key)])
 
+async def _save_verification(sess: SessionStateService, sid: str | None, out: dict) -> None:
+    if not sid:
+        logger.info("[verify] no session_id provided; skip saving session")
+        return
+    data = out.get("data", {}) or {}
+    prod = data.get("product", {}) or {}
+    tosave = {
+        "canon": {
+            "name": prod.get("name"),
+            "nie": prod.get("nie"),
+            "manufacturer": prod.get("manufacturer"),
+            # Fakta untuk agent: intent komposisi/"apa itu" dijawab tanpa scout web search
+            "dosage_form": prod.get("dosage_form"),
+            "composition": prod.get("composition"),
+            "source_url": None,
+        },
+        "status_label": data.get("status"),
+        "source_label": data.get("source"),
+        "confidence": out.get("confidence"),
+        "explanation": out.get("explanation"),
+    }
+    await sess.save_verification(sid, tosave)
+    logger.info("[verify] saved verification to session=%s canon=%s nie=%s",
+        sid, prod.get("name"), prod.get("nie"))
+
+
+def _sse(event: str, data) -> str:
+    payload = json.dumps(jsonable_encoder(data, custom_encoder={ObjectId: str}), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
 # ── VERIFY: JSON ONLY ─────────────────────────────────────────────
 @router.post("/verify", response_model=VerificationResponse)
 async def verify_label(
     req: VerifyRequest,
     request: Request,
+    response: Response,
     uc = Depends(get_verify_uc),
     sess: SessionStateService = Depends(get_session_state),
+    suggest = Depends(get_suggest_index),
     session_id_hdr: str | None = Header(None, alias="X-Session-Id"),
+    cache_hdr: str | None = Header(None, alias="X-Verify-Cache"),
 ):
     try:
-        out = await uc.execute(payload=req, image=None)
+        # X-Verify-Cache: bypass → hitung ulang penuh tanpa baca/tulis cache (debug)
+        bypass = (cache_hdr or "").strip().lower() == "bypass"
+        # explain_mode="deferred" → pesan template sekarang, ringkasan LLM via GET /verify/explanation/{request_id}
+        out, cache_status = await uc.execute_cached(req, bypass=bypass, explain=req.explain_mode)
+        response.headers["X-Verify-Cache"] = cache_status
+        if suggest is not None:
+            suggest.bump(((out.get("data") or {}).get("product") or {}).get("nie"))
 
 
         sid_body = req.session_id
         sid = _resolve_session_id(req.model_dump(), session_id_hdr)
         logger.info("[verify] sid header=%s body=%s used=%s ua=%s",
             session_id_hdr, sid_body, sid, request.headers.get("user-agent"))
+        await _save_verification(sess, sid, out)
 
-        if sid:
-            data = out.get("data", {}) or {}
-            prod = data.get("product", {}) or {}
-            tosave = {
-                "canon": {
-                    "name": prod.get("name"),
-                    "nie": prod.get("nie"),
-                    "manufacturer": prod.get("manufacturer"),
-                    "source_url": None,
-                },
-                "status_label": data.get("status"),
-                "source_label": data.get("source"),
-                "confidence": out.get("confidence"),
-                "explanation": out.get("explanation"),
-            }
-            await sess.save_verification(sid, tosave)
-            logger.info("[verify] saved verification to session=%s canon=%s nie=%s",
-                sid, prod.get("name"), prod.get("nie"))
-        else:
-            logger.info("[verify] no session_id provided; skip saving session")
-
-        return out
+        # compact / msgpack / orjson bila dinegosiasikan (tanpa validasi ulang response_model)
+        fast = render(request, out, model=VerificationResponse, compact=compact_verify,
+                      headers={"X-Verify-Cache": cache_status}, response=response)
+        return fast if fast is not None else out
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ── VERIFY: SSE (hasil dulu, ringkasan LLM menyusul) ─────────────
+@router.post("/verify/stream")
+async def verify_label_stream(
+    req: VerifyRequest,
+    uc = Depends(get_verify_uc),
+    sess: SessionStateService = Depends(get_session_state),
+    suggest = Depends(get_suggest_index),
+    session_id_hdr: str | None = Header(None, alias="X-Session-Id"),
+    cache_hdr: str | None = Header(None, alias="X-Verify-Cache"),
+):
+    """
+    text/event-stream:
+      event: result      → response verify lengkap dengan pesan template (tanpa menunggu LLM)
+      event: explanation → {"message": ringkasan LLM}
+      event: done
+    """
+    bypass = (cache_hdr or "").strip().lower() == "bypass"
+    out, cache_status = await uc.execute_cached(req, bypass=bypass, explain="deferred")
+    if suggest is not None:
+        suggest.bump(((out.get("data") or {}).get("product") or {}).get("nie"))
+    await _save_verification(sess, _resolve_session_id(req.model_dump(), session_id_hdr), out)
+
+    async def _events():
+        yield _sse("result", out)
+        message = out.get("message")
+        task = uc.explanation_task(out.get("request_id"))
+        if task is not None:
+            # shield: client putus tidak membatalkan explain (hasilnya tetap masuk cache)
+            message = await asyncio.shield(task)
+        elif out.get("request_id"):
+            found = await uc.get_explanation(out["request_id"]) or {}
+            message = found.get("message") or message
+        yield _sse("explanation", {"request_id": out.get("request_id"), "message": message})
+        yield _sse("done", {"cache": cache_status})
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Verify-Cache": cache_status})
+
+@router.get("/verify/explanation/{request_id}")
+async def verify_explanation(request_id: str, uc = Depends(get_verify_uc)):
+    """Ringkasan LLM untuk response verify mode deferred: pending | ready."""
+    found = await uc.get_explanation(request_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired request_id")
+    return {"request_id": request_id, **found}
+
+# ── VERIFY: BATCH (NDJSON stream) ────────────────────────────────
+@router.post("/verify/batch")
+async def verify_batch(req: BatchVerifyRequest, uc = Depends(get_verify_uc)):
+    """
+    Verifikasi inventaris (ratusan–ribuan item) → application/x-ndjson, satu baris per item.
+    Tanpa LLM explain; NIE di-resolve sekaligus via `$in`; hasil duplikat dihitung sekali.
+    """
+    items = [it.model_dump() for it in req.items]
+
+    async def _lines():
+        async for row in uc.execute_batch(items, include_trace=req.include_trace):
+            yield json.dumps(jsonable_encoder(row, custom_encoder={ObjectId: str}), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+def _scan_incomplete(scan: dict) -> dict:
+    """Payload 200 'butuh foto lebih jelas' saat scan tidak menghasilkan NIE/judul."""
+    return {
+        "reply_kind": "scan_incomplete",
+        "need_more_input": True,
+        "reason": "Tidak ada NIE yang terdeteksi dan teks judul terlalu lemah/kosong.",
+        "suggestions": [
+            "Ambil foto lebih dekat & fokus ke area judul produk.",
+            "Pastikan pencahayaan cukup dan label tidak blur/pantul.",
+            "Pastikan nomor BPOM terlihat utuh (jika ada pada kemasan).",
+            "Coba foto sisi kemasan lain yang memuat nomor registrasi."
+        ],
+        "scan": {
+            "yolo_title_conf": float(scan.get("yolo_title_conf") or 0.0),
+            "regex_skipped": bool(scan.get("regex_skipped") or False),
+            "timings": scan.get("timings", {}) or {},
+            "title_text": scan.get("title_text") or scan.get("title"),
+            "bpom_number": scan.get("bpom_number") or scan.get("nie"),
+        },
+    }
+
+
 # ── VERIFY: MULTIPART (dengan foto) ───────────────────────────────
 @router.post(
     "/verify-photo",
-    response_model=Union[VerificationResponse, VerificationPartial]  # ⬅️ NEW
+    response_model=Union[VerificationResponse, VerificationPartial],  # ⬅️ NEW
+    dependencies=[Depends(admit("scan"))],
 )
 async def verify_label_photo(
+    request: Request,
+    response: Response,
     img: UploadFile = File(...),
     nie: str | None = Form(None),
     text: str | None = Form(None),
@@ -160,28 +272,9 @@ async def verify_label_photo(
 
         # 3b) Jika tidak ada sinyal cukup → JANGAN 400, balas 200 dengan payload partial
         if not eff_nie and (not eff_text or not str(eff_text).strip()):
-            reason = "Tidak ada NIE yang terdeteksi dan teks judul terlalu lemah/kosong."
-            suggestions = [
-                "Ambil foto lebih dekat & fokus ke area judul produk.",
-                "Pastikan pencahayaan cukup dan label tidak blur/pantul.",
-                "Pastikan nomor BPOM terlihat utuh (jika ada pada kemasan).",
-                "Coba foto sisi kemasan lain yang memuat nomor registrasi."
-            ]
-            payload = {
-                "reply_kind": "scan_incomplete",
-                "need_more_input": True,
-                "reason": reason,
-                "suggestions": suggestions,
-                "scan": {
-                    "yolo_title_conf": yolo_conf,
-                    "regex_skipped": regex_skipped,
-                    "timings": timings,
-                    "title_text": title_text,
-                    "bpom_number": bpom_number,
-                },
-            }
+            payload = _scan_incomplete(scan or {})
             # Kembalikan 200 agar klien bisa menampilkan UI “butuh foto lebih jelas”
-            return JSONResponse(status_code=200, content=jsonable_encoder(payload))
+            return JSONResponse(status_code=200, content=jsonable_encoder(payload), headers={"Vary": VARY})
 
         # Penting: reset pointer UploadFile sebelum dipakai downstream (uc.execute)
         try:
@@ -200,23 +293,10 @@ async def verify_label_photo(
 
         # 5) Simpan ke session bila tersedia
         if sid:
-            data = result.get("data", {}) or {}
-            prod = data.get("product", {}) or {}
-            tosave = {
-                "canon": {
-                    "name": prod.get("name"),
-                    "nie": prod.get("nie"),
-                    "manufacturer": prod.get("manufacturer"),
-                    "source_url": None,
-                },
-                "status_label": data.get("status"),
-                "source_label": data.get("source"),
-                "confidence": result.get("confidence"),
-                "explanation": result.get("explanation"),
-            }
-            await sess.save_verification(sid, tosave)
-
-        return result
+            await _save_verification(sess, sid, result)
+
+        fast = render(request, result, model=VerificationResponse, compact=compact_verify, response=response)
+        return fast if fast is not None else result
 
     except HTTPException:
         # Pertahankan error eksplisit lain (misal auth, dsb) apa adanya
@@ -225,6 +305,82 @@ async def verify_label_photo(
         logger.exception("verify-photo failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ── VERIFY: FOTO via SSE (partial → final → decision → explanation) ─
+@router.post("/verify-photo/stream")
+async def verify_label_photo_stream(
+    img: UploadFile = File(...),
+    nie: str | None = Form(None),
+    text: str | None = Form(None),
+    uc = Depends(get_verify_uc),
+    session_id_form: str | None = Form(None),
+    scan_uc: ScanUseCase = Depends(get_scan_use_case),
+    sess: SessionStateService = Depends(get_session_state),
+    session_id_hdr: str | None = Header(None, alias="X-Session-Id"),
+):
+    """
+    text/event-stream, urutan event:
+      scan_partial → judul + kandidat match (≈T1)
+      scan_final   → nomor BPOM hasil OCR(full)+regex (≤T2)
+      decision     → hasil verify (pesan template, tanpa menunggu LLM)
+      explanation  → ringkasan LLM
+      done
+    Jika sinyal scan tidak cukup: scan_incomplete lalu done.
+    """
+    image_bytes = await img.read()
+    sid = _resolve_session_id({"session_id": session_id_form}, session_id_hdr)
+
+    async def _events():
+        # Slot admission "scan" dipegang selama stream (sama seperti /agent/stream)
+        lim = get_limiter("scan") if ADMISSION_ENABLE else None
+        started = None
+        try:
+            if lim is not None:
+                try:
+                    started = await lim.acquire()
+                except HTTPException as e:
+                    yield _sse("error", {"status": e.status_code, "detail": e.detail,
+                                         "retry_after": (e.headers or {}).get("Retry-After")})
+                    return
+
+            scan: dict = {}
+            async for ev in scan_uc.stream_single_shot(image_bytes):
+                scan = ev
+                if ev["stage"] == "partial":
+                    yield _sse("scan_partial", {
+                        k: ev.get(k) for k in ("request_id", "title_text", "title_conf", "match",
+                                               "title_box", "yolo_title_conf", "timings")
+                    })
+                else:
+                    yield _sse("scan_final", {
+                        k: ev.get(k) for k in ("request_id", "bpom_number", "regex_skipped",
+                                               "regex_timed_out", "title_text", "timings")
+                    })
+
+            eff_nie = scan.get("bpom_number") or nie
+            eff_text = scan.get("title_text") or text
+            if not eff_nie and (not eff_text or not str(eff_text).strip()):
+                yield _sse("scan_incomplete", _scan_incomplete(scan))
+                yield _sse("done", {})
+                return
+
+            req = VerifyRequest(nie=eff_nie, text=eff_text)
+            result = await uc.execute(payload=req, image=image_bytes, explain="deferred")
+            yield _sse("decision", result)
+            if sid:
+                await _save_verification(sess, sid, result)
+
+            message = await uc.complete_explanation(result)
+            yield _sse("explanation", {"message": message})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.exception("verify-photo stream failed")
+            yield _sse("error", {"status": 500, "detail": str(e)})
+        finally:
+            if started is not None:
+                lim.release(started)
+
+    return StreamingResponse(_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 # ── SEARCH (use-case async) ───────────────────────────────────────
 @router.post("/search", response_model=SearchResponse)
 async def search_products(req: SearchRequest, uc = Depends(get_retrieve_use_case)):
@@ -234,6 +390,17 @@ async def search_products(req: SearchRequest, uc = Depends(get_retrieve_use_case
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ── SUGGEST (typeahead, in-memory; tanpa Mongo/OpenAI) ────────────
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=128),
+    k: int = Query(8, ge=1, le=20),
+    idx = Depends(get_suggest_index),
+):
+    if idx is None or not idx.loaded:
+        raise HTTPException(status_code=503, detail="Suggest index not ready")
+    return {"query": q, "items": idx.suggest(q, k=k)}
+
 # ── SCAN routes mount ─────────────────────────────────────────────
 from app.presentation.routes import scan as scan_routes
 router.include_router(scan_routes.router, prefix="/scan")
@@ -247,7 +414,7 @@ from app.presentation.endpoints.ws_detect import router as ws_router
 router.include_router(ws_router)
 
 # ── AGENT: Orchestrator ──────────────────────────────────────────
-@router.post("/agent")
+@router.post("/agent", dependencies=[Depends(admit("agent"))])
 async def agent_endpoint(
     request: Request,
     req: dict = Body(...),
@@ -345,6 +512,89 @@ async def agent_endpoint(
         )
         raise HTTPException(500, f"Agent failed: {e}")
 
+# ── AGENT: SSE (token writer pass langsung ke client) ───────────
+@router.post("/agent/stream")
+async def agent_stream_endpoint(
+    request: Request,
+    req: dict = Body(...),
+    sess: SessionStateService = Depends(get_session_state),
+    orchestrator: AgentOrchestrator = Depends(get_agent_orchestrator),
+    session_id_hdr: str | None = Header(None, alias="X-Session-Id"),
+):
+    """
+    text/event-stream, urutan event:
+      delta → {"text": potongan jawaban} (berulang, mulai begitu token pertama writer datang)
+      final → respons seperti /v1/agent tanpa answer penuh diulang: sources, confidence, _debug, dst.
+      done
+    Turn user+assistant disimpan ke sesi setelah stream selesai (client putus → tidak disimpan).
+    Error di tengah stream → event error lalu selesai.
+    """
+    session_id = _resolve_session_id(req, session_id_hdr)
+    user_text = req.get("text")
+    if not session_id:
+        raise HTTPException(400, "Missing session id. Provide body 'session_id' or header 'X-Session-Id'.")
+    if not user_text or not str(user_text).strip():
+        raise HTTPException(400, "Missing 'text' in body")
+
+    ctx = await sess.get_agent_context(session_id) or {}
+    try:
+        await sess.set_last_intent(session_id, classify(user_text, ctx))
+    except Exception:
+        pass
+
+    async def _events():
+        t0 = time.monotonic()
+        ttft_ms = None
+        # Slot admission dipegang selama stream (dependency yield akan lepas sebelum body dikirim)
+        lim = get_limiter("agent") if ADMISSION_ENABLE else None
+        started = None
+        try:
+            if lim is not None:
+                try:
+                    started = await lim.acquire()
+                except HTTPException as e:
+                    yield _sse("error", {"status": e.status_code, "detail": e.detail,
+                                         "retry_after": (e.headers or {}).get("Retry-After")})
+                    return
+
+            out: dict = {}
+            async for kind, data in orchestrator.handle_stream(convo=ctx, user_msg=user_text, context=ctx):
+                if kind == "delta":
+                    if ttft_ms is None:
+                        ttft_ms = int((time.monotonic() - t0) * 1000)
+                    yield _sse("delta", {"text": data})
+                else:
+                    out = data
+            yield _sse("final", {k: v for k, v in out.items() if k != "answer"})
+
+            await sess.append_turn(session_id, "user", user_text)
+            await sess.append_turn(
+                session_id, "assistant", out.get("answer", ""), {"sources": out.get("sources", [])}
+            )
+            yield _sse("done", {})
+
+            agent_logger.info(json.dumps({
+                "event": "agent.reply",
+                "stream": True,
+                "session_id": session_id,
+                "latency_ms": int((time.monotonic() - t0) * 1000),
+                "ttft_ms": ttft_ms,
+                "model": out.get("model"),
+                "sources_count": len(out.get("sources") or []),
+                "user_text_preview": _preview(user_text, 300),
+                "answer_preview": _preview(out.get("answer", ""), 600),
+            }, ensure_ascii=False))
+        except Exception as e:
+            agent_logger.exception("agent.stream_failed session_id=%s latency_ms=%s err=%s",
+                                   session_id, int((time.monotonic() - t0) * 1000), e)
+            yield _sse("error", {"status": 500, "detail": f"Agent failed: {e}"})
+        finally:
+            if started is not None:
+                lim.release(started)
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # ── DEBUG endpoints ───────────────────────────────────────────────
 @router.get("/debug/nie/{nie}")
 async def debug_nie(nie: str, uc = Depends(get_verify_uc)):
@@ -366,6 +616,42 @@ async def debug_nie(nie: str, uc = Depends(get_verify_uc)):
     )
     return JSONResponse(content=content)
 
+@router.get("/debug/cache")
+async def debug_cache():
+    from app.container import get_product_cache, get_response_cache, get_llm_cache, get_single_flight
+    from app.container import get_agent_orchestrator
+    from app.infra.repo.request_scope import TOTALS
+    from app.container import _repo
+    pc, rc, lc, sf = get_product_cache(), get_response_cache(), get_llm_cache(), get_single_flight()
+    writer = getattr(_repo(), "lookup_writer", None)
+    return {
+        "lookup_writer": writer.stats() if writer is not None else None,
+        "product_cache": pc.stats() if pc is not None else None,
+        "verify_cache": rc.stats() if rc is not None else None,
+        "llm_cache": lc.stats() if lc is not None else None,
+        "single_flight": sf.stats() if sf is not None else None,
+        "agent_scout": get_agent_orchestrator().scout_stats(),
+        "repo_scope": dict(TOTALS),
+    }
+
+@router.get("/debug/admission")
+async def debug_admission():
+    """Limit adaptif, inflight, kedalaman antrean, dan jumlah shed per kelas endpoint."""
+    return admission_stats()
+
+@router.get("/debug/loop")
+async def debug_loop(stacks: bool = Query(False)):
+    """Lag event loop + call site yang memblokir (stacks=true → stack terakhir)."""
+    from app.infra.observability.loop_monitor import get_monitor
+    mon = get_monitor()
+    return mon.stats(stacks=stacks) if mon is not None else {"enabled": False}
+
+@router.get("/debug/di")
+async def debug_di():
+    """Overhead resolve provider per request (bandingkan DI_SCOPE=request vs app)."""
+    from app.container import get_provider_stats
+    return get_provider_stats()
+
 @router.get("/debug/verify/{nie}")
 async def debug_verify(nie: str, uc = Depends(get_verify_uc)):
     from app.domain.models.confidence import EvidenceSource
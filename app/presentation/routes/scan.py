@@ -1,7 +1,9 @@
 # app/presentation/routes/scan.py
 from __future__ import annotations
-from fastapi import APIRouter, UploadFile, File, Body, Depends, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, Body, Depends, HTTPException, Form, Request, Response
 from app.presentation.schemas import ScanRequest, ScanResponse
+from app.presentation.encoding import render, compact_scan
+from app.infra.api.admission import admit
 from app.application.scan_use_case import ScanUseCase
 from app.container import get_scan_use_case  # provider we'll add in container
 from uuid import uuid4
@@ -10,8 +12,10 @@ router = APIRouter()
 
 ALLOWED_CT = {"image/jpeg", "image/png", "image/webp"}
 
-@router.post("/photo", response_model=ScanResponse)
+@router.post("/photo", response_model=ScanResponse, dependencies=[Depends(admit("scan"))])
 async def scan_photo(
+    request: Request,
+    response: Response,
     img: UploadFile = File(...),
     return_partial: bool = Form(True),
     uc = Depends(get_scan_use_case),
@@ -21,6 +25,7 @@ async def scan_photo(
         out = await uc.run_single_shot(data, return_partial=return_partial)
         if out is None:
             raise RuntimeError("ScanPipeline returned None")
-        return out
+        fast = render(request, out, model=ScanResponse, compact=compact_scan, response=response)
+        return fast if fast is not None else out
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"scan_photo failed: {e}")
\ No newline at end of file
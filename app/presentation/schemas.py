@@ -8,6 +8,17 @@ class VerifyRequest(BaseModel):
     session_id: Optional[str] = Field(None, description="Session id (if not using header)")
     nie: str | None = Field(None, description="Raw BPOM/NIE code")
     text: str | None = Field(None, description="OCR text (optional)")
+    explain_mode: Optional[Literal["sync", "deferred"]] = Field(
+        None, description="sync: tunggu ringkasan LLM; deferred: pesan template + request_id (default VERIFY_EXPLAIN_MODE)"
+    )
+
+class BatchVerifyItem(BaseModel):
+    nie: str | None = Field(None, description="Raw BPOM/NIE code")
+    text: str | None = Field(None, description="Nama produk / teks label")
+
+class BatchVerifyRequest(BaseModel):
+    items: List[BatchVerifyItem] = Field(..., min_length=1, max_length=5000)
+    include_trace: bool = Field(False, description="Sertakan trace evidence per item (lebih besar)")
 
 class VerificationPayload(BaseModel):
     status: str
@@ -40,6 +51,17 @@ class SearchResponse(BaseModel):
     items: List[SearchItem]
     system_prompt: str
 
+# ── SUGGEST (typeahead) ──────────────────────────────────────────
+class SuggestItem(BaseModel):
+    nie: Optional[str] = None
+    name: Optional[str] = None
+    brand: Optional[str] = None
+    popularity: int = 0
+
+class SuggestResponse(BaseModel):
+    query: str
+    items: List[SuggestItem]
+
 # ── SCAN (photo) ─────────────────────────────────────────────────
 class ScanRequest(BaseModel):
     return_partial: bool = Field(default=True)
@@ -97,6 +119,8 @@ class VerificationResponse(BaseModel):
     explanation: str
     trace: List[EvidenceSchema] = []
     flags: List[str] = []
+    request_id: Optional[str] = None       # mode deferred: ambil ringkasan LLM via /v1/verify/explanation/{id}
+    explain_status: Optional[str] = None   # "pending" bila `message` masih template
 
 
 class VerificationPartial(BaseModel):
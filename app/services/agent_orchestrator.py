@@ -1,16 +1,57 @@
 # app/services/agent_orchestrator.py
 from __future__ import annotations
 import os, json, re
-from typing import Any, Dict, List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from .medical_classifier import classify
+from .medical_classifier import classify, VERIFY_BPOM, WHAT_IS, COMPOSITION
 from .prompt_service import PromptService
 from .guards import Guardrails  # jika dipakai di tempat lain
 from app.infra.llm.openai_adapter import OpenAILlm
-from typing import Any, Dict, List, Tuple
+from app.infra.cache.scout_cache import ScoutCache, scout_subject, scout_topic
+from app.infra.cache.single_flight import SingleFlight
+from collections import Counter
 
 MAX_TURNS = 8 
 
+# Scout pass (web search): auto = hanya bila fakta sesi belum menjawab intent | always | never
+SCOUT_MODE = os.getenv("AGENT_SCOUT_MODE", "auto").lower()
+
+# Intent → field `known` yang cukup untuk menjawab tanpa web search (produk harus sudah terverifikasi)
+_FACT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    VERIFY_BPOM: ("status_label",),
+    COMPOSITION: ("composition",),
+    WHAT_IS: ("composition", "dosage_form"),
+}
+
+# Label verify_bpom juga muncul bila kalimat hanya memuat NIE ("komposisi DBL...") → status sesi
+# hanya menjawab bila yang ditanya memang registrasinya
+_REGISTRATION_Q = re.compile(r"\b(terdaftar|asli|palsu|valid|izin edar|bpom|registrasi|registered)\b", re.I)
+
+_EN_HINTS = re.compile(
+    r"\b(what|how|is it|can i|should|side effects?|dosage|ingredients?|pregnan\w*|the|with|for)\b", re.I
+)
+_ID_HINTS = re.compile(r"\b(apa|apakah|bagaimana|berapa|obat|yang|untuk|dengan|boleh|bisa|ini|itu)\b", re.I)
+
+
+def _lang(text: str) -> str:
+    """Deteksi kasar bahasa pertanyaan (id/en) untuk key cache scout; default id."""
+    t = text or ""
+    return "en" if len(_EN_HINTS.findall(t)) > len(_ID_HINTS.findall(t)) else "id"
+
+
+def _scout_skip_reason(label: str, known: Dict[str, Any], user_msg: str = "") -> Optional[str]:
+    """None → scout perlu jalan; selain itu alasan dilewati."""
+    if SCOUT_MODE == "never":
+        return "disabled"
+    if SCOUT_MODE == "always":
+        return None
+    if label == VERIFY_BPOM and not _REGISTRATION_Q.search(user_msg or ""):
+        return None
+    fields = _FACT_FIELDS.get(label)
+    if fields and (known.get("name") or known.get("nie")) and all(known.get(f) for f in fields):
+        return "known_facts"
+    return None
+
 def _shorten(s: str | None, n: int = 1200) -> str:
     s = (s or "").strip()
     return s if len(s) <= n else s[:n] + "…"
@@ -78,14 +119,84 @@ def _verification_hint(vr: Dict[str, Any]) -> Dict[str, str] | None:
     if canon.get("name"): parts.append(f"Nama: {canon.get('name')}")
     if canon.get("nie"): parts.append(f"NIE: {canon.get('nie')}")
     if canon.get("manufacturer"): parts.append(f"Pabrikan: {canon.get('manufacturer')}")
+    if canon.get("dosage_form"): parts.append(f"Bentuk sediaan: {canon.get('dosage_form')}")
+    if canon.get("composition"): parts.append(f"Komposisi: {canon.get('composition')}")
     if vr.get("status_label"): parts.append(f"Status: {vr.get('status_label')}")
     hint = "Konteks verifikasi aktif — " + "; ".join(parts)
     return {"role": "system", "content": hint}
 
 class AgentOrchestrator:
-    def __init__(self, llm: OpenAILlm, prompts: PromptService | None = None):
+    def __init__(self, llm: OpenAILlm, prompts: PromptService | None = None,
+                 scout_cache: ScoutCache | None = None):
         self.llm = llm
         self.prompts = prompts or PromptService()
+        self.scout_cache = scout_cache
+        # Scout identik (produk+intent+bahasa) yang konkuren → satu web search
+        self._flight = SingleFlight()
+        self.counts: Counter = Counter()
+
+    def scout_stats(self) -> Dict[str, Any]:
+        """Jumlah scout pass per hasil: live | cached | skipped_<alasan>."""
+        total = sum(self.counts.values())
+        return {
+            **dict(self.counts),
+            "llm_calls_saved_ratio": round((total - self.counts["live"]) / total, 4) if total else 0.0,
+            "cache": self.scout_cache.stats() if self.scout_cache is not None else None,
+        }
+
+    async def _scout(self, *, user_msg: str, label: str, known: Dict[str, Any],
+                     history: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, str]], str]:
+        """
+        Scout pass (web search) dengan cache per (NIE/nama produk, intent, bahasa, sub-topik pertanyaan).
+        Return (summary, sources, mode) dengan mode ∈ {"live", "cached"}.
+        """
+        subject = scout_subject(known.get("nie"), known.get("name"))
+        lang = _lang(user_msg)
+        topic = scout_topic(user_msg, known.get("name"))
+        if subject and self.scout_cache is not None:
+            hit = await self.scout_cache.get(subject, label, lang, topic)
+            if hit is not None:
+                return hit.get("summary") or "", hit.get("sources") or [], "cached"
+
+        scout_system = (
+            "Anda adalah Research Scout untuk MedVerify-Agent. "
+            "Tugas Anda menelusuri web dan merangkum temuan relevan secara netral, singkat, dan faktual. "
+            "Jangan beropini; cukup ringkas poin penting dan kumpulkan sumber (URL + judul)."
+        )
+        scout_payload = {
+            "question": user_msg,
+            "topic": label,
+            "known_verification": known,
+            "policy": [
+                "Cari sumber resmi/tepercaya terlebih dahulu (BPOM/pom.go.id, WHO, EMA, FDA).",
+                "JANGAN membuat kesimpulan klinis; cukup ringkas temuan dan catat sumber."
+            ],
+        }
+        web_opts = {"search_context_size": os.getenv("LLM_SEARCH_CTX", "medium")}
+
+        async def _call() -> Dict[str, Any]:
+            out = await self.llm.complete(
+                system=scout_system,
+                user=scout_payload,
+                use_web_search=True,
+                web_opts=web_opts,
+                history=history,
+            )
+            summary = _shorten((out.get("answer") if isinstance(out, dict) else str(out)) or "")
+            raw_sources = (out.get("sources") if isinstance(out, dict) else []) or []
+            res = {"summary": summary, "sources": _rank_sources(raw_sources)[:8],
+                   "model": out.get("model") if isinstance(out, dict) else None}
+            # Fallback offline/dev (atau respons non-dict) tidak di-cache
+            offline = not isinstance(out, dict) or bool((out.get("_debug") or {}).get("offline"))
+            if subject and self.scout_cache is not None and summary and not offline:
+                await self.scout_cache.put(subject, label, lang, res, topic)
+            return res
+
+        if subject:
+            res = await self._flight.do(("scout", subject, label, lang, topic), _call)
+        else:
+            res = await _call()
+        return res["summary"], res["sources"], "live"
 
     def _out_of_scope(self) -> Dict[str, Any]:
         return {
@@ -101,11 +212,15 @@ class AgentOrchestrator:
             "_debug": {"label": "out_of_scope"}
         }
 
-    async def handle(self, convo: Dict[str, Any], user_msg: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _prepare(self, user_msg: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Intent gating + konteks + scout pass. Return {"early": <jawaban final>} bila tidak perlu
+        writer (out of scope), selain itu argumen writer pass + metadata untuk respons akhir.
+        """
         # 0) Intent gating
         label = classify(user_msg or "", context)
         if label in ("non_medical", "out_of_scope"):
-            return self._out_of_scope()
+            return {"early": self._out_of_scope()}
 
         # 1) Kumpulkan konteks verifikasi + riwayat
         vr = (context or {}).get("verification") or {}
@@ -114,6 +229,8 @@ class AgentOrchestrator:
             "name": canon.get("name"),
             "nie": canon.get("nie"),
             "manufacturer": canon.get("manufacturer"),
+            "dosage_form": canon.get("dosage_form"),
+            "composition": canon.get("composition"),
             "status_label": vr.get("status_label"),
             "source_url": canon.get("source_url"),
         }
@@ -133,37 +250,19 @@ class AgentOrchestrator:
         # Seatbelt: bila terlalu umum & tanpa hint medis & tanpa canon → out_of_scope
         MEDICAL_HINTS = r"\b(obat|bpom|nie|komposisi|kandungan|dosis|aturan pakai|efek samping|kontraindikasi|interaksi|kehamilan|menyusui|penyimpanan|peringatan)\b"
         if label == "general_drug_info" and not (known.get("name") or known.get("nie")) and not re.search(MEDICAL_HINTS, user_msg, flags=re.I):
-            return self._out_of_scope()
+            return {"early": self._out_of_scope()}
 
-        # 2) SCOUT PASS — web search (opsional: bawa sedikit history)
-        scout_system = (
-            "Anda adalah Research Scout untuk MedVerify-Agent. "
-            "Tugas Anda menelusuri web dan merangkum temuan relevan secara netral, singkat, dan faktual. "
-            "Jangan beropini; cukup ringkas poin penting dan kumpulkan sumber (URL + judul)."
-        )
-        scout_payload = {
-            "question": user_msg,
-            "known_verification": known,
-            "policy": [
-                "Cari sumber resmi/tepercaya terlebih dahulu (BPOM/pom.go.id, WHO, EMA, FDA).",
-                "JANGAN membuat kesimpulan klinis; cukup ringkas temuan dan catat sumber."
-            ],
-        }
-        web_opts = {"search_context_size": os.getenv("LLM_SEARCH_CTX", "medium")}
-
-        # Untuk scout kita bawa history singkat (2 turn terakhir) agar query lebih kontekstual
-        scout_history = history_for_writer[-2:]
-
-        scout_out = await self.llm.complete(
-            system=scout_system,
-            user=scout_payload,
-            use_web_search=True,
-            web_opts=web_opts,
-            history=scout_history,    # ⬅️ NEW
-        )
-        scout_summary = _shorten((scout_out.get("answer") if isinstance(scout_out, dict) else str(scout_out)) or "")
-        raw_sources = (scout_out.get("sources") if isinstance(scout_out, dict) else []) or []
-        sources = _rank_sources(raw_sources)[:8]
+        # 2) SCOUT PASS — web search, hanya bila fakta sesi belum menjawab intent; hasil di-cache
+        #    per (produk, intent, bahasa) sehingga follow-up tentang produk sama memakai ulang temuan
+        skip = _scout_skip_reason(label, known, user_msg)
+        if skip:
+            scout_summary, sources, scout_mode = "", [], f"skipped_{skip}"
+        else:
+            # Untuk scout kita bawa history singkat (2 turn terakhir) agar query lebih kontekstual
+            scout_summary, sources, scout_mode = await self._scout(
+                user_msg=user_msg, label=label, known=known, history=history_for_writer[-2:],
+            )
+        self.counts[scout_mode] += 1
 
         # 3) WRITER PASS — AI utama interaksi, web hanya referensi
         writer_system = self.prompts.system_prompt() + " Nada: profesional-ramah, empatik, tidak kaku."
@@ -171,11 +270,12 @@ class AgentOrchestrator:
             "question": user_msg,
             "intent": label,
             "known_verification": known,
-            "web_findings": {"summary": scout_summary, "sources": sources},
+            "web_findings": {"summary": scout_summary, "sources": sources} if not skip else None,
             "style": [
                 "Berinteraksilah secara natural (boleh satu follow-up singkat bila perlu).",
                 "Utamakan konteks sesi (produk/NIE) bila tersedia.",
-                "Gunakan temuan web SEBAGAI REFERENSI TAMBAHAN saja.",
+                "Gunakan temuan web SEBAGAI REFERENSI TAMBAHAN saja."
+                if not skip else "Jawab dari known_verification (data BPOM terverifikasi sesi).",
             ],
             "requirements": [
                 "Jawab ringkas (≈80–120 kata) dan jelas.",
@@ -184,27 +284,72 @@ class AgentOrchestrator:
             ],
         }
 
-        writer_out = await self.llm.complete(
-            system=writer_system,
-            user=writer_payload,
-            use_web_search=False,         # AI utama menulis, TANPA browsing
-            history=history_for_writer,   # ⬅️ NEW: bawa history penuh + hint verify
-        )
-
-        answer = (writer_out.get("answer") if isinstance(writer_out, dict) else str(writer_out) or "").strip()
-        confidence = "high" if sources else "medium"
+        return {
+            "system": writer_system,
+            "user": writer_payload,
+            "history": history_for_writer,
+            "sources": sources,
+            "meta": {
+                "label": label,
+                "scout": scout_mode,
+                "confidence": "high" if (sources or skip == "known_facts") else "medium",
+                "has_known": bool(known.get("name") or known.get("nie")),
+            },
+        }
 
+    def _result(self, answer: str, prep: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+        meta = prep["meta"]
         return {
             "reply_kind": "agent",
             "answer": answer,
             "key_facts": [],
-            "sources": sources,
-            "confidence": confidence,
+            "sources": prep["sources"],
+            "confidence": meta["confidence"],
             "facts": [],
+            **({"model": model} if model else {}),
             "_debug": {
-                "label": label,
-                "used_search": True,
-                "has_known": bool(known.get("name") or known.get("nie")),
-                "history_len": len(history_for_writer),
+                "label": meta["label"],
+                "used_search": meta["scout"] == "live",
+                "scout": meta["scout"],
+                "has_known": meta["has_known"],
+                "history_len": len(prep["history"]),
             }
-        }
\ No newline at end of file
+        }
+
+    async def handle(self, convo: Dict[str, Any], user_msg: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        prep = await self._prepare(user_msg, context)
+        if "early" in prep:
+            return prep["early"]
+
+        # 3b) WRITER PASS (non-stream)
+        writer_out = await self.llm.complete(
+            system=prep["system"],
+            user=prep["user"],
+            use_web_search=False,         # AI utama menulis, TANPA browsing
+            history=prep["history"],      # ⬅️ NEW: bawa history penuh + hint verify
+        )
+        answer = (writer_out.get("answer") if isinstance(writer_out, dict) else str(writer_out) or "").strip()
+        return self._result(answer, prep, writer_out.get("model") if isinstance(writer_out, dict) else None)
+
+    async def handle_stream(self, convo: Dict[str, Any], user_msg: str,
+                            context: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Versi streaming handle(): yield ("delta", potongan teks) selama writer pass berjalan,
+        lalu ("final", dict respons seperti handle() dengan answer lengkap).
+        Scout (bila perlu) tetap selesai dulu — writer butuh temuannya sebagai input.
+        """
+        prep = await self._prepare(user_msg, context)
+        if "early" in prep:
+            out = prep["early"]
+            yield "delta", out["answer"]
+            yield "final", out
+            return
+
+        parts: List[str] = []
+        async for delta in self.llm.complete_stream(
+            system=prep["system"], user=prep["user"], history=prep["history"],
+        ):
+            parts.append(delta)
+            yield "delta", delta
+        yield "final", self._result("".join(parts).strip(), prep, getattr(self.llm, "chat_model", None))
+
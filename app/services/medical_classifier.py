@@ -35,7 +35,9 @@ MEDICAL_HINTS = r"\b(obat|bpom|nie|komposisi|kandungan|dosis|aturan pakai|efek s
 
 
 # ==== Regex util ====
-RX_NIE = re.compile(r"\b([A-Z]{1,3}\w{5,12}\w?)\b", re.I)  # longgar; NIE valid disaring downstream
+# Prefiks huruf lalu digit (DBL1234567890A1, MD224510001234, NA18201200123, TR123456789);
+# pola lama `[A-Z]{1,3}\w{5,12}` mencocokkan kata biasa ≥6 huruf ("samping") → semua jadi verify_bpom
+RX_NIE = re.compile(r"\b([A-Z]{1,3}\s?\d{6,13}(?:\s?[A-Z]\d?)?)\b", re.I)  # NIE valid disaring downstream
 
 KEYWORDS = {
     COMPOSITION: [
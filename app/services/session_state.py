@@ -2,6 +2,7 @@
 from datetime import datetime, timezone
 from typing import Literal, Optional, List, Dict, Any
 from app.infra.cache.redis_cache import RedisCache  
+from app.infra.observability.tracing import traced
 
 Role = Literal["user", "assistant", "system"]
 
@@ -10,6 +11,7 @@ class SessionStateService:
         self.rs = store
 
     # ---- Verification (from /verify) ----
+    @traced("session.save_verification")
     async def save_verification(self, session_id: str, verification: dict):
         await self.rs.set_json(f"session:{session_id}:verification", verification)
         await self.rs.hset(f"session:{session_id}:meta", {
@@ -33,6 +35,7 @@ class SessionStateService:
         return (await self.rs.get_json(f"session:{session_id}:agent_facts")) or []
 
     # ---- History (compact) ----
+    @traced("session.append_turn")
     async def append_turn(self, session_id: str, role: Role, content: str, meta: Dict[str, Any] | None = None):
         item = {
             "t": datetime.now(timezone.utc).isoformat(),
@@ -46,6 +49,7 @@ class SessionStateService:
         return await self.rs.lrange_json(f"session:{session_id}:history", 0, n-1)
 
     # ---- Snapshot for Agent context ----
+    @traced("session.get_agent_context")
     async def get_agent_context(self, session_id: str) -> dict:
         turns = await self.get_last_turns(session_id)
         return {
@@ -1,8 +1,61 @@
-import os, datetime as dt
+import os, re, datetime as dt
 from motor.motor_asyncio import AsyncIOMotorClient
+import redis.asyncio as aioredis
 
 DB = AsyncIOMotorClient(os.getenv("MONGO_URI", "mongodb://localhost:27017")).medverify
 
+# Key harus sama dengan app/infra/cache/product_cache.py (prefix + NIE ternormalisasi)
+# dan app/infra/cache/response_cache.py (catalog generation)
+PRODUCT_CACHE_PREFIX = "prod:v1:"
+CATALOG_GEN_KEY = "catalog:gen"
+# Sama dengan app/infra/search/nie_registry.py NIE_ADDED_CHANNEL (registry NIE live di API)
+NIE_ADDED_CHANNEL = "catalog:nie_added"
+_REDIS = None
+# Ada produk berubah sejak bump generation terakhir (bump sekali per halaman/batch crawl)
+_CATALOG_DIRTY = False
+
+
+def _redis():
+    global _REDIS
+    if _REDIS is None:
+        _REDIS = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+    return _REDIS
+
+
+async def invalidate_product_cache(*nies):
+    global _CATALOG_DIRTY
+    keys = [PRODUCT_CACHE_PREFIX + re.sub(r"[^A-Za-z0-9\-.]", "", n).upper() for n in nies if n]
+    # Generation dinaikkan per batch (bump_catalog_generation), bukan per dokumen: INCR per upsert
+    # membuat seluruh cache response /v1/verify yatim terus-menerus selama crawl berjalan
+    _CATALOG_DIRTY = True
+    try:
+        if keys:
+            await _redis().delete(*keys)
+    except Exception as e:
+        print(f"[ingest] product cache invalidate failed {keys}: {e}", flush=True)
+
+async def bump_catalog_generation():
+    """Dipanggil job crawler di akhir tiap halaman/batch: satu INCR bila ada produk berubah."""
+    global _CATALOG_DIRTY
+    if not _CATALOG_DIRTY:
+        return
+    _CATALOG_DIRTY = False
+    try:
+        # Naikkan generation → cache response /v1/verify lama tidak terpakai lagi
+        await _redis().incr(CATALOG_GEN_KEY)
+    except Exception as e:
+        _CATALOG_DIRTY = True
+        print(f"[ingest] catalog generation bump failed: {e}", flush=True)
+
+async def publish_nie_added(nie):
+    # Registry NIE di API langsung add() → NIE baru tidak dilaporkan "pasti tidak terdaftar"
+    if not nie:
+        return
+    try:
+        await _redis().publish(NIE_ADDED_CHANNEL, nie)
+    except Exception as e:
+        print(f"[ingest] publish nie_added failed {nie}: {e}", flush=True)
+
 async def save_raw(url, resp):
     doc = {
         "url": str(url),
@@ -20,4 +73,8 @@ async def upsert_product(prod: dict):
         "$set": {k: v for k, v in prod.items() if k != "first_seen"},
         "$setOnInsert": {"first_seen": dt.datetime.utcnow()},
     }
-    await DB.products.update_one(key, update, upsert=True)
+    res = await DB.products.update_one(key, update, upsert=True)
+    # Dokumen berubah / baru → buang entri cache (termasuk negative cache NIE baru)
+    if res.modified_count or res.upserted_id is not None:
+        await invalidate_product_cache(prod.get("nie"))
+        await publish_nie_added(prod.get("nie"))
@@ -6,7 +6,7 @@ from crawler.cekbpom_client import BASE
 from crawler.cekbpom_json import search_dt_category
 from crawler.cekbpom_parsers import normalize_product
 from crawler.cekbpom_detail import fetch_detail_modal, parse_detail_modal, map_type_code
-from crawler.ingest import save_raw, upsert_product
+from crawler.ingest import save_raw, upsert_product, bump_catalog_generation
 
 def env_flag(name: str, default: bool = False) -> bool:
     v = os.getenv(name)
@@ -113,6 +113,7 @@ async def harvest_category(path: str, category: str, page_size: int, do_enrich:
                 async with sem:
                     await _enrich_one(r, referer_url, i, len(rows), category)
             await asyncio.gather(*(worker(i, r) for i, r in enumerate(rows)))
+        await bump_catalog_generation()
 
         # heuristic stop: kalau halaman kosong berturut-turut, berhenti
         if len(rows) == 0:
@@ -143,6 +144,8 @@ async def main():
             total += got
         except Exception as e:
             print(f"[runner] {cat} failed: {e}", flush=True)
+        finally:
+            await bump_catalog_generation()
     print(f"TOTAL rows inserted/updated (list): {total}", flush=True)
 
 if __name__ == "__main__":
@@ -4,7 +4,7 @@ from typing import List, Dict, Any, Tuple
 
 from crawler.cekbpom_json import search_dt
 from crawler.cekbpom_parsers import normalize_product
-from crawler.ingest import save_raw, upsert_product
+from crawler.ingest import save_raw, upsert_product, bump_catalog_generation
 from crawler.cekbpom_detail import fetch_detail_modal, parse_detail_modal, map_type_code
 from crawler.cekbpom_client import BASE
 
@@ -123,6 +123,7 @@ async def harvest_term(term: str, page_size: int, do_enrich: bool, enrich_conc:
                 async with sem:
                     await _enrich_one(r, term, i, len(rows))
             await asyncio.gather(*(worker(i, r) for i, r in enumerate(rows)))
+        await bump_catalog_generation()
 
         # selesai jika terakhir
         start += page_size
@@ -165,6 +166,8 @@ async def main():
             total += got
         except Exception as e:
             print(f"[runner] seed '{s}' failed: {e}", flush=True)
+        finally:
+            await bump_catalog_generation()
 
     print(f"TOTAL rows (list-upsert, may include duplicates by seed but dedup by NIE in DB): {total}", flush=True)
 
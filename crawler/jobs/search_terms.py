@@ -4,7 +4,7 @@ from types import SimpleNamespace
 
 from crawler.cekbpom_client import fetch, BASE
 from crawler.cekbpom_parsers import parse_list_html, parse_detail_html, normalize_product
-from crawler.ingest import save_raw, upsert_product
+from crawler.ingest import save_raw, upsert_product, bump_catalog_generation
 from crawler.cekbpom_json import search_dt
 from crawler.cekbpom_detail import fetch_detail_modal, parse_detail_modal, map_type_code
 
@@ -216,6 +216,8 @@ async def main():
             total += got
         except Exception:
             traceback.print_exc()
+        finally:
+            await bump_catalog_generation()
     print("TOTAL rows:", total, flush=True)
 
 
@@ -11,6 +11,7 @@ from pathlib import Path
 from fastapi import UploadFile, File, HTTPException
 from fastapi import Response
 import io
+import time
 import uuid
 import logging
 from fastapi import Request
@@ -32,19 +33,12 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 
-# gunakan logger aplikasi sendiri, bukan 'uvicorn.access'
-app_logger = logging.getLogger("medverify.request")
+from app.infra.observability import metrics, tracing
+from app.infra.api.request_context import RequestContextMiddleware
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    app_logger.info(f"➡️ Incoming {request.method} {request.url.path}")
-    try:
-        response = await call_next(request)
-        app_logger.info(f"⬅️ Completed {request.method} {request.url.path} -> {response.status_code}")
-        return response
-    except Exception:
-        app_logger.exception(f"❌ Unhandled error on {request.method} {request.url.path}")
-        raise
+# Satu middleware ASGI murni: request id + root span, label/durasi metrics, memo repo per request,
+# log request. Membungkus `send` → response streaming (SSE) diukur & di-trace sampai selesai.
+app.add_middleware(RequestContextMiddleware)
 
 # ─────────────────────────────────────────────────────────────
 # CORS (atur via env: CORS_ALLOW_ORIGINS="https://foo.com,https://bar.com")
@@ -83,6 +77,14 @@ async def root():
         "ok": True,
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    out = metrics.render_latest()
+    if out is None:
+        raise HTTPException(status_code=503, detail="Metrics nonaktif (METRICS_ENABLE=0 atau prometheus_client tidak terpasang)")
+    body, content_type = out
+    return Response(content=body, media_type=content_type)
+
 @app.get("/healthz")
 async def healthz():
     # Liveness: proses hidup
@@ -131,6 +133,12 @@ async def readyz():
         checks["search_router_error"] = str(e)
         ok = False
 
+    # Product cache hit/miss (sejak proses start)
+    from app.container import get_product_cache
+    pc = get_product_cache()
+    if pc is not None:
+        checks["product_cache"] = pc.stats()
+
     # LLM config (opsional)
     checks["openai_configured"] = bool(os.getenv("OPENAI_API_KEY"))
 
@@ -141,13 +149,28 @@ async def readyz():
 # ─────────────────────────────────────────────────────────────
 @app.on_event("startup")
 async def warmup():
-    # Warm YOLO
-    try:
-        from app.infra.vision.yolo_detector import YoloDetector
-        det = YoloDetector()
-        det.detect(np.zeros((640, 640, 3), dtype="uint8"))
-    except Exception:
-        pass
+    # Graph DI sekali per worker (use case, ScanPipeline/YOLO, OCR, regex) + warm YOLO
+    tracing.setup()
+    # Watchdog lag event loop (deteksi panggilan blocking di handler async)
+    from app.infra.observability.loop_monitor import start_monitor
+    start_monitor()
+    from app import container
+    await container.warm_up()
+    metrics.register_gauges(container.runtime_gauges)
+
+    # Index in-memory (NIE registry, typeahead) + refresh di background
+    import asyncio
+    from app.container import get_nie_registry, get_suggest_index, _repo
+    app.state.bg_tasks = []
+    for name, idx in (("nie_registry", get_nie_registry()), ("suggest", get_suggest_index())):
+        if idx is None:
+            continue
+        try:
+            await idx.load(_repo())
+        except Exception:
+            logging.getLogger(f"medverify.{name}").exception("%s load failed; fallback ke Mongo, retry di background", name)
+        # Loop refresh selalu jalan: bila load awal gagal (Mongo/Redis mati), loop yang mencoba ulang
+        app.state.bg_tasks.append(asyncio.create_task(idx.run_refresh_loop(_repo())))
 
     # Warm OCR (jika bukan tesseract)
     try:
@@ -159,6 +182,19 @@ async def warmup():
         pass
 
 
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in getattr(app.state, "bg_tasks", []):
+        task.cancel()
+    from app.infra.observability.loop_monitor import stop_monitor
+    await stop_monitor()
+
+    # Flush write-behind lookups, tutup Redis/Mongo, kosongkan provider
+    from app import container
+    await container.dispose()
+    tracing.shutdown()
+
+
 @app.get("/ping")
 def ping():
     return {"message": "Server YOLO aktif"}
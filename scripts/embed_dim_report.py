@@ -0,0 +1,106 @@
+# scripts/embed_dim_report.py
+"""
+Perbandingan recall vs dimensi embedding (reduksi dimensi untuk index produk).
+
+Metode:
+  - native : Matryoshka truncation (ambil d komponen pertama lalu L2-normalize) —
+             setara parameter `dimensions` pada text-embedding-3-* (EMBED_DIMENSIONS)
+  - pca    : PCAMatrix dipelajari dari vektor katalog (FAISS_PCA_DIM)
+Ground truth = tetangga exact pada dimensi penuh. Per dimensi dilaporkan recall@k,
+bytes/vektor (flat float32) dan ms/query, untuk index Flat serta mode FAISS_STORAGE.
+
+Contoh:
+  python scripts/embed_dim_report.py --vectors data/faiss/vectors_f16.npy --dims 256,512,1536
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import faiss  # type: ignore
+from app.infra.search.faiss_index import make_compressed_index, _adaptive_nlist, _ivf_of
+from faiss_storage_report import recall_at_k
+
+
+def truncate(x: np.ndarray, d: int) -> np.ndarray:
+    y = np.ascontiguousarray(x[:, :d])
+    faiss.normalize_L2(y)
+    return y
+
+
+def search_recall(xb: np.ndarray, xq: np.ndarray, truth: np.ndarray, k: int, storage: str,
+                  nprobe: int, pq_m: int) -> dict:
+    d = xb.shape[1]
+    idx = make_compressed_index(storage, _adaptive_nlist(xb.shape[0]), dim=d, pq_m=pq_m, pca_dim=0)
+    if not idx.is_trained:
+        faiss.downcast_index(idx.index).train(xb)
+    ivf = _ivf_of(idx)
+    if ivf is not None:
+        ivf.nprobe = nprobe
+    idx.add_with_ids(xb, np.arange(xb.shape[0], dtype=np.int64))
+    t0 = time.perf_counter()
+    _, found = idx.search(xq, k)
+    ms = (time.perf_counter() - t0) * 1000 / xq.shape[0]
+    return {
+        "recall_at_k": round(recall_at_k(found, truth, k), 4),
+        "bytes_per_vec": round(int(faiss.serialize_index(idx).size) / xb.shape[0], 1),
+        "search_ms_per_query": round(ms, 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors", default=os.getenv("FAISS_VEC_STORE_PATH", "data/faiss/vectors_f16.npy"))
+    ap.add_argument("--dims", default="256,512,1536")
+    ap.add_argument("--methods", default="native,pca")
+    ap.add_argument("--storage", default=os.getenv("FAISS_STORAGE", "ivfpq"))
+    ap.add_argument("--nq", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, default=int(os.getenv("FAISS_NPROBE", "16")))
+    ap.add_argument("--pq-m", type=int, default=int(os.getenv("FAISS_PQ_M", "16")))
+    ap.add_argument("--json", default=None)
+    args = ap.parse_args()
+
+    x = np.load(args.vectors).astype(np.float32)
+    rng = np.random.default_rng(42)
+    perm = rng.permutation(x.shape[0])
+    nq = min(args.nq, max(1, x.shape[0] // 10))
+    xq, xb = x[perm[:nq]], x[perm[nq:]]
+    full = xb.shape[1]
+
+    gt = faiss.IndexFlatL2(full); gt.add(xb)
+    _, truth = gt.search(xq, args.k)
+
+    rows = []
+    for method in [m.strip() for m in args.methods.split(",") if m.strip()]:
+        for d in sorted({min(full, int(v)) for v in args.dims.split(",") if v.strip()}):
+            if d == full:
+                rb, rq = xb, xq
+            elif method == "native":
+                rb, rq = truncate(xb, d), truncate(xq, d)
+            else:
+                pca = faiss.PCAMatrix(full, d, 0.0, False)
+                pca.train(xb)
+                rb, rq = pca.apply_py(xb), pca.apply_py(xq)
+            for storage in ("flat", args.storage):
+                if storage != "flat" and d % args.pq_m and storage in ("ivfpq", "opq_ivfpq"):
+                    continue
+                r = search_recall(rb, rq, truth, args.k, storage, args.nprobe, args.pq_m)
+                rows.append({"method": method, "dim": d, "storage": storage, **r})
+
+    print(f"{'method':<7} {'dim':>5} {'storage':<10} {'R@k':>7} {'B/vec':>9} {'ms/q':>7}")
+    for r in rows:
+        print(f"{r['method']:<7} {r['dim']:>5} {r['storage']:<10} {r['recall_at_k']:>7} "
+              f"{r['bytes_per_vec']:>9} {r['search_ms_per_query']:>7}")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({"k": args.k, "nq": nq, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# scripts/faiss_storage_report.py
+"""
+Laporan trade-off memori vs recall untuk mode penyimpanan FAISS.
+
+Untuk tiap mode (flat, ivfpq, opq_ivfpq, sq8) dihitung:
+  - bytes/vektor index (serialize_index / ntotal)
+  - bytes/vektor store refine float16 (2 * dim)
+  - recall@k coarse dan recall@k setelah refine (re-rank L2 exact pakai float16)
+Ground truth = IndexFlatL2 float32.
+
+Contoh:
+  python scripts/faiss_storage_report.py --vectors data/faiss/vectors_f16.npy --nq 500 --k 10
+  python scripts/faiss_storage_report.py --vectors emb.npy --json out/faiss_report.json
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import faiss  # type: ignore
+from app.infra.search.faiss_index import make_compressed_index, _adaptive_nlist, _ivf_of
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray, k: int) -> float:
+    hit = 0
+    for f, t in zip(found[:, :k], truth[:, :k]):
+        hit += len(set(f.tolist()) & set(t.tolist()))
+    return hit / float(truth.shape[0] * k)
+
+
+def refine(xb16: np.ndarray, xq: np.ndarray, cand: np.ndarray, k: int) -> np.ndarray:
+    out = np.full((xq.shape[0], k), -1, dtype=np.int64)
+    for qi in range(xq.shape[0]):
+        c = cand[qi][cand[qi] >= 0]
+        if c.size == 0:
+            continue
+        d2 = ((xb16[c].astype(np.float32) - xq[qi]) ** 2).sum(axis=1)
+        top = c[np.argsort(d2)[:k]]
+        out[qi, :top.size] = top
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors", default=os.getenv("FAISS_VEC_STORE_PATH", "data/faiss/vectors_f16.npy"))
+    ap.add_argument("--modes", default="flat,ivfpq,opq_ivfpq,sq8")
+    ap.add_argument("--nq", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--refine-factor", type=int, default=int(os.getenv("FAISS_REFINE_K_FACTOR", "4")))
+    ap.add_argument("--nprobe", type=int, default=int(os.getenv("FAISS_NPROBE", "16")))
+    ap.add_argument("--pq-m", type=int, default=int(os.getenv("FAISS_PQ_M", "16")))
+    ap.add_argument("--json", default=None, help="tulis hasil ke file JSON")
+    args = ap.parse_args()
+
+    x = np.load(args.vectors).astype(np.float32)
+    rng = np.random.default_rng(42)
+    perm = rng.permutation(x.shape[0])
+    nq = min(args.nq, max(1, x.shape[0] // 10))
+    xq, xb = x[perm[:nq]], x[perm[nq:]]
+    dim = xb.shape[1]
+    ids = np.arange(xb.shape[0], dtype=np.int64)
+    xb16 = xb.astype(np.float16)
+
+    gt = faiss.IndexFlatL2(dim); gt.add(xb)
+    _, truth = gt.search(xq, args.k)
+
+    rows = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        idx = make_compressed_index(mode, _adaptive_nlist(xb.shape[0]), dim=dim, pq_m=args.pq_m, pca_dim=0)
+        t0 = time.perf_counter()
+        if not idx.is_trained:
+            faiss.downcast_index(idx.index).train(xb)
+        ivf = _ivf_of(idx)
+        if ivf is not None:
+            ivf.nprobe = args.nprobe
+        idx.add_with_ids(xb, ids)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _, coarse = idx.search(xq, args.k * args.refine_factor)
+        search_ms = (time.perf_counter() - t0) * 1000 / nq
+        refined = refine(xb16, xq, coarse, args.k)
+
+        idx_bytes = int(faiss.serialize_index(idx).size)
+        rows.append({
+            "mode": mode,
+            "n": int(xb.shape[0]), "dim": int(dim),
+            "index_bytes_per_vec": round(idx_bytes / xb.shape[0], 1),
+            "refine_f16_bytes_per_vec": 2 * dim,
+            "recall_at_k": round(recall_at_k(coarse, truth, args.k), 4),
+            "recall_at_k_refined": round(recall_at_k(refined, truth, args.k), 4),
+            "search_ms_per_query": round(search_ms, 3),
+            "build_s": round(build_s, 2),
+        })
+
+    print(f"{'mode':<10} {'B/vec':>8} {'+f16':>6} {'R@k':>7} {'R@k ref':>8} {'ms/q':>7}")
+    for r in rows:
+        print(f"{r['mode']:<10} {r['index_bytes_per_vec']:>8} {r['refine_f16_bytes_per_vec']:>6} "
+              f"{r['recall_at_k']:>7} {r['recall_at_k_refined']:>8} {r['search_ms_per_query']:>7}")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({"k": args.k, "nq": nq, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
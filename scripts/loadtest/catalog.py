@@ -0,0 +1,109 @@
+# scripts/loadtest/catalog.py
+"""
+Katalog produk sintetis (deterministik per seed) untuk load test + generator input request.
+
+Bentuk dokumen mengikuti koleksi `products` hasil crawler (nie, name, dosage_form, composition,
+manufacturer, category, status, state, updated_at, faiss_id).
+"""
+from __future__ import annotations
+
+import random
+import datetime as dt
+from typing import Any, Dict, List
+
+_ACTIVES = [
+    ("PARACETAMOL", "500 MG"), ("AMOXICILLIN", "500 MG"), ("IBUPROFEN", "400 MG"),
+    ("CETIRIZINE", "10 MG"), ("OMEPRAZOLE", "20 MG"), ("METFORMIN", "500 MG"),
+    ("AMLODIPINE", "5 MG"), ("SIMVASTATIN", "20 MG"), ("DEXAMETHASONE", "0.5 MG"),
+    ("LORATADINE", "10 MG"), ("AMBROXOL", "30 MG"), ("ASAM MEFENAMAT", "500 MG"),
+    ("CIPROFLOXACIN", "500 MG"), ("CAPTOPRIL", "25 MG"), ("RANITIDINE", "150 MG"),
+]
+_FORMS = ["TABLET", "KAPLET", "KAPSUL", "SIRUP", "SUSPENSI", "TABLET SALUT SELAPUT"]
+_SYLL = ["PA", "NA", "DOL", "FLU", "MOX", "ZIN", "TRI", "CO", "SAN", "BIO", "VIT", "FAR", "MED", "GEN", "LAX"]
+_MAKERS = ["PT KALBE FARMA", "PT SANBE FARMA", "PT KIMIA FARMA", "PT DEXA MEDICA", "PT TEMPO SCAN PACIFIC",
+           "PT PHAPROS", "PT INDOFARMA", "PT HEXPHARM JAYA", "PT NOVELL PHARMACEUTICAL", "PT IFARS"]
+_PREFIX = ["DBL", "DKL", "GBL", "GKL"]
+_STATUS = ["Berlaku"] * 9 + ["Tidak Berlaku"]
+
+
+def _nie(rng: random.Random) -> str:
+    return f"{rng.choice(_PREFIX)}{rng.randrange(10**9, 10**10)}{rng.choice('ABC')}{rng.randrange(1, 3)}"
+
+
+def build_catalog(n: int = 5000, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    now = dt.datetime.utcnow()
+    seen, docs = set(), []
+    while len(docs) < n:
+        nie = _nie(rng)
+        if nie in seen:
+            continue
+        seen.add(nie)
+        active, strength = rng.choice(_ACTIVES)
+        brand = "".join(rng.choice(_SYLL) for _ in range(rng.randrange(2, 4)))
+        form = rng.choice(_FORMS)
+        docs.append({
+            "nie": nie,
+            "name": f"{brand} {strength} {form}",
+            "dosage_form": form,
+            "composition": f"{active} {strength}",
+            "manufacturer": rng.choice(_MAKERS),
+            "category": "Obat",
+            "status": rng.choice(_STATUS),
+            "state": "active",
+            "updated_at": now - dt.timedelta(days=rng.randrange(0, 900)),
+            "faiss_id": len(docs) + 1,
+        })
+    return docs
+
+
+def _noisy(text: str, rng: random.Random, p: float = 0.08) -> str:
+    # Simulasi error OCR: substitusi karakter mirip + sisipan simbol
+    sub = {"O": "0", "I": "1", "S": "5", "B": "8", "A": "4", "E": "3"}
+    out = []
+    for ch in text:
+        r = rng.random()
+        if r < p and ch in sub:
+            out.append(sub[ch])
+        elif r < p / 3:
+            out.append(ch + rng.choice("|.,'"))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+class RequestMix:
+    """Input request realistis dari katalog: NIE valid/tidak dikenal, nama bersih/berderau."""
+
+    def __init__(self, catalog: List[Dict[str, Any]], seed: int = 7):
+        self.cat = catalog
+        self.rng = random.Random(seed)
+
+    def verify_body(self) -> Dict[str, Any]:
+        r, d = self.rng.random(), self.rng.choice(self.cat)
+        if r < 0.70:
+            return {"nie": d["nie"]}
+        if r < 0.85:
+            return {"nie": _nie(self.rng)}          # tidak terdaftar → negative path
+        return {"text": _noisy(d["name"], self.rng)}
+
+    def search_body(self) -> Dict[str, Any]:
+        d = self.rng.choice(self.cat)
+        r = self.rng.random()
+        if r < 0.2:
+            q = d["nie"]
+        elif r < 0.6:
+            q = d["name"].split()[0]
+        else:
+            q = _noisy(d["name"], self.rng)
+        return {"query": q, "k": 5}
+
+    def agent_body(self, session_id: str) -> Dict[str, Any]:
+        d = self.rng.choice(self.cat)
+        text = self.rng.choice([
+            f"apa efek samping {d['composition'].split()[0].lower()}?",
+            f"berapa dosis {d['name'].lower()} untuk dewasa?",
+            f"apakah {d['name'].lower()} aman untuk ibu hamil?",
+            f"komposisi {d['nie']} apa saja?",
+        ])
+        return {"text": text, "session_id": session_id}
@@ -0,0 +1,294 @@
+# scripts/loadtest/run.py
+"""
+Load test HTTP end-to-end: boot stub OpenAI + app (serve.py) lalu jalankan load generator async
+per skenario, hasil p50/p95/p99, RPS, error, dan CPU server per request dalam JSON.
+
+Skenario: verify (/v1/verify), search (/v1/search), scan (/v1/scan/photo, gambar dari
+data/yolo_title/images/test), agent (/v1/agent), agent_stream (/v1/agent/stream, SSE).
+
+Contoh:
+  python scripts/loadtest/run.py --scenarios verify,search --concurrency 32 --duration 20 --out out/lt_base.json
+  python scripts/loadtest/run.py --scenarios scan --concurrency 4 --duration 30 --compare out/lt_base.json
+  python scripts/loadtest/run.py --base-url http://127.0.0.1:8000 --api-key $SERVICE_API_KEY   # server yang sudah jalan
+
+Dependensi tambahan: scripts/loadtest/requirements.txt (fakeredis, mongomock-motor, psutil).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parents[1]
+sys.path.insert(0, str(HERE))
+
+from catalog import RequestMix, build_catalog  # noqa: E402
+
+try:
+    import psutil  # type: ignore
+except Exception:
+    psutil = None  # type: ignore
+
+
+# ── Proses server ────────────────────────────────────────────────
+def _spawn(cmd: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=str(ROOT), env={**os.environ, **env})
+
+
+def _wait_ready(url: str, timeout_s: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server tidak siap: {url}")
+
+
+def _cpu_seconds(pid: Optional[int]) -> Optional[float]:
+    """CPU user+system proses server (psutil, fallback /proc di Linux)."""
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            t = psutil.Process(pid).cpu_times()
+            return t.user + t.system
+        except Exception:
+            return None
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return None
+
+
+# ── Statistik ────────────────────────────────────────────────────
+def _pct(sorted_ms: List[float], p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    idx = min(len(sorted_ms) - 1, max(0, math.ceil(p / 100 * len(sorted_ms)) - 1))  # nearest-rank
+    return round(sorted_ms[idx], 2)
+
+
+def summarize(lat_ms: List[float], statuses: Dict[str, int], wall_s: float,
+              cpu_s: Optional[float]) -> Dict[str, Any]:
+    lat = sorted(lat_ms)
+    n = len(lat)
+    ok = sum(v for k, v in statuses.items() if k.startswith("2"))
+    return {
+        "requests": n,
+        "ok": ok,
+        "errors": n - ok,  # non-2xx + exception klien (status "exc:<Tipe>")
+        "status": dict(sorted(statuses.items())),
+        "rps": round(n / wall_s, 2) if wall_s else 0.0,
+        "p50_ms": _pct(lat, 50),
+        "p95_ms": _pct(lat, 95),
+        "p99_ms": _pct(lat, 99),
+        "mean_ms": round(sum(lat) / n, 2) if n else 0.0,
+        "max_ms": round(lat[-1], 2) if lat else 0.0,
+        "cpu_ms_per_req": round(cpu_s * 1000 / n, 3) if (cpu_s is not None and n) else None,
+    }
+
+
+# ── Skenario ─────────────────────────────────────────────────────
+RequestFactory = Callable[[httpx.AsyncClient, int], Any]
+
+
+def build_scenarios(mix: RequestMix, images: List[Path]) -> Dict[str, RequestFactory]:
+    img_bytes = [(p.name, p.read_bytes()) for p in images]
+
+    def verify(cli: httpx.AsyncClient, wid: int):
+        return cli.post("/v1/verify", json=mix.verify_body(), headers={"X-Session-Id": f"lt-{wid}"})
+
+    def search(cli: httpx.AsyncClient, wid: int):
+        return cli.post("/v1/search", json=mix.search_body())
+
+    def scan(cli: httpx.AsyncClient, wid: int):
+        name, data = random.choice(img_bytes)
+        return cli.post("/v1/scan/photo", files={"img": (name, data, "image/jpeg")},
+                        data={"return_partial": "true"})
+
+    def agent(cli: httpx.AsyncClient, wid: int):
+        sid = f"lt-agent-{wid}"
+        return cli.post("/v1/agent", json=mix.agent_body(sid), headers={"X-Session-Id": sid})
+
+    def agent_stream(cli: httpx.AsyncClient, wid: int):
+        # Latency = stream selesai penuh (body SSE dibaca habis oleh httpx)
+        sid = f"lt-agent-{wid}"
+        return cli.post("/v1/agent/stream", json=mix.agent_body(sid), headers={"X-Session-Id": sid})
+
+    out = {"verify": verify, "search": search, "agent": agent, "agent_stream": agent_stream}
+    if img_bytes:
+        out["scan"] = scan
+    return out
+
+
+async def run_scenario(base_url: str, factory: RequestFactory, *, concurrency: int, duration_s: float,
+                       warmup_s: float, timeout_s: float, headers: Dict[str, str],
+                       server_pid: Optional[int]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits, headers=headers) as cli:
+        lat_ms: List[float] = []
+        statuses: Dict[str, int] = {}
+        recording = False
+
+        async def worker(wid: int, deadline: float):
+            while time.monotonic() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    rsp = await factory(cli, wid)
+                    code = str(rsp.status_code)
+                except Exception as e:
+                    code = f"exc:{type(e).__name__}"
+                ms = (time.perf_counter() - t0) * 1000
+                if not recording:
+                    continue
+                lat_ms.append(ms)
+                statuses[code] = statuses.get(code, 0) + 1
+
+        # Warm-up (cache, koneksi, JIT model) tidak dihitung
+        if warmup_s > 0:
+            await asyncio.gather(*(worker(i, time.monotonic() + warmup_s) for i in range(concurrency)))
+        recording = True
+        cpu0 = _cpu_seconds(server_pid)
+        t0 = time.monotonic()
+        await asyncio.gather(*(worker(i, t0 + duration_s) for i in range(concurrency)))
+        wall = time.monotonic() - t0
+        cpu1 = _cpu_seconds(server_pid)
+    cpu = (cpu1 - cpu0) if (cpu0 is not None and cpu1 is not None) else None
+    return summarize(lat_ms, statuses, wall, cpu)
+
+
+# ── Perbandingan ─────────────────────────────────────────────────
+def compare(cur: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name, s in cur["scenarios"].items():
+        b = (base.get("scenarios") or {}).get(name)
+        if not b:
+            continue
+        row = {}
+        for k in ("p50_ms", "p95_ms", "p99_ms", "rps", "cpu_ms_per_req"):
+            if s.get(k) is not None and b.get(k):
+                row[k] = {"base": b[k], "cur": s[k], "delta_pct": round((s[k] - b[k]) / b[k] * 100, 1)}
+        out[name] = row
+    return out
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", default="verify,search,scan,agent")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20.0, help="detik per skenario")
+    ap.add_argument("--warmup", type=float, default=3.0)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--base-url", default=None, help="target server yang sudah jalan (tanpa spawn stand-in)")
+    ap.add_argument("--api-key", default=os.getenv("SERVICE_API_KEY", ""))
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--stub-port", type=int, default=8901)
+    ap.add_argument("--mongo", choices=("fake", "local"), default="fake")
+    ap.add_argument("--redis", choices=("fake", "local"), default="fake")
+    ap.add_argument("--catalog-size", type=int, default=5000)
+    ap.add_argument("--chat-latency-ms", type=float, default=800)
+    ap.add_argument("--embed-latency-ms", type=float, default=60)
+    ap.add_argument("--jitter-ms", type=float, default=100)
+    ap.add_argument("--images", default=str(ROOT / "data/yolo_title/images/test"))
+    ap.add_argument("--out", default=None, help="tulis hasil JSON ke file")
+    ap.add_argument("--compare", default=None, help="JSON hasil run sebelumnya untuk delta")
+    args = ap.parse_args()
+
+    procs: List[subprocess.Popen] = []
+    server_pid: Optional[int] = None
+    base_url = args.base_url
+    try:
+        if base_url is None:
+            stub = _spawn([sys.executable, str(HERE / "stub_openai.py"), "--port", str(args.stub_port),
+                           "--chat-latency-ms", str(args.chat_latency_ms),
+                           "--embed-latency-ms", str(args.embed_latency_ms),
+                           "--jitter-ms", str(args.jitter_ms)], {})
+            procs.append(stub)
+            _wait_ready(f"http://127.0.0.1:{args.stub_port}/stats")
+            srv = _spawn([sys.executable, str(HERE / "serve.py"), "--port", str(args.port),
+                          "--mongo", args.mongo, "--redis", args.redis,
+                          "--catalog-size", str(args.catalog_size)],
+                         {"OPENAI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+                          "OPENAI_API_BASE": f"http://127.0.0.1:{args.stub_port}/v1"})
+            procs.append(srv)
+            server_pid = srv.pid
+            base_url = f"http://127.0.0.1:{args.port}"
+            _wait_ready(f"{base_url}/healthz", timeout_s=300)
+
+        mix = RequestMix(build_catalog(args.catalog_size))
+        images = sorted(Path(args.images).glob("*.jpg"))
+        scenarios = build_scenarios(mix, images)
+        headers = {"X-Api-Key": args.api_key} if args.api_key else {}
+
+        results: Dict[str, Any] = {}
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if name not in scenarios:
+                print(f"skip {name}: tidak tersedia", file=sys.stderr)
+                continue
+            print(f"▶ {name} c={args.concurrency} {args.duration:.0f}s", file=sys.stderr)
+            results[name] = asyncio.run(run_scenario(
+                base_url, scenarios[name], concurrency=args.concurrency, duration_s=args.duration,
+                warmup_s=args.warmup, timeout_s=args.timeout, headers=headers, server_pid=server_pid,
+            ))
+            print(f"  {json.dumps(results[name])}", file=sys.stderr)
+
+        report: Dict[str, Any] = {
+            "meta": {
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "git": _git_rev(),
+                "python": platform.python_version(),
+                "host": platform.node(),
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "target": base_url,
+                "standins": None if args.base_url else {
+                    "mongo": args.mongo, "redis": args.redis, "catalog_size": args.catalog_size,
+                    "chat_latency_ms": args.chat_latency_ms, "embed_latency_ms": args.embed_latency_ms,
+                },
+                "run_id": uuid.uuid4().hex[:8],
+            },
+            "scenarios": results,
+        }
+        if args.compare:
+            report["compare"] = compare(report, json.loads(Path(args.compare).read_text()))
+
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.out).write_text(text, encoding="utf-8")
+        print(text)
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            try:
+                p.wait(timeout=10)
+            except Exception:
+                p.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# scripts/loadtest/serve.py
+"""
+Boot app FastAPI (main:app) untuk load test dengan stand-in lokal:
+
+  --mongo fake  : mongomock-motor in-memory (default)   | local : MONGO_URI (mis. mongod docker-compose)
+  --redis fake  : fakeredis in-process (default)        | local : REDIS_URL
+  OpenAI        : OPENAI_BASE_URL → stub_openai.py (diset oleh run.py)
+
+Katalog sintetis di-seed ke koleksi products sebelum warm-up (NIE registry/suggest ikut memuatnya).
+Mode local memakai DB terpisah (MONGO_DB=medverify_loadtest) dan baru di-reseed bila kosong/--reseed.
+
+  python scripts/loadtest/serve.py --port 8900 --catalog-size 5000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from catalog import build_catalog  # noqa: E402  (scripts/loadtest di sys.path sebagai dir script)
+
+log = logging.getLogger("loadtest.serve")
+
+
+def _patch_mongo() -> None:
+    from mongomock_motor import AsyncMongoMockClient  # type: ignore
+    import app.infra.repo.mongo_repo as mongo_repo
+    mongo_repo.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+def _patch_redis() -> None:
+    import fakeredis  # type: ignore
+    import redis.asyncio as aioredis
+    server = fakeredis.FakeServer()
+    # Semua from_url (cache, session, product/response cache) berbagi satu server fake
+    aioredis.from_url = lambda url, **kw: fakeredis.FakeAsyncRedis(server=server, **kw)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--mongo", choices=("fake", "local"), default="fake")
+    ap.add_argument("--redis", choices=("fake", "local"), default="fake")
+    ap.add_argument("--catalog-size", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--reseed", action="store_true", help="mode local: hapus & isi ulang katalog")
+    args = ap.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "medverify_loadtest")
+    os.environ.setdefault("REQUIRE_API_KEY", "0")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-loadtest-stub")
+    os.environ.setdefault("ATLAS_ENABLE", "0")
+    os.environ.setdefault("TRACING_ENABLE", "0")
+
+    # Patch SEBELUM main/app di-import (container & adapter membaca modul ini saat import)
+    if args.mongo == "fake":
+        _patch_mongo()
+    if args.redis == "fake":
+        _patch_redis()
+
+    import uvicorn
+    from main import app
+
+    async def seed_catalog():
+        from app.container import _repo
+        coll = _repo().coll  # MemoizingRepo → CachedProductRepo → MongoVerificationRepo
+        n = await coll.count_documents({})
+        if n and not (args.reseed or args.mongo == "fake"):
+            log.info("catalog present (%d docs), skip seed", n)
+            return
+        await coll.delete_many({})
+        docs = build_catalog(args.catalog_size, seed=args.seed)
+        await coll.insert_many(docs)
+        log.info("seeded %d synthetic products", len(docs))
+
+    # Seed sebelum warm-up bawaan (NIE registry & suggest index dimuat dari koleksi)
+    app.router.on_startup.insert(0, seed_catalog)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
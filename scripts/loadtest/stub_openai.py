@@ -0,0 +1,134 @@
+# scripts/loadtest/stub_openai.py
+"""
+Stub server OpenAI (chat completions, termasuk stream=True, + embeddings) dengan latency yang bisa diatur,
+supaya load test tidak memanggil/membayar OpenAI asli.
+
+Dipakai lewat OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 (AsyncOpenAI & OpenAIEmbedder membacanya).
+
+  python scripts/loadtest/stub_openai.py --port 8901 --chat-latency-ms 800 --embed-latency-ms 60 --jitter-ms 100
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+import uuid
+
+import json
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+CHAT_LATENCY_MS = float(os.getenv("STUB_CHAT_LATENCY_MS", "800"))
+CHAT_TTFT_MS = float(os.getenv("STUB_CHAT_TTFT_MS", "250"))  # stream=True: token pertama, sisa latency dibagi rata
+EMBED_LATENCY_MS = float(os.getenv("STUB_EMBED_LATENCY_MS", "60"))
+JITTER_MS = float(os.getenv("STUB_JITTER_MS", "100"))
+EMBED_DIM = int(os.getenv("EMBED_DIM", "1536"))
+
+app = FastAPI(title="stub-openai")
+COUNTS = {"chat": 0, "chat_stream": 0, "embeddings": 0}
+
+
+async def _delay(base_ms: float) -> None:
+    ms = max(0.0, base_ms + random.uniform(-JITTER_MS, JITTER_MS))
+    await asyncio.sleep(ms / 1000)
+
+
+def _vec(text: str, dim: int) -> list:
+    # Deterministik per teks (cache/FAISS tetap konsisten antar run), dinormalisasi L2
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    v /= np.linalg.norm(v) or 1.0
+    return v.round(6).tolist()
+
+
+async def _chat_chunks(model: str, content: str):
+    # Format chunk SSE OpenAI: delta per kata, chunk finish_reason, lalu [DONE]
+    cid, created = f"chatcmpl-{uuid.uuid4().hex[:12]}", int(time.time())
+    words = content.split(" ")
+    step_ms = max(0.0, CHAT_LATENCY_MS - CHAT_TTFT_MS) / max(1, len(words))
+
+    def chunk(delta: dict, finish=None) -> str:
+        return "data: " + json.dumps({
+            "id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }) + "\n\n"
+
+    await _delay(CHAT_TTFT_MS)
+    yield chunk({"role": "assistant", "content": ""})
+    for i, w in enumerate(words):
+        if i:
+            await asyncio.sleep(step_ms / 1000)
+        yield chunk({"content": w if i == 0 else " " + w})
+    yield chunk({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat(request: Request):
+    body = await request.json()
+    COUNTS["chat"] += 1
+    last = (body.get("messages") or [{}])[-1].get("content") or ""
+    content = f"[stub] Ringkasan untuk: {str(last)[:120]}"
+    if body.get("stream"):
+        COUNTS["chat_stream"] += 1
+        return StreamingResponse(_chat_chunks(body.get("model", "stub"), content), media_type="text/event-stream")
+    await _delay(CHAT_LATENCY_MS)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "annotations": []},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": len(str(body.get("messages"))) // 4, "completion_tokens": 32, "total_tokens": 0},
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    COUNTS["embeddings"] += 1
+    await _delay(EMBED_LATENCY_MS)
+    inputs = body.get("input") or []
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dim = int(body.get("dimensions") or EMBED_DIM)
+    return {
+        "object": "list",
+        "data": [{"object": "embedding", "index": i, "embedding": _vec(str(t), dim)} for i, t in enumerate(inputs)],
+        "model": body.get("model", "stub"),
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return COUNTS
+
+
+def main():
+    global CHAT_LATENCY_MS, CHAT_TTFT_MS, EMBED_LATENCY_MS, JITTER_MS
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8901)
+    ap.add_argument("--chat-latency-ms", type=float, default=CHAT_LATENCY_MS)
+    ap.add_argument("--chat-ttft-ms", type=float, default=CHAT_TTFT_MS)
+    ap.add_argument("--embed-latency-ms", type=float, default=EMBED_LATENCY_MS)
+    ap.add_argument("--jitter-ms", type=float, default=JITTER_MS)
+    args = ap.parse_args()
+    CHAT_LATENCY_MS, EMBED_LATENCY_MS, JITTER_MS = args.chat_latency_ms, args.embed_latency_ms, args.jitter_ms
+    CHAT_TTFT_MS = args.chat_ttft_ms
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# scripts/microbench.py
+"""
+Runner micro-benchmark mandiri (timeit) untuk kasus di tests/bench/cases.py,
+dengan baseline tersimpan di tests/bench/baseline.json.
+
+  python scripts/microbench.py --save                 # rekam baseline baru
+  python scripts/microbench.py                        # bandingkan ke baseline (exit 1 bila regresi)
+  python scripts/microbench.py --only classify,aggregate --tolerance 0.25
+
+Angka: median & min per-batch dari --repeat ulangan (tiap ulangan dikalibrasi ≥ --min-time detik),
+ditulis juga per-item; regresi dinilai dari min (batch = jumlah input realistis per panggilan).
+Kasus yang dependensinya tidak terpasang (cv2/motor/bs4) di-skip dan tidak dibandingkan.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tests.bench.cases import CASES  # noqa: E402
+
+BASELINE = ROOT / "tests" / "bench" / "baseline.json"
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), text=True).strip()
+    except Exception:
+        return None
+
+
+def measure(fn, *, repeat: int, min_time: float) -> Dict[str, Any]:
+    t = timeit.Timer(fn)
+    number, taken = t.autorange()  # ≥ 0.2 s; skala ke min_time
+    if taken < min_time:
+        number = int(number * min_time / max(taken, 1e-9)) + 1
+    runs = [x / number for x in t.repeat(repeat=repeat, number=number)]
+    return {
+        "median_us": round(statistics.median(runs) * 1e6, 3),
+        "min_us": round(min(runs) * 1e6, 3),
+        "stdev_us": round(statistics.pstdev(runs) * 1e6, 3),
+        "loops": number,
+    }
+
+
+def run(names, *, repeat: int, min_time: float) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name in names:
+        build, batch = CASES[name]
+        try:
+            fn = build()
+        except ImportError as e:
+            print(f"skip {name}: {e}", file=sys.stderr)
+            continue
+        fn()  # warm-up (regex compile, lazy import, lru_cache)
+        r = measure(fn, repeat=repeat, min_time=min_time)
+        r["batch"] = batch
+        r["per_item_us"] = round(r["median_us"] / batch, 3) if batch else None
+        out[name] = r
+        print(f"{name:<22} {r['median_us']:>10.2f} us/batch  {r['per_item_us'] or 0:>8.2f} us/item", file=sys.stderr)
+    return out
+
+
+def compare(cur: Dict[str, Any], base: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    rows: Dict[str, Any] = {}
+    for name, r in cur.items():
+        b = base.get(name)
+        if not b or not b.get("min_us"):
+            continue
+        # min lebih stabil dari median di mesin bersama (noise hanya menambah waktu)
+        delta = (r["min_us"] - b["min_us"]) / b["min_us"]
+        rows[name] = {"base_us": b["min_us"], "cur_us": r["min_us"],
+                      "delta_pct": round(delta * 100, 1), "regressed": delta > tolerance}
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", default="", help="daftar kasus dipisah koma")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--min-time", type=float, default=0.2, help="detik minimum per ulangan")
+    ap.add_argument("--save", action="store_true", help="tulis hasil sebagai baseline")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--tolerance", type=float, default=0.15, help="ambang regresi relatif min (0.15 = 15%%)")
+    ap.add_argument("--out", default=None, help="tulis hasil JSON ke file")
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or sorted(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        ap.error(f"kasus tidak dikenal: {', '.join(unknown)} (tersedia: {', '.join(sorted(CASES))})")
+
+    results = run(names, repeat=args.repeat, min_time=args.min_time)
+    report: Dict[str, Any] = {
+        "meta": {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "impl": platform.python_implementation(),
+            "machine": platform.machine(),
+            "processor": platform.processor() or None,
+            "repeat": args.repeat,
+            "min_time_s": args.min_time,
+        },
+        "cases": results,
+    }
+
+    path = Path(args.baseline)
+    rc = 0
+    if args.save:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"baseline → {path}", file=sys.stderr)
+    elif path.exists():
+        base = json.loads(path.read_text(encoding="utf-8"))
+        report["compare"] = compare(results, base.get("cases") or {}, args.tolerance)
+        bad = [n for n, r in report["compare"].items() if r["regressed"]]
+        if bad:
+            print(f"REGRESI > {args.tolerance:.0%}: {', '.join(bad)}", file=sys.stderr)
+            rc = 1
+    else:
+        print(f"baseline belum ada ({path}); jalankan dengan --save", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
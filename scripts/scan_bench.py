@@ -0,0 +1,403 @@
+# scripts/scan_bench.py
+"""
+Benchmark akurasi + latency scan end-to-end (ScanUseCase.run_single_shot) pada set test berlabel
+data/yolo_title_clean/images/test (label YOLO: 0=title, 1=body; gambar sama dengan data/yolo_title).
+
+Per gambar dicatat: timings per stage (yolo/ocr_title/search/ocr_full/regex/total), IoU box title
+prediksi vs label, teks OCR judul, nomor BPOM hasil regex, hasil T1/T2, dan (bila ada ground truth)
+rank produk benar di hasil search judul. Ringkasan dicetak ke stderr, JSON lengkap ke stdout/--out
+supaya bisa di-diff antar perubahan model (YOLO_WEIGHTS), OCR_ENGINE, atau parameter (T1/T2, thresh).
+
+Katalog:
+  --catalog stub  : index in-memory (katalog sintetis scripts/loadtest + entri ground truth), tanpa Mongo
+  --catalog local : SearchRouter dari container (MONGO_URI / Atlas / FAISS sesuai .env)
+
+Ground truth opsional (--truth, default <dataset>/truth.json):
+  {"<nama file atau stem gambar>": {"name": "PANADOL 500 MG KAPLET", "nie": "DBL1234567890A1"}, ...}
+
+Contoh:
+  python scripts/scan_bench.py --out out/scan_base.json
+  OCR_ENGINE=paddle python scripts/scan_bench.py --compare out/scan_base.json --out out/scan_paddle.json
+  python scripts/scan_bench.py --limit 20 --t1-ms 500 --t2-ms 1200 --return-partial
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import difflib
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts" / "loadtest"))
+
+from app.infra.pipelines.scan_pipeline import _norm_title  # noqa: E402
+
+STAGES = ("yolo_ms", "ocr_title_ms", "search_ms", "ocr_full_ms", "regex_ms", "total_ms")
+
+
+# ── Katalog stub ─────────────────────────────────────────────────
+class CatalogQuery:
+    """
+    Pengganti SearchRouter untuk benchmark: exact NIE, lalu kemiripan nama ternormalisasi
+    (kandidat dari inverted index trigram karakter — tahan derau OCR seperti "P4NADOL" — lalu
+    skor difflib). Bentuk hit sama: dict produk + _src/_score.
+    """
+
+    MAX_CANDIDATES = 200
+
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+        self.by_nie = {d["nie"].upper(): d for d in docs if d.get("nie")}
+        self.norm = [_norm_title(d.get("name")) for d in docs]
+        self.index: Dict[str, List[int]] = defaultdict(list)
+        for i, n in enumerate(self.norm):
+            for g in self._grams(n):
+                self.index[g].append(i)
+
+    @staticmethod
+    def _grams(s: str) -> set:
+        s = f" {s} "
+        return {s[i:i + 3] for i in range(len(s) - 2)}
+
+    async def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        q = (query or "").strip()
+        if not q:
+            return []
+        d = self.by_nie.get(q.replace(" ", "").upper())
+        if d is not None:
+            return [{**d, "_src": "exact", "_score": 1.0}]
+        nq = _norm_title(q)
+        shared: Counter = Counter(i for g in self._grams(nq) for i in self.index.get(g, ()))
+        cand = [i for i, _ in shared.most_common(self.MAX_CANDIDATES)]
+        scored = sorted(
+            ((difflib.SequenceMatcher(None, nq, self.norm[i]).ratio(), i) for i in cand),
+            reverse=True,
+        )[:k]
+        return [{**self.docs[i], "_src": "lex", "_score": round(s, 4)} for s, i in scored]
+
+
+def _stub_catalog(truth: Dict[str, Dict[str, Any]], size: int) -> CatalogQuery:
+    from catalog import build_catalog
+    docs = build_catalog(size) if size else []
+    seen = {d["nie"] for d in docs}
+    for t in truth.values():
+        if t.get("nie") and t["nie"] not in seen:
+            docs.append({"nie": t["nie"], "name": t.get("name") or t["nie"], "state": "active"})
+            seen.add(t["nie"])
+        elif not t.get("nie") and t.get("name"):
+            docs.append({"nie": None, "name": t["name"], "state": "active"})
+    return CatalogQuery(docs)
+
+
+# ── Label & metrik ───────────────────────────────────────────────
+def load_gt_boxes(label_path: Path, cls_id: int) -> List[Tuple[float, float, float, float]]:
+    """Label YOLO (cls cx cy w h, ternormalisasi) → list xyxy ternormalisasi untuk kelas title."""
+    out = []
+    if not label_path.exists():
+        return out
+    for line in label_path.read_text().splitlines():
+        parts = line.split()
+        if len(parts) < 5 or int(float(parts[0])) != cls_id:
+            continue
+        cx, cy, w, h = map(float, parts[1:5])
+        out.append((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2))
+    return out
+
+
+def iou(a, b) -> float:
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _norm_box(box: Optional[Dict[str, Any]], w: int, h: int):
+    if not box:
+        return None
+    return (box["x1"] / w, box["y1"] / h, box["x2"] / w, box["y2"] / h)
+
+
+def t1_outcome(out: Dict[str, Any]) -> str:
+    tm = out.get("timings") or {}
+    if out.get("title_text") is None and not tm.get("ocr_title_ms"):
+        return "timeout"
+    if not out.get("title_text"):
+        return "no_text"
+    return "match" if out.get("match") else "no_match"
+
+
+def t2_outcome(out: Dict[str, Any]) -> str:
+    if "regex_skipped" not in out:
+        return "timeout"  # T2 belum selesai saat dikembalikan (partial / lewat t2_timeout)
+    if out["regex_skipped"]:
+        return "skipped"
+    return "number" if out.get("bpom_number") else "none"
+
+
+def _truth_for(truth: Dict[str, Dict[str, Any]], img: Path) -> Optional[Dict[str, Any]]:
+    return truth.get(img.name) or truth.get(img.stem)
+
+
+def _rank(hits: List[Dict[str, Any]], t: Dict[str, Any]) -> Optional[int]:
+    want_nie = (t.get("nie") or "").upper()
+    want_name = _norm_title(t.get("name")) if t.get("name") else None
+    for i, h in enumerate(hits, 1):
+        if want_nie and (h.get("nie") or "").upper() == want_nie:
+            return i
+        if not want_nie and want_name and _norm_title(h.get("name")) == want_name:
+            return i
+    return None
+
+
+def _pct(xs: List[float], p: float) -> Optional[float]:
+    if not xs:
+        return None
+    s = sorted(xs)
+    return round(s[min(len(s) - 1, max(0, math.ceil(p / 100 * len(s)) - 1))], 2)  # nearest-rank
+
+
+# ── Run ──────────────────────────────────────────────────────────
+async def bench_one(uc, img: Path, *, labels_dir: Path, cls_id: int, truth, rank_k: int,
+                    return_partial: bool, t1_ms: int, t2_ms: int) -> Dict[str, Any]:
+    data = img.read_bytes()
+    h, w = uc.pipe._decode(data).shape[:2]  # koordinat box pipeline = gambar setelah resize _decode
+
+    t0 = time.perf_counter()
+    out = await uc.run_single_shot(data, return_partial=return_partial, t1_timeout_ms=t1_ms, t2_timeout_ms=t2_ms)
+    wall_ms = (time.perf_counter() - t0) * 1000
+
+    gt = load_gt_boxes(labels_dir / f"{img.stem}.txt", cls_id)
+    pred = _norm_box(out.get("title_box"), w, h)
+    best_iou = max((iou(pred, g) for g in gt), default=0.0) if pred else 0.0
+
+    match = out.get("match") or {}
+    prod = match.get("product") or {}
+    row: Dict[str, Any] = {
+        "image": img.name,
+        "stage": out.get("stage"),
+        "wall_ms": round(wall_ms, 1),
+        "timings": {k: (out.get("timings") or {}).get(k, 0) for k in STAGES},
+        "yolo_title_conf": round(float(out.get("yolo_title_conf") or 0.0), 4),
+        "gt_titles": len(gt),
+        "title_iou": round(best_iou, 4),
+        "title_text": out.get("title_text"),
+        "title_conf": round(float(out["title_conf"]), 4) if out.get("title_conf") is not None else None,
+        "match": {"nie": prod.get("nie"), "name": prod.get("name"), "source": match.get("source"),
+                  "confidence": match.get("confidence")} if prod else None,
+        "bpom_number": out.get("bpom_number"),
+        "t1": t1_outcome(out),
+        "t2": t2_outcome(out),
+    }
+
+    t = _truth_for(truth, img)
+    if t is not None:
+        # Rank produk benar di top-k search judul (di luar jalur waktu scan)
+        hits = await uc.query.search(out["title_text"], k=rank_k) if out.get("title_text") else []
+        row["truth"] = t
+        row["match_rank"] = _rank(hits, t)
+        if t.get("nie"):
+            row["nie_correct"] = (out.get("bpom_number") or "").replace(" ", "").upper() == t["nie"].upper()
+    return row
+
+
+def summarize(rows: List[Dict[str, Any]], iou_thresh: float) -> Dict[str, Any]:
+    n = len(rows)
+    stages = {}
+    for k in STAGES + ("wall_ms",):
+        if k == "wall_ms":
+            xs = [r["wall_ms"] for r in rows]
+        else:
+            # Stage yang tidak jalan (regex di-skip, tanpa teks judul) tercatat 0 → tidak ikut persentil
+            xs = [r["timings"][k] for r in rows if r["timings"][k] or k == "total_ms"]
+        stages[k] = {"n": len(xs), "p50": _pct(xs, 50), "p95": _pct(xs, 95),
+                     "mean": round(statistics.fmean(xs), 2) if xs else None}
+
+    labelled = [r for r in rows if r["gt_titles"]]
+    ranked = [r for r in rows if "match_rank" in r]
+    nie_rows = [r for r in rows if "nie_correct" in r]
+    out: Dict[str, Any] = {
+        "images": n,
+        "latency_ms": stages,
+        "title_iou_mean": round(statistics.fmean(r["title_iou"] for r in labelled), 4) if labelled else None,
+        f"title_recall@{iou_thresh}": round(sum(r["title_iou"] >= iou_thresh for r in labelled) / len(labelled), 4)
+        if labelled else None,
+        "title_text_rate": round(sum(bool(r["title_text"]) for r in rows) / n, 4) if n else None,
+        "bpom_number_rate": round(sum(bool(r["bpom_number"]) for r in rows) / n, 4) if n else None,
+        "t1": dict(Counter(r["t1"] for r in rows)),
+        "t2": dict(Counter(r["t2"] for r in rows)),
+    }
+    if ranked:
+        ranks = [r["match_rank"] for r in ranked]
+        out["truth_images"] = len(ranked)
+        out["match@1"] = round(sum(x == 1 for x in ranks if x) / len(ranks), 4)
+        out["match@k"] = round(sum(x is not None for x in ranks) / len(ranks), 4)
+        out["mrr"] = round(sum(1 / x for x in ranks if x) / len(ranks), 4)
+    if nie_rows:
+        out["nie_accuracy"] = round(sum(r["nie_correct"] for r in nie_rows) / len(nie_rows), 4)
+    return out
+
+
+def compare(cur: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+    cs, bs = cur["summary"], base.get("summary") or {}
+    delta: Dict[str, Any] = {}
+    for k, v in cs.items():
+        b = bs.get(k)
+        if isinstance(v, (int, float)) and isinstance(b, (int, float)):
+            delta[k] = {"base": b, "cur": v, "delta": round(v - b, 4)}
+    lat = {}
+    for k, v in cs.get("latency_ms", {}).items():
+        b = (bs.get("latency_ms") or {}).get(k) or {}
+        if v.get("p50") is not None and b.get("p50"):
+            lat[k] = {"p50_base": b["p50"], "p50_cur": v["p50"],
+                      "p50_delta_pct": round((v["p50"] - b["p50"]) / b["p50"] * 100, 1),
+                      "p95_base": b.get("p95"), "p95_cur": v.get("p95")}
+    delta["latency_ms"] = lat
+
+    # Gambar yang hasilnya berubah (teks judul / nomor / outcome / rank)
+    base_rows = {r["image"]: r for r in base.get("images") or []}
+    changed = []
+    for r in cur["images"]:
+        b = base_rows.get(r["image"])
+        if not b:
+            continue
+        diff = {k: {"base": b.get(k), "cur": r.get(k)}
+                for k in ("title_text", "bpom_number", "t1", "t2", "match_rank")
+                if b.get(k) != r.get(k)}
+        if abs((b.get("title_iou") or 0) - r["title_iou"]) >= 0.1:
+            diff["title_iou"] = {"base": b.get("title_iou"), "cur": r["title_iou"]}
+        if diff:
+            changed.append({"image": r["image"], **diff})
+    delta["changed_images"] = changed
+    return delta
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), text=True).strip()
+    except Exception:
+        return None
+
+
+def _print_summary(s: Dict[str, Any]) -> None:
+    p = lambda *a: print(*a, file=sys.stderr)  # noqa: E731
+    p(f"images={s['images']} title_iou_mean={s['title_iou_mean']} "
+      + " ".join(f"{k}={v}" for k, v in s.items() if k.startswith("title_recall")))
+    p(f"title_text_rate={s['title_text_rate']} bpom_number_rate={s['bpom_number_rate']} "
+      f"t1={s['t1']} t2={s['t2']}")
+    if "mrr" in s:
+        p(f"truth={s['truth_images']} match@1={s['match@1']} match@k={s['match@k']} mrr={s['mrr']} "
+          f"nie_accuracy={s.get('nie_accuracy')}")
+    for k, v in s["latency_ms"].items():
+        p(f"  {k:<13} n={v['n']:<4} p50={v['p50']} p95={v['p95']} mean={v['mean']}")
+
+
+async def amain(args) -> Dict[str, Any]:
+    images_dir = Path(args.images)
+    labels_dir = Path(args.labels) if args.labels else images_dir.parents[1] / "labels" / images_dir.name
+    truth_path = Path(args.truth) if args.truth else images_dir.parents[1] / "truth.json"
+    truth = json.loads(truth_path.read_text(encoding="utf-8")) if truth_path.exists() else {}
+
+    images = sorted(p for p in images_dir.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    if args.limit:
+        images = images[: args.limit]
+    if not images:
+        raise SystemExit(f"tidak ada gambar di {images_dir}")
+
+    from app.application.scan_use_case import ScanUseCase
+    from app.infra.pipelines.scan_pipeline import ScanPipeline
+    if args.catalog == "stub":
+        query = _stub_catalog(truth, args.catalog_size)
+    else:
+        from app.container import _search_router
+        query = _search_router()
+    uc = ScanUseCase(search_router=query, pipeline=ScanPipeline(query_service=query))
+
+    # Warm-up: load model, JIT/cuDNN, cache OCR — tidak dihitung
+    for img in images[: args.warmup]:
+        await uc.run_single_shot(img.read_bytes(), return_partial=False)
+
+    rows = []
+    for i, img in enumerate(images, 1):
+        row = await bench_one(uc, img, labels_dir=labels_dir, cls_id=args.title_cls, truth=truth,
+                              rank_k=args.rank_k, return_partial=args.return_partial,
+                              t1_ms=args.t1_ms, t2_ms=args.t2_ms)
+        rows.append(row)
+        if args.verbose:
+            print(f"[{i}/{len(images)}] {img.name} iou={row['title_iou']} t1={row['t1']} t2={row['t2']} "
+                  f"title={row['title_text']!r} total={row['timings']['total_ms']}ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "images_dir": str(images_dir),
+            "catalog": args.catalog,
+            "truth": str(truth_path) if truth else None,
+            "ocr_engine": os.getenv("OCR_ENGINE", "tesseract"),
+            "yolo_weights": os.getenv("YOLO_WEIGHTS", "models/yolo/yolo11m.pt"),
+            "yolo_img_size": int(os.getenv("YOLO_IMG_SIZE", "640")),
+            "yolo_title_class_id": int(os.getenv("YOLO_TITLE_CLASS_ID", "1")),
+            "yolo_regex_thresh": uc.pipe.yolo_regex_thresh,
+            "always_run_regex": uc.pipe.always_run_regex,
+            "t1_ms": args.t1_ms,
+            "t2_ms": args.t2_ms,
+            "return_partial": args.return_partial,
+        },
+        "summary": summarize(rows, args.iou_thresh),
+        "images": rows,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", default=str(ROOT / "data/yolo_title_clean/images/test"))
+    ap.add_argument("--labels", default=None, help="default: <dataset>/labels/<split>")
+    ap.add_argument("--title-cls", type=int, default=0, help="id kelas title di file label")
+    ap.add_argument("--truth", default=None, help="JSON ground truth produk per gambar")
+    ap.add_argument("--catalog", choices=("stub", "local"), default="stub")
+    ap.add_argument("--catalog-size", type=int, default=5000, help="produk sintetis di katalog stub")
+    ap.add_argument("--rank-k", type=int, default=10)
+    ap.add_argument("--iou-thresh", type=float, default=0.5)
+    ap.add_argument("--t1-ms", type=int, default=int(os.getenv("T1_TIMEOUT_MS", "500")))
+    ap.add_argument("--t2-ms", type=int, default=int(os.getenv("T2_TIMEOUT_MS", "1200")))
+    ap.add_argument("--return-partial", action="store_true", help="ukur jalur early-return T1 (default: final)")
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--out", default=None, help="tulis hasil JSON ke file")
+    ap.add_argument("--compare", default=None, help="JSON hasil run sebelumnya untuk delta")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+
+    report = asyncio.run(amain(args))
+    if args.compare:
+        report["compare"] = compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+    _print_summary(report["summary"])
+    if args.compare:
+        c = report["compare"]
+        print(f"changed_images={len(c['changed_images'])} "
+              + " ".join(f"{k}:{v['delta']:+}" for k, v in c.items() if isinstance(v, dict) and "delta" in v),
+              file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
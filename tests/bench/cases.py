@@ -0,0 +1,131 @@
+# tests/bench/cases.py
+"""
+Kasus micro-benchmark untuk fungsi pure-Python di jalur panas tiap request.
+
+Tiap kasus: build() → callable tanpa argumen yang memproses SATU batch input realistis
+(judul/teks hasil OCR label, pertanyaan user, evidence verify, JSON DataTables cekbpom).
+Dipakai oleh tests/bench/test_hot_paths.py (pytest-benchmark) dan scripts/microbench.py
+(runner mandiri + baseline tests/bench/baseline.json).
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Callable, Dict, List
+
+DATA = Path(__file__).resolve().parent / "data"
+
+# Keluaran OCR(title) mentah dari crop judul (tesseract, termasuk derau khas)
+OCR_TITLES: List[str] = [
+    "PANADOL 500 mg Kaplet", "P4NADOL| 500mg KAPLET", "AMOXSAN® 500 mg Kapsul",
+    "Bodrex Extra\nKaplet", "OSKADON SP tablet", "Paracetamol 500 mg Tablet",
+    "LIPITOR 20mg film-coated tablet", "Tolak Angin CAIR 15 ml", "ambroxol HCl 30 mg TAB",
+    "CETIRIZINE 10 MG", "Sanmol Sirup 60 ML", "Promag — Tablet Kunyah", "",
+    "OBH COMBI BATUK FLU MENTHOL 100ML", "Mylanta® Cair 50 ml suspensi", "~~ INZA ~~",
+]
+
+# Keluaran OCR(full) per label: baris teks digabung (sesuai ScanPipeline t2_task)
+OCR_FULL_TEXTS: List[str] = [
+    "PANADOL\nParacetamol 500 mg\n10 kaplet\nReg. No. DBL 1234567890 A1\nPT SANBE FARMA\nBandung - Indonesia",
+    "AMOXSAN\nAmoxicillin trihydrate\nsetara Amoxicillin 500 mg\nHARUS DENGAN RESEP DOKTER\nNo. Reg: DKL9876543210B2",
+    "TOLAK ANGIN\nCAIR\nPOM TR123456789\nIsi 15 ml\nSIDO MUNCUL",
+    "Komposisi: tiap tablet mengandung\nParacetamol 500 mg\nBatch: 2210334\nExp: 10 2026\nBPOM RI MD 224510001234",
+    "BODREX EXTRA\nParacetamol 350 mg\nIbuprofen 200 mg\nDBL0011223344C1\nSimpan di bawah suhu 30°C",
+    "SAMPLE — NOT FOR SALE\nDKL1111111111A1",
+    "OSKADON SP\nPT SUPRA FERBINDO FARMA\nJakarta - Indonesia\nNo. Reg. DTL 2233445566 A1",
+    "Wardah\nLightening\nDay Cream\n30 g\nNA18201200123\nPT Paragon",
+    "Nomor ijin edar tidak terbaca\n|||| ||| | ||||\nKemasan rusak",
+    "P-IRT 2063374010123-25\nKeripik singkong\nExp 12/2025",
+]
+
+# Pertanyaan user /v1/agent (intent classifier)
+AGENT_QUERIES: List[str] = [
+    "apa efek samping paracetamol?", "berapa dosis amoxicillin untuk anak 5 tahun",
+    "apakah panadol aman untuk ibu hamil", "komposisi DBL1234567890A1 apa saja",
+    "cara pakai obat ini gimana", "boleh diminum bersamaan dengan antasida?",
+    "halo selamat pagi", "terima kasih ya", "bandingkan bodrex dan panadol",
+    "harga oskadon berapa dan beli dimana", "simpan sirup ini di kulkas atau tidak",
+    "apa itu oskadon", "rumus kimia ibuprofen dan strukturnya",
+    "siapa juara sepak bola tadi malam", "obat ini kontraindikasi dengan apa",
+    "peringatan penggunaan untuk lansia",
+]
+
+# Query search (title OCR, NIE, teks berderau) untuk is_noisy / looks_like_nie
+SEARCH_QUERIES: List[str] = [
+    "PANADOL 500", "DBL1234567890A1", "dkl 9876543210 b2", "P4N@D0L|| 5OO mg", "bodrex",
+    "NA18201200123", "amoxicillin trihydrate 500 mg kapsul", "~~ INZA ~~", "ob", "MD224510001234",
+    "TOLAK ANGIN CAIR", "paracetamol", "#### ?? !!", "Sanmol sirup 60ml", "GKL1122334455A1", "oskadon sp",
+]
+
+
+def _evidence_sets():
+    from app.domain.confidence import Evidence, EvidenceSource, MatchStrength
+
+    def ev(src, ms, q=0.8, r=0.7, n=0.9, payload=None):
+        return Evidence(source=src, product_id="DBL1234567890A1", name="PANADOL 500 MG KAPLET",
+                        payload=payload or {"state": "active"}, match_strength=ms, quality=q,
+                        recency_factor=r, name_confidence=n, provider_score=0.9, reasons=["bench"])
+
+    return [
+        [ev(EvidenceSource.MONGO, MatchStrength.EXACT)],
+        [ev(EvidenceSource.MONGO, MatchStrength.STRONG), ev(EvidenceSource.FAISS, MatchStrength.MEDIUM, q=0.6)],
+        [ev(EvidenceSource.FAISS, MatchStrength.WEAK, q=0.5, r=0.4),
+         ev(EvidenceSource.WEB, MatchStrength.MEDIUM, q=0.4, payload={"not_found": True}),
+         ev(EvidenceSource.WEB, MatchStrength.WEAK, q=0.3, payload={"unregistered": True})],
+        [ev(EvidenceSource.MONGO, MatchStrength.EXACT, payload={"status": "revoked"}),
+         ev(EvidenceSource.FAISS, MatchStrength.STRONG), ev(EvidenceSource.WEB, MatchStrength.NONE, q=0.2)],
+        [],
+    ]
+
+
+def _norm_title_case() -> Callable[[], object]:
+    from app.infra.pipelines.scan_pipeline import _norm_title
+    return lambda: [_norm_title(t) for t in OCR_TITLES]
+
+
+def _bpom_validate_case() -> Callable[[], object]:
+    from app.infra.regex.bpom_validator import RegexBpomValidator
+    v = RegexBpomValidator()
+    return lambda: [v.validate(t) for t in OCR_FULL_TEXTS]
+
+
+def _classify_case() -> Callable[[], object]:
+    from app.services.medical_classifier import classify
+    ctx = {"verification": {"canon": {"name": "PANADOL", "nie": "DBL1234567890A1"}}}
+    return lambda: [classify(q, ctx) for q in AGENT_QUERIES]
+
+
+def _aggregate_case() -> Callable[[], object]:
+    from app.domain.services.verification_aggregator import aggregate
+    sets = _evidence_sets()
+    return lambda: [aggregate(s) for s in sets]
+
+
+def _score_evidence_case() -> Callable[[], object]:
+    from app.domain.services.verification_aggregator import score_evidence
+    evs = [e for s in _evidence_sets() for e in s]
+    return lambda: [score_evidence(e) for e in evs]
+
+
+def _query_heuristics_case() -> Callable[[], object]:
+    from app.infra.search.router import is_noisy, looks_like_nie
+    return lambda: [(is_noisy(q), looks_like_nie(q)) for q in SEARCH_QUERIES]
+
+
+def _normalize_rows_case(kind: str) -> Callable[[], object]:
+    from crawler.cekbpom_json import _normalize_rows
+    dt_json = json.loads((DATA / f"cekbpom_dt_{kind}.json").read_text(encoding="utf-8"))
+    return lambda: _normalize_rows(dt_json)
+
+
+# nama → (builder, ukuran batch per panggilan)
+CASES: Dict[str, tuple] = {
+    "norm_title": (_norm_title_case, len(OCR_TITLES)),
+    "bpom_validate": (_bpom_validate_case, len(OCR_FULL_TEXTS)),
+    "classify": (_classify_case, len(AGENT_QUERIES)),
+    "aggregate": (_aggregate_case, 5),
+    "score_evidence": (_score_evidence_case, 9),
+    "query_heuristics": (_query_heuristics_case, len(SEARCH_QUERIES)),
+    "normalize_rows_list": (lambda: _normalize_rows_case("list"), 8),
+    "normalize_rows_dict": (lambda: _normalize_rows_case("dict"), 8),
+}
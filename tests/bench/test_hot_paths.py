@@ -0,0 +1,22 @@
+# tests/bench/test_hot_paths.py
+# Micro-benchmark (pytest-benchmark). Contoh:
+#   pytest tests/bench --benchmark-only --benchmark-autosave
+#   pytest tests/bench --benchmark-only --benchmark-compare --benchmark-compare-fail=mean:15%
+# Tanpa plugin → di-skip; runner mandiri + baseline: python scripts/microbench.py
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from tests.bench.cases import CASES
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_hot_path(benchmark, name):
+    build, batch = CASES[name]
+    try:
+        fn = build()
+    except ImportError as e:  # dependensi opsional (cv2/bs4/motor) tidak terpasang
+        pytest.skip(f"{name}: {e}")
+    benchmark.extra_info["batch"] = batch
+    out = benchmark(fn)
+    assert out is not None
@@ -0,0 +1,35 @@
+# tests/unit/test_admission.py
+import asyncio
+from fastapi import HTTPException
+from app.infra.api.admission import AdaptiveLimiter
+
+def _lim(**kw):
+    cfg = dict(limit=2, min_limit=1, max_limit=8, queue_max=1, queue_slo_ms=200, target_ms=50)
+    cfg.update(kw)
+    return AdaptiveLimiter("test", **cfg)
+
+async def _run():
+    lim = _lim()
+    a, b = await lim.acquire(), await lim.acquire()
+    waiter = asyncio.ensure_future(lim.acquire())   # masuk antrean
+    await asyncio.sleep(0)
+    try:
+        await lim.acquire()                          # antrean penuh → 503
+        assert False, "harus di-shed"
+    except HTTPException as e:
+        assert e.status_code == 503 and "Retry-After" in e.headers
+    lim.release(a)                                   # slot pindah ke waiter
+    c = await waiter
+    assert lim.inflight == 2 and lim.stats()["queued"] == 1
+    lim.release(b)
+    lim.release(c)
+    assert lim.inflight == 0
+
+    # latency di atas target → limit turun (multiplicative decrease)
+    slow = _lim(limit=4)
+    t = await slow.acquire()
+    slow.release(t - 1.0)
+    assert slow.limit < 4 and slow.stats()["decreases"] == 1
+
+def test_adaptive_limiter():
+    asyncio.run(_run())
@@ -0,0 +1,20 @@
+# tests/unit/test_llm_cache.py
+import asyncio
+from app.infra.llm.llm_cache import LlmResponseCache, llm_cache_key
+
+async def _run():
+    c = LlmResponseCache(client=None, l1_size=2, ttl_s={"explain": 60, "web_search": 0})
+    k1 = llm_cache_key("m", [{"role": "user", "content": "a"}], {"temperature": 0.2})
+    k2 = llm_cache_key("m", [{"role": "user", "content": "a"}], {"temperature": 0.7})
+    assert k1 != k2
+    assert await c.get(k1) is None
+    await c.put(k1, "ringkasan", "explain")
+    assert await c.get(k1) == "ringkasan"
+    await c.put(k2, "x", "web_search")  # ttl 0 → tidak disimpan
+    assert await c.get(k2) is None
+    await c.put("a", 1, "explain"); await c.put("b", 2, "explain")
+    assert await c.get(k1) is None  # terdorong keluar LRU (size 2)
+    assert c.stats()["l1_hits"] == 1
+
+def test_llm_cache_l1():
+    asyncio.run(_run())
@@ -0,0 +1,40 @@
+# tests/unit/test_lookup_writer.py
+import asyncio
+from app.infra.repo.lookup_writer import LookupWriter
+
+async def _run():
+    batches = []
+
+    async def sink(docs):
+        batches.append(list(docs))
+
+    w = LookupWriter(sink, max_queue=3, batch_size=2, flush_ms=20, policy="drop_oldest")
+    for i in range(5):
+        await w.submit({"i": i})
+    await w.close()
+    written = [d["i"] for b in batches for d in b]
+    assert written == [2, 3, 4]  # 0,1 terdorong keluar (drop_oldest) sebelum loop sempat jalan
+    assert all(len(b) <= 2 for b in batches)
+    st = w.stats()
+    assert st["dropped"] == 2 and st["written"] == 3 and st["depth"] == 0
+    assert await w.submit({"i": 9}) is False  # setelah close → drop
+
+def test_lookup_writer_batches_and_drops():
+    asyncio.run(_run())
+
+
+async def _run_inflight():
+    done = []
+
+    async def slow_sink(docs):
+        await asyncio.sleep(0.05)
+        done.extend(docs)
+
+    w = LookupWriter(slow_sink, batch_size=1, flush_ms=10)
+    await w.submit({"i": 1})
+    await asyncio.sleep(0.01)  # loop sudah memulai insert batch ini
+    await w.close()
+    assert done == [{"i": 1}]  # close() menunggu write yang sedang berjalan
+
+def test_lookup_writer_close_awaits_inflight_flush():
+    asyncio.run(_run_inflight())
@@ -0,0 +1,24 @@
+# tests/unit/test_loop_monitor.py
+import time
+import asyncio
+from app.infra.observability.loop_monitor import LoopLagMonitor
+
+def _blocking_call():
+    time.sleep(0.25)   # simulasi YOLO/pytesseract sinkron di handler async
+
+async def _run():
+    mon = LoopLagMonitor(threshold_ms=80, interval_ms=20, sample_ms=10)
+    mon.start()
+    await asyncio.sleep(0.1)
+    _blocking_call()
+    await asyncio.sleep(0.1)
+    await mon.stop()
+    st = mon.stats(stacks=True)
+    assert st["stalls"] >= 1 and st["max_lag_ms"] >= 150
+    top = st["sites"][0]
+    assert "test_loop_monitor.py" in top["site"] and "_blocking_call" in top["site"]
+    assert top["ms_max"] >= 150
+    assert "_blocking_call" in st["recent"][-1]["stack"]
+
+def test_loop_lag_monitor_attributes_blocking_call():
+    asyncio.run(_run())
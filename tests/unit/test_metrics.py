@@ -0,0 +1,32 @@
+# tests/unit/test_metrics.py
+import asyncio
+import pytest
+
+from app.infra.observability import metrics
+
+pytestmark = pytest.mark.skipif(not metrics.METRICS_ENABLE, reason="prometheus_client tidak terpasang")
+
+
+class _FakeRedis:
+    # Seperti redis-py: command = def biasa yang mengembalikan awaitable
+    def get(self, k):
+        async def _do():
+            return "v"
+        return _do()
+
+    def pipeline(self):
+        return "pipe"
+
+
+def _count(outcome="ok"):
+    return metrics.REGISTRY.get_sample_value(
+        "medverify_stage_seconds_count", {"stage": "redis", "endpoint": "-", "outcome": outcome}) or 0.0
+
+
+def test_timed_redis_records_awaitable_commands():
+    r = metrics.TimedRedis(_FakeRedis())
+    before = _count()
+    assert asyncio.run(r.get("k")) == "v"
+    assert _count() == before + 1
+    assert r.pipeline() == "pipe"  # hasil non-awaitable diteruskan tanpa sample
+    assert _count() == before + 1
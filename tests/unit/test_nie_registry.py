@@ -0,0 +1,30 @@
+from app.infra.search.nie_registry import NieRegistry, BloomFilter, normalize_nie
+
+def test_registry_absent_and_present():
+    reg = NieRegistry()
+    assert not reg.definitely_absent("DBL1234567890A1")  # belum load → fallback Mongo
+    reg.load_from_iterable(["dbl 1234567890 a1", "DKL0987654321B2", None, ""])
+    assert len(reg) == 2
+    assert not reg.definitely_absent("DBL1234567890A1")
+    assert reg.definitely_absent("DBL0000000000X9")
+    reg.add("DBL0000000000X9")
+    assert not reg.definitely_absent("DBL0000000000X9")
+    assert reg.bloom.might_contain(normalize_nie("DBL0000000000X9"))
+
+def test_bloom_roundtrip():
+    bf = BloomFilter(capacity=1000, fp_rate=0.01)
+    for i in range(1000):
+        bf.add(f"DKL{i:010d}")
+    assert all(bf.might_contain(f"DKL{i:010d}") for i in range(1000))
+    fp = sum(bf.might_contain(f"XXX{i:010d}") for i in range(5000))
+    assert fp < 200
+    bf2 = BloomFilter.from_bytes(bf.to_bytes(), m=bf.m, k=bf.k)
+    assert bf2.might_contain("DKL0000000001")
+
+def test_registry_not_live_falls_back_to_mongo():
+    reg = NieRegistry(client=object())  # ada Redis tapi subscriber belum tersambung
+    reg.load_from_iterable(["DKL0987654321B2"])
+    assert not reg.definitely_absent("DBL0000000000X9")
+    reg.live = True
+    assert reg.definitely_absent("DBL0000000000X9")
+    assert reg.add("DBL0000000000X9") and not reg.definitely_absent("DBL0000000000X9")
@@ -0,0 +1,35 @@
+# tests/unit/test_product_cache.py
+import asyncio
+from app.infra.cache.product_cache import ProductCache, CachedProductRepo
+
+class _FakeRedis:
+    def __init__(self):
+        self.kv = {}
+    async def get(self, k): return self.kv.get(k)
+    async def mget(self, ks): return [self.kv.get(k) for k in ks]
+    async def set(self, k, v, ex=None): self.kv[k] = v
+    async def delete(self, *ks): return sum(1 for k in ks if self.kv.pop(k, None) is not None)
+
+class _FakeRepo:
+    def __init__(self):
+        self.n = 0
+    async def find_by_nie(self, nie):
+        self.n += 1
+        return {"nie": "DBL1", "name": "Paracetamol"} if nie.upper() == "DBL1" else None
+
+async def _run():
+    pc = ProductCache(_FakeRedis())
+    repo = CachedProductRepo(_FakeRepo(), pc)
+    assert (await repo.find_by_nie("dbl1"))["name"] == "Paracetamol"
+    assert (await repo.find_by_nie("DBL1"))["name"] == "Paracetamol"
+    assert await repo.find_by_nie("XX9") is None
+    assert await repo.find_by_nie("xx9") is None
+    assert repo.inner.n == 2
+    s = pc.stats()
+    assert s["hits"] == 1 and s["negative_hits"] == 1 and s["misses"] == 2
+    await pc.invalidate("xx9")
+    await repo.find_by_nie("XX9")
+    assert repo.inner.n == 3
+
+def test_product_cache_read_through():
+    asyncio.run(_run())
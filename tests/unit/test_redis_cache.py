@@ -15,4 +15,4 @@ async def _run():
     assert len(xs) == 2 and xs[0]["i"] == 3
 
 def test_cache_ops():
-    asyncio.get_event_loop().run_until_complete(_run())
+    asyncio.run(_run())
@@ -0,0 +1,29 @@
+import asyncio
+from app.infra.repo.request_scope import MemoizingRepo, request_scope
+
+class _FakeRepo:
+    def __init__(self):
+        self.n = 0
+
+    async def find_by_nie(self, nie):
+        self.n += 1
+        await asyncio.sleep(0.01)
+        return {"nie": nie.upper(), "_score": 1.0, "_src": "exact"}
+
+async def _run():
+    inner = _FakeRepo()
+    repo = MemoizingRepo(inner)
+    await repo.find_by_nie("dbl1")
+    await repo.find_by_nie("dbl1")
+    assert inner.n == 2  # di luar scope → passthrough
+
+    with request_scope() as scope:
+        a, b = await asyncio.gather(repo.find_by_nie("dbl1"), repo.find_by_nie("DBL1"))
+        a["_score"] = 0.99
+        c = await repo.find_by_nie("dbl 1")
+    assert inner.n == 3
+    assert b["_score"] == 1.0 and c["_score"] == 1.0
+    assert scope.summary()["calls"] == 3 and scope.summary()["saved"] == 2
+
+def test_memo_collapses_lookups():
+    asyncio.run(_run())
@@ -0,0 +1,44 @@
+# tests/unit/test_scout_cache.py
+import asyncio
+from app.infra.cache.scout_cache import ScoutCache, scout_subject, scout_topic, scout_cache_key
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.d, self.ttl = {}, {}
+
+    async def get(self, k):
+        return self.d.get(k)
+
+    async def set(self, k, v, ex=None):
+        self.d[k], self.ttl[k] = v, ex
+
+
+def test_scout_subject_prefers_nie():
+    assert scout_subject("dbl 1234567890 a1", "Panadol") == "nie:DBL1234567890A1"
+    assert scout_subject(None, "Panadol Extra 500 mg") == "name:panadol-extra-500-mg"
+    assert scout_subject("", "  ") is None
+
+
+def test_scout_topic_tracks_question():
+    a = scout_topic("Apa efek samping Panadol?", "Panadol")
+    assert a == scout_topic("panadol efek sampingnya apa", "Panadol")
+    assert a != scout_topic("Panadol boleh untuk anak umur 5 tahun?", "Panadol")
+    assert scout_topic("apa ini?") == "-"
+
+
+async def _run():
+    r = _FakeRedis()
+    c = ScoutCache(r, ttl_s=600, price_ttl_s=60)
+    subj = scout_subject("DBL1234567890A1", None)
+    assert await c.get(subj, "side_effects", "id") is None
+    await c.put(subj, "side_effects", "id", {"summary": "mual", "sources": []})
+    assert (await c.get(subj, "side_effects", "id"))["summary"] == "mual"
+    assert await c.get(subj, "side_effects", "en") is None  # bahasa beda → key beda
+    await c.put(subj, "price_availability", "id", {"summary": "Rp"})
+    assert r.ttl[scout_cache_key(subj, "price_availability", "id")] == 60
+    assert c.stats()["hits"] == 1 and c.stats()["misses"] == 2
+
+
+def test_scout_cache_roundtrip():
+    asyncio.run(_run())
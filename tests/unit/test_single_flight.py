@@ -0,0 +1,34 @@
+# tests/unit/test_single_flight.py
+import asyncio
+from app.infra.cache.single_flight import SingleFlight
+
+async def _run():
+    sf = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return [{"nie": "DBL1", "_score": 0.9, "data": {"product": {"name": "Panadol"}}}]
+
+    res = await asyncio.gather(*(sf.do(("search", "panadol", 5), compute) for _ in range(10)))
+    assert len(calls) == 1
+    res[0][0]["_score"] = 0.1          # salinan per pemanggil
+    assert res[1][0]["_score"] == 0.9
+    res[0][0]["data"]["product"]["name"] = "x"  # termasuk dict bertingkat
+    assert res[1][0]["data"]["product"]["name"] == "Panadol"
+    assert sf.stats()["shared"] == 9 and sf.stats()["inflight"] == 0
+
+    await sf.do(("search", "panadol", 5), compute)  # selesai → tidak di-cache
+    assert len(calls) == 2
+
+    async def boom():
+        raise RuntimeError("x")
+    try:
+        await sf.do("k", boom)
+    except RuntimeError:
+        pass
+    assert sf.stats()["inflight"] == 0
+
+def test_single_flight_coalesces():
+    asyncio.run(_run())
@@ -0,0 +1,35 @@
+from app.infra.search.suggest_index import SuggestIndex
+
+def _idx():
+    idx = SuggestIndex()
+    idx.build(
+        [
+            {"nie": "DBL1", "name": "PANADOL PARACETAMOL 500 MG", "brand": "Panadol"},
+            {"nie": "DBL2", "name": "PARACETAMOL", "brand": None},
+            {"nie": "DKL3", "name": "OSKADON", "brand": "Oskadon"},
+        ],
+        popularity={"DBL1": 5},
+    )
+    return idx
+
+def test_prefix_ranked_by_popularity():
+    out = _idx().suggest("parac", k=5)
+    assert [d["nie"] for d in out] == ["DBL1", "DBL2"]
+
+def test_prefix_by_nie_and_bump():
+    idx = _idx()
+    assert idx.suggest("dkl")[0]["name"] == "OSKADON"
+    assert idx.suggest("zzz") == []
+    idx.bump("DBL2", 10)
+    assert idx.suggest("para")[0]["nie"] == "DBL2"
+
+def test_bump_normalizes_nie_and_invalidates_memo():
+    import app.infra.search.suggest_index as si
+    idx = _idx()
+    si_limit, si._SCAN_LIMIT = si._SCAN_LIMIT, 0  # semua range dianggap besar → di-memo
+    try:
+        assert idx.suggest("p")[0]["nie"] == "DBL1"
+        idx.bump("dbl 2", 10)
+        assert idx.suggest("p")[0]["nie"] == "DBL2"
+    finally:
+        si._SCAN_LIMIT = si_limit
@@ -0,0 +1,41 @@
+# tests/unit/test_verify_batch.py
+import asyncio
+from app.application.use_cases import VerifyLabelUseCase
+from app.infra.search.router import SearchRouter
+
+class _FakeRepo:
+    def __init__(self):
+        self.calls = {"find_by_nie": 0, "find_by_nies": 0, "search_lexical": 0}
+    async def find_by_nie(self, nie):
+        self.calls["find_by_nie"] += 1
+        return None
+    async def find_by_nies(self, nies):
+        self.calls["find_by_nies"] += 1
+        return {n: {"nie": n, "name": f"Produk {n}", "state": "valid"} for n in nies if n.startswith("DBL")}
+    async def search_lexical(self, q, limit=25, atlas_index=None):
+        self.calls["search_lexical"] += 1
+        return [{"nie": "DBL1234567890A1", "name": "Produk", "_score": 0.9, "_src": "lex"}]
+    async def save_lookups(self, rows):
+        pass
+
+async def _run():
+    repo = _FakeRepo()
+    router = SearchRouter(repo=repo, embedder=object(), faiss_index=object())
+    uc = VerifyLabelUseCase(ocr=None, satusehat=None, repo=repo, cache=None, llm=None, search_router=router)
+    items = [{"nie": "DBL1234567890A1"}, {"nie": "dbl 1234567890 a1"}, {"nie": "DKL0987654321B2"}]
+    rows = [r async for r in uc.execute_batch(items)]
+    assert len(rows) == 3 and not any("error" in r for r in rows)
+    # Satu query `$in` untuk semua NIE; tidak ada find_by_nie per item (leg exact maupun router)
+    assert repo.calls["find_by_nies"] == 1
+    assert repo.calls["find_by_nie"] == 0
+    # Hit exact dari prefetch tidak butuh lexical; NIE yang tidak ada tetap lewat lexical
+    assert repo.calls["search_lexical"] == 1
+
+def test_batch_resolves_nies_without_per_item_repo_calls():
+    asyncio.run(_run())
+
+def test_degraded_response_not_cacheable():
+    from app.application.use_cases import _cacheable
+    assert _cacheable({"flags": []})
+    assert not _cacheable({"flags": ["source_timeout"]})
+    assert not _cacheable({"flags": ["llm_offline"]})